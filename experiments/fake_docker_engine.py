@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""Fake Docker Engine API server on a unix socket.
+
+Serves just enough of the Engine API for DockerEngineClient / DockerManager
+to be exercised without a docker daemon (e.g. on a dev laptop):
+
+  GET  /_ping
+  GET  /version
+  GET  /containers/json?all=1&filters={"label": [...]}
+  GET  /containers/{id}/json
+  GET  /containers/{id}/stats?stream=false   (synthetic, steadily growing counters)
+  POST /containers/{id}/start | stop | restart
+  GET  /events?filters={"type": [...], "label": [...]}   (chunked JSON stream)
+
+start/stop/restart emit the same container events a real engine does
+(kill/die/stop/start/restart); --crash-every N makes the recorder container
+die with exit code 137 every N seconds and come back 2 s later, to exercise
+event-driven handling in the GUI and CaptureController.
+
+Containers belong to one compose project (--project, default "docker", the
+name compose derives from /opt/radiohound/docker). HTTP/1.1 keep-alive is
+honoured, and the number of accepted connections is logged, so a client
+that reconnects per request is easy to spot.
+
+Serve for manual use:
+    python fake_docker_engine.py --socket /tmp/fake-docker.sock
+    DOCKER_HOST=unix:///tmp/fake-docker.sock python ../scripts/mep_gui.py
+
+Self-check against the real client code:
+    python fake_docker_engine.py --check
+"""
+
+import argparse
+import http.server
+import json
+import os
+import queue
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+DEFAULT_SERVICES = ("recorder", "mqtt", "tuner_control", "afe")
+# Synthetic load per service: (cores, MiB resident, net kB/s, disk write kB/s)
+SERVICE_LOAD = {"recorder": (1.5, 900, 2000, 60000)}
+IDLE_LOAD = (0.02, 40, 2, 1)
+
+
+class FakeEngine:
+    """In-memory container table shared by all handler threads."""
+
+    def __init__(self, project: str, services=DEFAULT_SERVICES):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.subscribers = []
+        self.containers = {}
+        for i, svc in enumerate(services):
+            cid = f"{i + 1:02d}" * 32
+            self.containers[cid] = {
+                "Id": cid,
+                "Names": [f"/{project}-{svc}-1"],
+                "Image": f"radiohound/{svc}:latest",
+                "Command": f"/usr/local/bin/{svc}",
+                "Created": int(time.time()) - 3600,
+                "State": "running",
+                "Status": "Up 1 hour",
+                "Ports": [{"PrivatePort": 1883, "PublicPort": 1883, "IP": "0.0.0.0", "Type": "tcp"}]
+                         if svc == "mqtt" else [],
+                "Labels": {PROJECT_LABEL: project, SERVICE_LABEL: svc},
+            }
+
+    def list(self, all_: bool, filters: dict) -> list:
+        labels = filters.get("label", [])
+        out = []
+        with self.lock:
+            for c in self.containers.values():
+                if not all_ and c["State"] != "running":
+                    continue
+                if all(self._label_match(c["Labels"], f) for f in labels):
+                    out.append(dict(c))
+        return out
+
+    @staticmethod
+    def _label_match(labels: dict, flt: str) -> bool:
+        key, _, value = flt.partition("=")
+        return key in labels and (not value or labels[key] == value)
+
+    def _emit(self, c: dict, action: str, **attrs):
+        now = time.time()
+        event = {
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "id": c["Id"],
+            "Actor": {"ID": c["Id"], "Attributes": {
+                **c["Labels"], "name": c["Names"][0].lstrip("/"), "image": c["Image"], **attrs}},
+            "scope": "local",
+            "time": int(now),
+            "timeNano": int(now * 1e9),
+        }
+        for q in list(self.subscribers):
+            q.put(event)
+
+    def _down(self, c: dict, exit_code: int, stopped: bool):
+        if stopped:
+            self._emit(c, "kill", signal="15")
+        self._emit(c, "die", exitCode=str(exit_code))
+        if stopped:
+            self._emit(c, "stop")
+        c["State"], c["Status"] = "exited", f"Exited ({exit_code}) Less than a second ago"
+
+    def _up(self, c: dict, action: str = "start"):
+        c["State"], c["Status"] = "running", "Up Less than a second"
+        self._emit(c, "start")
+        if action == "restart":
+            self._emit(c, "restart")
+
+    def action(self, cid: str, action: str) -> int:
+        with self.lock:
+            c = self.containers.get(cid)
+            if c is None:
+                return 404
+            running = c["State"] == "running"
+            if action == "start":
+                if running:
+                    return 304
+                self._up(c)
+            elif action == "stop":
+                if not running:
+                    return 304
+                self._down(c, 0, stopped=True)
+            elif action == "restart":
+                if running:
+                    self._down(c, 0, stopped=True)
+                self._up(c, "restart")
+            else:
+                return 404
+        return 204
+
+    def crash(self, service: str, exit_code: int = 137):
+        """Container dies on its own (no kill/stop events), like an OOM or segfault."""
+        with self.lock:
+            for c in self.containers.values():
+                if c["Labels"].get(SERVICE_LABEL) == service and c["State"] == "running":
+                    self._down(c, exit_code, stopped=False)
+
+    def revive(self, service: str):
+        with self.lock:
+            for c in self.containers.values():
+                if c["Labels"].get(SERVICE_LABEL) == service and c["State"] != "running":
+                    self._up(c, "restart")
+
+    def inspect(self, cid: str):
+        with self.lock:
+            c = self.containers.get(cid)
+            if c is None:
+                return None
+            return {"Id": cid, "Name": c["Names"][0], "Config": {"Labels": c["Labels"]},
+                    "State": {"Status": c["State"], "Running": c["State"] == "running", "Pid": 0}}
+
+    def stats(self, cid: str):
+        """cgroup-v2 style stats whose counters grow at the service's SERVICE_LOAD rate."""
+        with self.lock:
+            c = self.containers.get(cid)
+            if c is None:
+                return None
+            svc = c["Labels"][SERVICE_LABEL]
+        cores, mem_mib, net_kbs, blk_kbs = SERVICE_LOAD.get(svc, IDLE_LOAD)
+        up = time.time() - (c["Created"] + 3000)
+        return {
+            "read": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "cpu_stats": {"cpu_usage": {"total_usage": int(up * cores * 1e9)}, "online_cpus": 8},
+            "memory_stats": {"usage": mem_mib * 2**20 + 2**22, "stats": {"inactive_file": 2**22}},
+            "networks": {"eth0": {"rx_bytes": int(up * net_kbs * 1e3), "tx_bytes": int(up * net_kbs * 50)}},
+            "blkio_stats": {"io_service_bytes_recursive": [
+                {"major": 259, "minor": 0, "op": "read", "value": int(up * 1e3)},
+                {"major": 259, "minor": 0, "op": "write", "value": int(up * blk_kbs * 1e3)},
+            ]},
+        }
+
+    def events_match(self, event: dict, filters: dict) -> bool:
+        types = filters.get("type")
+        if types and event["Type"] not in types:
+            return False
+        attrs = event["Actor"]["Attributes"]
+        return all(self._label_match(attrs, f) for f in filters.get("label", []))
+
+
+def make_handler(engine: FakeEngine):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with engine.lock:
+                engine.connections += 1
+
+        def address_string(self):
+            return "unix"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status: int, body=None, content_type="application/json"):
+            data = b""
+            if body is not None:
+                data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+            self.send_response(status)
+            if data:
+                self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self, method: str):
+            with engine.lock:
+                engine.requests += 1
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            parts = [p for p in url.path.split("/") if p]
+            if parts and parts[0].startswith("v1."):
+                parts = parts[1:]   # versioned paths, e.g. /v1.43/containers/json
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+
+            if method == "GET" and parts == ["_ping"]:
+                return self._send(200, "OK", "text/plain; charset=utf-8")
+            if method == "GET" and parts == ["version"]:
+                return self._send(200, {"Version": "fake", "ApiVersion": "1.43"})
+            if method == "GET" and parts == ["containers", "json"]:
+                filters = json.loads(query.get("filters") or "{}")
+                return self._send(200, engine.list(query.get("all") in ("1", "true"), filters))
+            if method == "GET" and len(parts) == 3 and parts[0] == "containers":
+                body = engine.inspect(parts[1]) if parts[2] == "json" else (
+                    engine.stats(parts[1]) if parts[2] == "stats" else None)
+                if body is None:
+                    return self._send(404, {"message": f"No such container: {parts[1]}"})
+                return self._send(200, body)
+            if method == "POST" and len(parts) == 3 and parts[0] == "containers":
+                status = engine.action(parts[1], parts[2])
+                if status == 404:
+                    return self._send(404, {"message": f"No such container: {parts[1]}"})
+                return self._send(status)
+            return self._send(404, {"message": "page not found"})
+
+        def _stream_events(self, filters: dict):
+            q = queue.Queue()
+            engine.subscribers.append(q)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            try:
+                while True:
+                    event = q.get()
+                    if not engine.events_match(event, filters):
+                        continue
+                    data = json.dumps(event).encode() + b"\n"
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+            except OSError:
+                pass
+            finally:
+                engine.subscribers.remove(q)
+                self.close_connection = True
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path.rstrip("/").endswith("/events"):
+                query = dict(urllib.parse.parse_qsl(url.query))
+                with engine.lock:
+                    engine.requests += 1
+                return self._stream_events(json.loads(query.get("filters") or "{}"))
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+    return Handler
+
+
+class FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str, engine: FakeEngine) -> FakeEngineServer:
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = FakeEngineServer(socket_path, make_handler(engine))
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-docker").start()
+    return server
+
+
+def run_check(project: str) -> int:
+    """Drive DockerManager against the fake engine and report round trips."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+    tmp = tempfile.mkdtemp(prefix="fake-docker-")
+    sock = os.path.join(tmp, "docker.sock")
+    compose_dir = os.path.join(tmp, project)
+    os.makedirs(compose_dir)
+    engine = FakeEngine(project)
+    server = serve(sock, engine)
+    os.environ["DOCKER_HOST"] = f"unix://{sock}"
+    from start_mep_rx import DockerManager
+
+    mgr = DockerManager(compose_dir)
+    t0 = time.perf_counter()
+    status, services, detail = mgr.refresh_status()
+    dt = (time.perf_counter() - t0) * 1e3
+    print(f"refresh: {status} {sorted(services)} {detail!r} ({dt:.2f} ms)")
+    rc, out, err = mgr.run_compose_action("stop", services=["recorder"])
+    print(f"stop recorder: rc={rc} {out!r} {err!r}")
+    for _ in range(10):
+        mgr.refresh_status()
+    print(f"recorder state: {mgr.services['recorder']['state']}")
+    rc, out, err = mgr.run_compose_action("start")
+    print(f"start all: rc={rc} ({len(out.splitlines())} containers) {err!r}")
+    print(f"{engine.requests} requests over {engine.connections} connection(s)")
+    ok = (status == "Reachable" and set(services) == set(DEFAULT_SERVICES)
+          and mgr.services["recorder"]["state"] == "exited" and engine.connections == 1)
+
+    seen = []
+    died = threading.Event()
+
+    def _on_state(service, info, action):
+        seen.append((service, action, info.get("state"), info.get("exit_code")))
+        if service == "recorder" and action == "die":
+            died.set()
+
+    mgr.on_service_state(_on_state)
+    mgr.events_start()
+    time.sleep(0.3)
+    t0 = time.perf_counter()
+    engine.crash("recorder")
+    got = died.wait(2.0)
+    dt = (time.perf_counter() - t0) * 1e3
+    engine.revive("recorder")
+    time.sleep(0.2)
+    mgr.events_stop()
+    print(f"events: {[e for e in seen if e[1] != 'sync']}")
+    print(f"recorder die observed in {dt:.1f} ms; model state {mgr.service_state('recorder')['state']}")
+    ok = ok and got and mgr.service_state("recorder")["state"] == "running"
+
+    # Resource telemetry via the Engine stats fallback (no cgroup dirs here),
+    # with two fake sweep steps marked the way CaptureController.on_step does.
+    mgr.stats.cgroup_root = os.path.join(tmp, "no-cgroup")
+    mgr.stats.interval_s = 0.05
+    mgr._seed_service_states(engine.list(True, {}))
+    mgr.stats.start()
+    for i, f_hz in enumerate((915e6, 2.4e9)):
+        mgr.stats.mark_step("begin", {"index": i, "f_hz": f_hz, "preset": "sr16MHz", "t": time.time()})
+        time.sleep(0.4)
+        mgr.stats.mark_step("end", {"index": i, "f_hz": f_hz, "t": time.time()})
+    time.sleep(0.1)
+    mgr.stats.stop()
+    rec = mgr.stats.latest().get("recorder", {})
+    summary = [r for r in mgr.stats.step_summary() if r["service"] == "recorder"]
+    csv_path = os.path.join(tmp, "steps.csv")
+    n = mgr.stats.export_csv(csv_path)
+    print(f"stats: recorder cpu {rec.get('cpu_pct', float('nan')):.0f}% via {rec.get('source')}; "
+          f"steps {[(r['step'], r['samples'], round(r['cpu_mean_pct'])) for r in summary]}; {n} csv rows")
+    ok = ok and rec.get("source") == "engine" and len(summary) == 2 and all(
+        r["samples"] > 0 and 100 < r["cpu_mean_pct"] < 200 for r in summary)
+    server.shutdown()
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake Docker Engine API on a unix socket")
+    ap.add_argument("--socket", default="/tmp/fake-docker.sock", help="Unix socket path to serve on")
+    ap.add_argument("--project", default="docker", help="Compose project label for the fake containers")
+    ap.add_argument("--crash-every", type=float, default=0.0,
+                    help="Seconds between simulated recorder crashes (0 = never)")
+    ap.add_argument("--check", action="store_true", help="Run DockerManager against a private instance and exit")
+    args = ap.parse_args()
+
+    if args.check:
+        return run_check(args.project)
+
+    engine = FakeEngine(args.project)
+    server = serve(args.socket, engine)
+    print(f"Fake Docker Engine on {args.socket} (project {args.project!r}); Ctrl-C to stop")
+    try:
+        while True:
+            if args.crash_every > 0:
+                time.sleep(args.crash_every)
+                print("recorder: crash (exit 137)")
+                engine.crash("recorder")
+                time.sleep(2.0)
+                engine.revive("recorder")
+            else:
+                time.sleep(5.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        os.remove(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Self-check for the MQTT tab's MqttLogIndex ring.
+
+Exercises append/evict, filtering and resize (the Buffer Msgs + Apply
+Retention path) without a display, and exits non-zero on the first mismatch:
+
+    python mqtt_log_index_check.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from mep_gui import MqttLogIndex  # noqa: E402
+
+
+def _held(index: MqttLogIndex) -> list:
+    return [index.get(s)[2] for s in range(index.first_seq, index.next_seq)]
+
+
+def _visible(index: MqttLogIndex) -> list:
+    return [int(s) for s in index.seqs(0, len(index))]
+
+
+def check_resize() -> list[str]:
+    errors = []
+    even = lambda topic: topic.endswith("/0")
+
+    index = MqttLogIndex(500)
+    for i in range(600):
+        index.append((float(i), f"t/{i % 2}", i), visible=even(f"t/{i % 2}"))
+    if _held(index) != list(range(100, 600)):
+        errors.append("append: ring does not hold the newest 500 messages")
+
+    index.resize(1000, even)   # grow after the ring has wrapped
+    if _held(index) != list(range(100, 600)) or _visible(index) != list(range(100, 600, 2)):
+        errors.append("grow: held or visible messages changed")
+    for i in range(600, 1200):
+        index.append((float(i), f"t/{i % 2}", i), visible=even(f"t/{i % 2}"))
+    if _held(index) != list(range(200, 1200)):
+        errors.append("grow: ring does not fill to the new capacity")
+
+    index.resize(300, even)    # shrink keeps the newest
+    if _held(index) != list(range(900, 1200)) or _visible(index) != list(range(900, 1200, 2)):
+        errors.append("shrink: expected the newest 300 messages")
+    index.rebuild(lambda topic: True)
+    if len(index) != 300:
+        errors.append("shrink: rebuild after resize lost rows")
+
+    index.clear()
+    index.resize(50, even)
+    if len(index) != 0 or index.first_seq != 0 or index.next_seq != 0:
+        errors.append("clear: index not empty after resize")
+    return errors
+
+
+def main() -> int:
+    errors = check_resize()
+    for err in errors:
+        print(f"FAILED: {err}")
+    if not errors:
+        print("OK")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,9 +25,10 @@ import subprocess
 import queue
 import threading
 import logging
+import functools
 from collections import deque
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog, font as tkfont
 import datetime
 import numpy as np
 from PIL import Image as _PILImage, ImageTk as _PILImageTk
@@ -77,29 +78,167 @@ from start_mep_rx import (
     AFE_MAG_TOPIC,
     AFE_HK_TOPIC,
     AFE_REGISTERS_TOPIC,
+    LINK_MONITOR_STATUS_TOPIC,
+    DOCKER_EVENTS_TOPIC,
+    DOCKER_RECORDER_SERVICE,
+    LOG_DIR,
+    ARCHIVE_META_DTYPE,
     MQTT_BROKER,
     MQTT_PORT,
     DOCKER_COMPOSE_DIR,
 )
+from mep_mqtt_store import (
+    MQTT_STORE_DIR,
+    MqttStoreReader,
+    MqttStoreWriter,
+    format_message as mqtt_store_format_message,
+    parse_time as mqtt_store_parse_time,
+)
 
 # ===== LAYOUT CONSTANTS ===== #
 LEFT_PANEL_WIDTH = 450
 ADV_PANEL_WIDTH = 510
 DEFAULT_WIN_HEIGHT = 750
 MQTT_LOG_BUFFER_MAX_MESSAGES = 500
-MQTT_LOG_WIDGET_MAX_LINES = 10000
+# Topic levels hidden from the MQTT tab by default (Suppress checkboxes).
+MQTT_LOG_DEFAULT_SUPPRESS = ("announce", "data")
+# One-line MQTT rows show at most this many payload characters; the full,
+# pretty-printed message is formatted only for the selected row.
+MQTT_LOG_PREVIEW_CHARS = 240
+# Coalesce bursts of MQTT messages into one virtual-view redraw per interval.
+MQTT_LOG_RENDER_INTERVAL_MS = 100
+# Most messages a store search prints into the detail pane.
+MQTT_STORE_SEARCH_LIMIT = 500
 APP_LOG_WIDGET_MAX_LINES = 5000
 APP_LOG_PENDING_MAX_MESSAGES = 1000
-# Max SPEC frames queued between render ticks. Bounds the MQTT->Tk handoff and
-# never exceeds a screen of catch-up (waterfall height), so it drops only the
-# oldest frames under sustained overrun, never silently coalesces fresh ones.
+DOCKER_LOG_WIDGET_MAX_LINES = 800
+# Characters a log widget accepts per flush; older lines in a larger burst are
+# replaced by a single "N lines skipped" marker.
+LOG_SINK_TICK_CHARS = 64 * 1024
+# Max SPEC frames queued between render ticks. Bounds the MQTT->Tk handoff to a
+# screen of catch-up (waterfall height): the oldest frames are dropped under
+# sustained overrun, and the render tick may still coalesce the frames it drains
+# into fewer waterfall rows (SPEC_WF_MAX_ROWS_PER_S).
 SPEC_PENDING_MAX_ROWS = 256
+# Adaptive SPEC render cadence: the refresh slider sets the fastest tick; the
+# tick stretches so rendering stays within this fraction of Tk thread time.
+SPEC_RENDER_CPU_BUDGET = 0.5
+SPEC_RENDER_MAX_INTERVAL_MS = 500
+SPEC_RENDER_COST_GAIN = 0.2        # EWMA gain for per-phase render timings
+# Waterfall scroll limit; faster frame rates coalesce several frames per row.
+SPEC_WF_MAX_ROWS_PER_S = 60
+# Waterfall image tile height. Each tick re-uploads only the tile(s) that
+# received new rows, so upload cost is bounded by this, not the window height.
+SPEC_WF_TILE_ROWS = 32
+# Bins-to-pixels reducers for SPEC decimation. "linear" interpolates; the
+# others reduce each pixel's bin segment so narrow peaks cannot fall between
+# sample points. "envelope" draws min..max on the line plot (max elsewhere).
+SPEC_REDUCE_MODES = ("max", "min", "mean", "envelope", "linear")
+# SPEC line-plot trace overlays (accumulated per frame at native resolution).
+SPEC_TRACE_MODES = ("off", "max hold", "min hold", "avg exp", "avg lin", "persist")
+SPEC_TRACE_EXP_ALPHA = 0.1        # weight of the newest frame in the exponential average
+SPEC_PERSIST_LEVELS = 128         # persistence histogram rows across the colour range
+SPEC_PERSIST_DECAY = 0.97         # per-frame persistence fade
+# Optional on-disk SPEC history (native-resolution rows + time pyramid).
+SPEC_ARCHIVE_DIR = os.path.join(LOG_DIR, "spec_archive")
+SPEC_ARCHIVE_CHUNK_ROWS = 4096    # rows per memory-mapped chunk file
+SPEC_ARCHIVE_LEVELS = 6           # pyramid levels above native (each 4x coarser in time)
+SPEC_ARCHIVE_DECIMATION = 4
+# Disk budget for everything under SPEC_ARCHIVE_DIR: past sessions are deleted
+# first, then the oldest chunks of the current one (0 disables retention).
+SPEC_ARCHIVE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+# Sweep panorama: frames from each step are placed on one global grid.
+SPEC_PANORAMA_BINS = 4096
+SPEC_PANORAMA_OVERLAP_MODES = ("max", "avg")
 
 
 # ===== TEXT LOGGING HANDLER ===== #
 
+class _LogSink:
+    """Batched, rate-limited appender for log Text widgets (Tk thread only).
+
+    write() takes a batch of lines, each a str or a list of (text, tag)
+    segments, and lands them with a single Text.insert whose text/tag pairs
+    carry every tag range. A batch larger than tick_chars keeps its newest
+    lines and replaces the rest with one "N lines skipped" marker. The line
+    count is tracked here, so trimming to max_lines never asks Tcl for an
+    index.
+    """
+
+    SKIPPED_TAG = "log_skipped"
+
+    def __init__(self, widget: tk.Text, max_lines: int,
+                 tick_chars: int = LOG_SINK_TICK_CHARS, readonly: bool = False):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.tick_chars = tick_chars
+        self.readonly = readonly
+        self.skipped_total = 0
+        self._lines = 0
+        widget.tag_configure(self.SKIPPED_TAG, foreground="#9ca3af")
+
+    def write(self, lines, see: bool = True):
+        """Append lines (no trailing newline). Raises tk.TclError if the widget is gone."""
+        kept = []
+        budget = self.tick_chars
+        for line in reversed(lines):
+            segments = [(line, None)] if isinstance(line, str) else line
+            size = sum(len(text) for text, _ in segments) + 1
+            if kept and size > budget:
+                break
+            budget -= size
+            kept.append(segments)
+        if not kept:
+            return
+        kept.reverse()
+        skipped = len(lines) - len(kept)
+
+        args = []
+        added = 0
+        if skipped:
+            self.skipped_total += skipped
+            args += [f"… {skipped} lines skipped …\n", (self.SKIPPED_TAG,)]
+            added += 1
+        run_text, run_tag = [], None
+        for segments in kept:
+            eol_tag = segments[-1][1] if segments else None
+            for text, tag in list(segments) + [("\n", eol_tag)]:
+                if not text:
+                    continue
+                added += text.count("\n")
+                # Coalesce neighbouring segments that share a tag.
+                if tag != run_tag and run_text:
+                    args += ["".join(run_text), (run_tag,) if run_tag else ()]
+                    run_text = []
+                run_tag = tag
+                run_text.append(text)
+        if run_text:
+            args += ["".join(run_text), (run_tag,) if run_tag else ()]
+
+        w = self.widget
+        if self.readonly:
+            w.configure(state="normal")
+        w.insert("end", *args)
+        self._lines += added
+        if self._lines > self.max_lines:
+            w.delete("1.0", f"{self._lines - self.max_lines + 1}.0")
+            self._lines = self.max_lines
+        if see:
+            w.see("end")
+        if self.readonly:
+            w.configure(state="disabled")
+
+    def clear(self):
+        if self.readonly:
+            self.widget.configure(state="normal")
+        self.widget.delete("1.0", "end")
+        if self.readonly:
+            self.widget.configure(state="disabled")
+        self._lines = 0
+
+
 class _TextHandler(logging.Handler):
-    """Logging handler that appends records to a ScrolledText widget."""
+    """Logging handler that queues records for a ScrolledText widget."""
 
     def __init__(
         self,
@@ -109,6 +248,7 @@ class _TextHandler(logging.Handler):
         super().__init__()
         self.widget = widget
         self.max_lines = max_lines
+        self._sink = _LogSink(widget, max_lines, readonly=True)
         self._pending = queue.Queue(maxsize=APP_LOG_PENDING_MAX_MESSAGES)
         self._closed = False
 
@@ -116,7 +256,7 @@ class _TextHandler(logging.Handler):
         if self._closed:
             return
         try:
-            msg = self.format(record) + "\n"
+            msg = self.format(record)
         except Exception:
             self.handleError(record)
             return
@@ -144,14 +284,7 @@ class _TextHandler(logging.Handler):
             return
 
         try:
-            self.widget.configure(state="normal")
-            for msg in messages:
-                self.widget.insert(tk.END, msg)
-            line_count = int(self.widget.index("end-1c").split(".")[0])
-            if line_count > self.max_lines:
-                self.widget.delete("1.0", f"{line_count - self.max_lines}.0")
-            self.widget.see(tk.END)
-            self.widget.configure(state="disabled")
+            self._sink.write(messages)
         except tk.TclError:
             self._closed = True
 
@@ -162,16 +295,234 @@ class _TextHandler(logging.Handler):
 
 # ===== SPECTRUM HELPERS ===== #
 
-def _spec_resample_1d(arr: np.ndarray, n_out: int) -> np.ndarray:
-    """Linearly resample a 1-D float32 array to n_out samples."""
-    n_in = len(arr)
+@functools.lru_cache(maxsize=32)
+def _spec_resample_plan(n_in: int, n_out: int):
+    """Cached linear-interpolation index map (i0, i1, frac) from n_in to n_out.
+
+    Bin counts and canvas widths change rarely, so the map is built once per
+    (n_in, n_out) pair and reused for every row instead of re-deriving the
+    sample grid per call. Arrays are read-only.
+    """
+    pos = np.linspace(0.0, float(n_in - 1), n_out)
+    i0 = np.minimum(pos.astype(np.intp), max(0, n_in - 2))
+    i1 = np.minimum(i0 + 1, n_in - 1)
+    frac = (pos - i0).astype(np.float32)
+    for a in (i0, i1, frac):
+        a.setflags(write=False)
+    return i0, i1, frac
+
+
+def _spec_resample_rows(arr: np.ndarray, n_out: int) -> np.ndarray:
+    """Linearly resample the last axis of a float32 array (1-D row or 2-D rows) to n_out."""
+    n_in = arr.shape[-1]
     if n_in == n_out:
         return arr.astype(np.float32, copy=False)
     if n_in == 0 or n_out == 0:
-        return np.zeros(n_out, dtype=np.float32)
-    xp = np.linspace(0.0, 1.0, n_in)
-    xq = np.linspace(0.0, 1.0, n_out)
-    return np.interp(xq, xp, arr).astype(np.float32)
+        return np.zeros(arr.shape[:-1] + (n_out,), dtype=np.float32)
+    i0, i1, frac = _spec_resample_plan(n_in, n_out)
+    lo = arr[..., i0].astype(np.float32, copy=False)
+    out = arr[..., i1].astype(np.float32, copy=False)
+    out -= lo
+    out *= frac
+    out += lo
+    return out
+
+
+def _spec_resample_1d(arr: np.ndarray, n_out: int) -> np.ndarray:
+    """Linearly resample a 1-D float32 array to n_out samples."""
+    return _spec_resample_rows(np.asarray(arr), n_out)
+
+
+@functools.lru_cache(maxsize=32)
+def _spec_segment_plan(n_in: int, n_out: int):
+    """Cached bin-to-pixel segment table (starts, counts) for n_in >= n_out.
+
+    Pixel j covers bins starts[j] .. starts[j] + counts[j] - 1; every bin
+    belongs to exactly one pixel. ``starts`` is the index array for
+    ``ufunc.reduceat``. Arrays are read-only.
+    """
+    starts = (np.arange(n_out, dtype=np.intp) * n_in) // n_out
+    counts = np.diff(np.append(starts, n_in)).astype(np.float32)
+    for a in (starts, counts):
+        a.setflags(write=False)
+    return starts, counts
+
+
+def _spec_reduce_rows(arr: np.ndarray, n_out: int, mode: str = "max") -> np.ndarray:
+    """Decimate the last axis of a row (or rows) to n_out using a SPEC reducer.
+
+    "max", "min" and "mean" reduce each pixel's bin segment with one
+    ``reduceat`` call; "envelope" reduces with max here (see
+    _spec_envelope_rows for the min/max pair). "linear", and any case where
+    n_out >= n_in, falls back to linear interpolation.
+    """
+    arr = np.asarray(arr)
+    n_in = arr.shape[-1]
+    if mode == "linear" or n_in <= n_out or n_out == 0:
+        return _spec_resample_rows(arr, n_out)
+    starts, counts = _spec_segment_plan(n_in, n_out)
+    arr = arr.astype(np.float32, copy=False)
+    if mode == "min":
+        return np.minimum.reduceat(arr, starts, axis=-1)
+    if mode == "mean":
+        out = np.add.reduceat(arr, starts, axis=-1)
+        out /= counts
+        return out
+    return np.maximum.reduceat(arr, starts, axis=-1)
+
+
+def _spec_envelope_rows(arr: np.ndarray, n_out: int):
+    """Return (lo, hi) per-pixel min/max of the last axis decimated to n_out."""
+    return _spec_reduce_rows(arr, n_out, "min"), _spec_reduce_rows(arr, n_out, "max")
+
+
+def _spec_column_spans(lo: np.ndarray, hi: np.ndarray, w: int, h: int, vmin: float, vmax: float):
+    """Per-column (top, bottom) pixel rows for a trace with per-point lo..hi values.
+
+    With more points than columns each column takes the min/max envelope of
+    its points, so drawing costs O(width) whatever the bin count. Each column
+    is then stretched to meet its left neighbour so the trace stays connected.
+    NaN points sit on the bottom edge.
+    """
+    if len(lo) > w:
+        lo = _spec_reduce_rows(lo, w, "min")
+        hi = _spec_reduce_rows(hi, w, "max")
+    else:
+        lo = _spec_resample_rows(np.asarray(lo), w)
+        hi = lo if hi is lo else _spec_resample_rows(np.asarray(hi), w)
+    scale = (h - 1) / (vmax - vmin)
+    top = np.nan_to_num((vmax - hi) * scale, nan=h - 1)
+    bot = np.nan_to_num((vmax - lo) * scale, nan=h - 1)
+    np.clip(top, 0, h - 1, out=top)
+    np.clip(bot, 0, h - 1, out=bot)
+    top = top.astype(np.intp)
+    bot = bot.astype(np.intp)
+    t_prev = top[:-1].copy()
+    np.minimum(top[1:], bot[:-1], out=top[1:])
+    np.maximum(bot[1:], t_prev, out=bot[1:])
+    return top, bot
+
+
+class SpectrumTraces:
+    """Running per-bin trace accumulators at native resolution. Tk thread only.
+
+    Each accepted frame updates max-hold, min-hold, an exponential average and
+    a linear (sum/count) average with a handful of in-place vector ops, so no
+    trace is ever recomputed over history. The persistence density (a decaying
+    histogram of power level per bin) is updated only while enabled, since it
+    touches SPEC_PERSIST_LEVELS times more memory per frame.
+
+    All accumulators reset when the frequency axis (bin count, center
+    frequency, fmin/fmax) changes, as traces across different tunings are
+    meaningless.
+    """
+
+    def __init__(self):
+        self.persist_enabled = False
+        self._persist_lo = None
+        self._persist_hi = None
+        self.reset()
+
+    def reset(self):
+        """Drop all accumulated traces."""
+        self._axis = None
+        self.count = 0
+        self.max_hold = None
+        self.min_hold = None
+        self.avg_exp = None
+        self._lin_sum = None
+        self.persist = None
+        self._cols = None
+
+    @property
+    def axis(self):
+        """(n, center_frequency, fmin, fmax) of the accumulated frames, or None."""
+        return self._axis
+
+    @property
+    def avg_lin(self):
+        if self._lin_sum is None or self.count == 0:
+            return None
+        return (self._lin_sum / self.count).astype(np.float32)
+
+    def set_persist_range(self, lo: float, hi: float):
+        """Set the dB span mapped onto the persistence histogram (resets it on change)."""
+        if (lo, hi) != (self._persist_lo, self._persist_hi):
+            self._persist_lo, self._persist_hi = lo, hi
+            self.persist = None
+
+    def update(self, row: np.ndarray, meta: dict):
+        """Fold one native-resolution dBFS row into every accumulator."""
+        row = np.asarray(row, dtype=np.float32)
+        meta = meta or {}
+        axis = (len(row), meta.get("center_frequency"), meta.get("fmin"), meta.get("fmax"))
+        if axis != self._axis:
+            self.reset()
+            self._axis = axis
+        if self.count == 0:
+            self.max_hold = row.copy()
+            self.min_hold = row.copy()
+            self.avg_exp = row.copy()
+            self._lin_sum = row.astype(np.float64)
+        else:
+            np.fmax(self.max_hold, row, out=self.max_hold)
+            np.fmin(self.min_hold, row, out=self.min_hold)
+            # avg += alpha * (row - avg)
+            self.avg_exp *= 1.0 - SPEC_TRACE_EXP_ALPHA
+            self.avg_exp += SPEC_TRACE_EXP_ALPHA * row
+            self._lin_sum += row
+        self.count += 1
+        if self.persist_enabled and self._persist_lo is not None:
+            self._update_persist(row)
+
+    def _update_persist(self, row: np.ndarray):
+        n = len(row)
+        levels = SPEC_PERSIST_LEVELS
+        if self.persist is None or self.persist.shape[1] != n:
+            self.persist = np.zeros((levels, n), dtype=np.float32)
+            self._cols = np.arange(n, dtype=np.intp)
+        else:
+            self.persist *= SPEC_PERSIST_DECAY
+        scale = (levels - 1) / (self._persist_hi - self._persist_lo)
+        lvl = np.nan_to_num((row - self._persist_lo) * scale, nan=0.0)
+        np.clip(lvl, 0, levels - 1, out=lvl)
+        # Row 0 = top = highest power, matching screen orientation.
+        flat = (levels - 1 - lvl.astype(np.intp)) * n + self._cols
+        self.persist.reshape(-1)[flat] += 1.0
+
+    def trace(self, mode: str):
+        """Return the native-resolution trace for a SPEC_TRACE_MODES line mode, or None."""
+        if mode == "max hold":
+            return self.max_hold
+        if mode == "min hold":
+            return self.min_hold
+        if mode == "avg exp":
+            return self.avg_exp
+        if mode == "avg lin":
+            return self.avg_lin
+        return None
+
+    def export(self, path: str):
+        """Write all traces plus axis metadata to an .npz file."""
+        n, cf, fmin, fmax = self._axis or (0, None, None, None)
+        empty = np.zeros(0, dtype=np.float32)
+        np.savez(
+            path,
+            n=n,
+            center_frequency=np.nan if cf is None else float(cf),
+            fmin=np.nan if fmin is None else float(fmin),
+            fmax=np.nan if fmax is None else float(fmax),
+            count=self.count,
+            max_hold=empty if self.max_hold is None else self.max_hold,
+            min_hold=empty if self.min_hold is None else self.min_hold,
+            avg_exp=empty if self.avg_exp is None else self.avg_exp,
+            avg_lin=empty if self.avg_lin is None else self.avg_lin,
+            persist=np.zeros((0, 0), dtype=np.float32) if self.persist is None else self.persist,
+            persist_range=np.array([
+                np.nan if self._persist_lo is None else self._persist_lo,
+                np.nan if self._persist_hi is None else self._persist_hi,
+            ]),
+        )
 
 
 class SpectrumViewport:
@@ -192,6 +543,8 @@ class SpectrumViewport:
         self._meta: list = [None] * self._h
         self._head = 0
         self._count = 0  # valid rows: 0..height
+        self.reducer = "max"  # one of SPEC_REDUCE_MODES, used for bins -> pixels
+        self.traces = SpectrumTraces()  # native-resolution accumulators fed by accept_row
 
     @property
     def width(self) -> int:
@@ -206,16 +559,19 @@ class SpectrumViewport:
         """Number of rows written so far (up to height)."""
         return self._count
 
-    def accept_row(self, native_row: np.ndarray, meta: dict) -> bool:
-        """Resample native_row to viewport width and store it as the newest row.
+    def accept_row(self, native_row: np.ndarray, meta: dict, update_traces: bool = True) -> bool:
+        """Decimate native_row to viewport width and store it as the newest row.
 
         meta keys expected: ts, center_frequency, fmin, fmax, scan_time, n.
+        The native row is also folded into ``traces`` unless the caller has
+        already fed the frames it was built from (coalesced rows).
         Returns True on success, False if native_row is empty.
         """
         if native_row is None or len(native_row) == 0:
             return False
-        row = _spec_resample_1d(native_row, self._w)
-        self._values[self._head] = row
+        if update_traces:
+            self.traces.update(native_row, meta)
+        self._values[self._head] = _spec_reduce_rows(native_row, self._w, self.reducer)
         self._meta[self._head] = meta or {}
         self._head = (self._head + 1) % self._h
         if self._count < self._h:
@@ -233,6 +589,12 @@ class SpectrumViewport:
         idx = (self._head - 1 - offset) % self._h
         return self._values[idx], self._meta[idx]
 
+    def rows_newest_first(self, count: int) -> np.ndarray:
+        """Return a (count, width) copy of the newest rows (row 0 = newest)."""
+        count = max(0, min(count, self._count))
+        idx = (self._head - 1 - np.arange(count)) % self._h
+        return self._values[idx]
+
     def latest_meta(self):
         """Return the metadata dict of the newest row, or None."""
         if self._count == 0:
@@ -243,15 +605,15 @@ class SpectrumViewport:
         """Return (min, max) across all valid finite values, or (None, None)."""
         if self._count == 0:
             return None, None
-        indices = [(self._head - 1 - i) % self._h for i in range(self._count)]
-        data = self._values[indices]
+        data = self.rows_newest_first(self._count)
         mask = np.isfinite(data)
         if not np.any(mask):
             return None, None
         return float(np.min(data[mask])), float(np.max(data[mask]))
 
     def clear(self):
-        """Reset all rows to empty."""
+        """Reset all rows (and accumulated traces) to empty."""
+        self.traces.reset()
         self._values[:] = np.nan
         self._meta = [None] * self._h
         self._head = 0
@@ -277,14 +639,807 @@ class SpectrumViewport:
         self._meta = [None] * h
         self._head = 0
         self._count = 0
-        # Re-insert oldest-first, resampled to new width
+        # Re-insert oldest-first, decimated to new width
         for vals, meta in zip(reversed(saved_rows), reversed(saved_meta)):
-            self._values[self._head] = _spec_resample_1d(vals, w)
+            self._values[self._head] = _spec_reduce_rows(vals, w, self.reducer)
             self._meta[self._head] = meta
             self._head = (self._head + 1) % h
             self._count += 1
 
 
+class SpectrumPanorama:
+    """Stitch sweep-step spectrum frames into one wideband row per sweep pass.
+
+    Each frame is placed on a global grid of ``n_cols`` columns spanning the
+    union of every ``center_frequency + fmin .. center_frequency + fmax`` seen
+    so far. The bin-to-column map for a step is built once per
+    (center_frequency, fmin, fmax, n) and cached, so placing a frame is O(bins):
+    a ``reduceat`` when the step has more bins than columns, a gather when it
+    has fewer. Where steps overlap, columns keep the max or the average
+    (``overlap``).
+
+    A pass completes when a frame arrives whose center frequency is below the
+    previous one (the sweep wrapped). Repeated frames of one step (a dwell
+    produces several) fold into that step's columns with the same overlap
+    rule, so a fixed-frequency stream never completes a pass. The grid
+    extent only grows; when it does, cached maps and the pass in progress are
+    discarded and ``generation`` is bumped so callers can drop rows laid out
+    on the old grid.
+
+    Tk thread only.
+    """
+
+    def __init__(self, n_cols: int = SPEC_PANORAMA_BINS, overlap: str = "max"):
+        self.n_cols = int(n_cols)
+        self.overlap = overlap if overlap in SPEC_PANORAMA_OVERLAP_MODES else "max"
+        self.generation = 0
+        self._lo = None
+        self._hi = None
+        self._maps = {}
+        self._last = None          # last completed pass (n_cols,) or None
+        self._pass_max = np.full(self.n_cols, np.nan, dtype=np.float32)
+        self._pass_sum = np.zeros(self.n_cols, dtype=np.float64)
+        self._pass_cnt = np.zeros(self.n_cols, dtype=np.int32)
+        self.reset_pass()
+
+    def reset_pass(self):
+        """Discard the pass in progress."""
+        self._pass_max.fill(np.nan)
+        self._pass_sum.fill(0.0)
+        self._pass_cnt.fill(0)
+        self._prev_cf = None
+        self._pass_steps = 0
+        self._pass_t0 = None
+        self._pass_t1 = None
+        self._pass_ts = None
+
+    @property
+    def extent(self):
+        """(lo_hz, hi_hz) of the global grid, or (None, None)."""
+        return self._lo, self._hi
+
+    def _grow(self, lo: float, hi: float):
+        if self._lo is not None and lo >= self._lo and hi <= self._hi:
+            return
+        self._lo = lo if self._lo is None else min(lo, self._lo)
+        self._hi = hi if self._hi is None else max(hi, self._hi)
+        self._maps = {}
+        self._last = None
+        self.generation += 1
+        self.reset_pass()
+
+    def _step_map(self, cf: float, fmin: float, fmax: float, n: int):
+        key = (cf, fmin, fmax, n)
+        m = self._maps.get(key)
+        if m is not None:
+            return m
+        f_lo = cf + fmin
+        bw = (fmax - fmin) / n
+        scale = self.n_cols / (self._hi - self._lo)
+        centers = f_lo + (np.arange(n) + 0.5) * bw
+        cols = np.clip(((centers - self._lo) * scale).astype(np.intp), 0, self.n_cols - 1)
+        c0, c1 = int(cols[0]), int(cols[-1]) + 1
+        if n >= c1 - c0:
+            # Several bins per column: reduce each column's bin run.
+            starts = np.flatnonzero(np.diff(cols, prepend=-1))
+            counts = np.diff(np.append(starts, n)).astype(np.float32)
+            m = ("reduce", cols[starts], starts, counts)
+        else:
+            # Fewer bins than columns: every column the step spans takes its bin.
+            c0 = max(0, int((f_lo - self._lo) * scale))
+            c1 = min(self.n_cols, int(math.ceil((f_lo + n * bw - self._lo) * scale)))
+            tgt = np.arange(c0, c1, dtype=np.intp)
+            src = ((self._lo + (tgt + 0.5) / scale - f_lo) / bw).astype(np.intp)
+            m = ("gather", tgt, np.clip(src, 0, n - 1), None)
+        self._maps[key] = m
+        return m
+
+    def add(self, row: np.ndarray, meta: dict, t: float = None):
+        """Place one frame; return the completed pass entry if this frame starts a new pass."""
+        meta = meta or {}
+        cf, fmin, fmax = meta.get("center_frequency"), meta.get("fmin"), meta.get("fmax")
+        if not all(isinstance(v, (int, float)) for v in (cf, fmin, fmax)) or fmax <= fmin or len(row) == 0:
+            return None
+        cf, fmin, fmax = float(cf), float(fmin), float(fmax)
+        self._grow(cf + fmin, cf + fmax)
+        done = None
+        if self._prev_cf is not None and cf < self._prev_cf:
+            done = self._finish_pass()
+        kind, cols, idx, counts = self._step_map(cf, fmin, fmax, len(row))
+        row = np.asarray(row, dtype=np.float32)
+        if kind == "reduce":
+            if self.overlap == "avg":
+                vals = np.add.reduceat(row, idx)
+                vals /= counts
+            else:
+                vals = np.maximum.reduceat(row, idx)
+        else:
+            vals = row[idx]
+        if self.overlap == "avg":
+            self._pass_sum[cols] += vals
+            self._pass_cnt[cols] += 1
+        else:
+            self._pass_max[cols] = np.fmax(self._pass_max[cols], vals)
+            self._pass_cnt[cols] += 1
+        if cf != self._prev_cf:
+            self._pass_steps += 1
+        self._prev_cf = cf
+        if t is not None:
+            self._pass_t0 = t if self._pass_t0 is None else self._pass_t0
+            self._pass_t1 = t
+        self._pass_ts = meta.get("ts")
+        return done
+
+    def _pass_row(self):
+        if self.overlap == "avg":
+            row = np.full(self.n_cols, np.nan, dtype=np.float32)
+            hit = self._pass_cnt > 0
+            row[hit] = self._pass_sum[hit] / self._pass_cnt[hit]
+            return row
+        return self._pass_max.copy()
+
+    def _entry(self, row: np.ndarray, steps: int, duration):
+        half = (self._hi - self._lo) / 2.0
+        return {
+            "row": row,
+            "ts": self._pass_ts,
+            "center_frequency": self._lo + half,
+            "fmin": -half,
+            "fmax": half,
+            "scan_time": duration,
+            "n": self.n_cols,
+            "steps": steps,
+        }
+
+    def _finish_pass(self):
+        duration = None
+        if self._pass_t0 is not None and self._pass_t1 is not None and self._pass_t1 > self._pass_t0:
+            duration = self._pass_t1 - self._pass_t0
+        self._last = self._pass_row()
+        done = self._entry(self._last, self._pass_steps, duration)
+        self.reset_pass()
+        return done
+
+    def line_entry(self):
+        """Wideband line: the pass in progress over the last completed pass."""
+        if self._lo is None:
+            return None
+        row = self._pass_row()
+        if self._last is not None:
+            stale = self._pass_cnt == 0
+            row[stale] = self._last[stale]
+        return self._entry(row, self._pass_steps, None)
+
+
+class SpectrumArchive:
+    """Disk-backed, native-resolution SPEC history with a time pyramid.
+
+    Every row is appended to level 0: fixed-size chunk files of
+    SPEC_ARCHIVE_CHUNK_ROWS x n float32 values, each with a companion chunk of
+    ARCHIVE_META_DTYPE records (arrival time, center frequency, fmin, fmax).
+    Level L+1 holds the per-bin max of every SPEC_ARCHIVE_DECIMATION rows of
+    level L, folded in as rows arrive, so a view of any time span reads at
+    most a few screen-heights of rows from the coarsest adequate level. Time
+    stamps are also kept in memory per level as the search index.
+
+    Layout on disk (one directory per archive session)::
+
+        archive.json                 n_bins, chunk_rows, decimation, levels
+        L{level}_{chunk:05d}.f32     rows (raw float32, C order)
+        L{level}_{chunk:05d}.meta    ARCHIVE_META_DTYPE records
+
+    Whenever level 0 starts a new chunk, the oldest files under root_dir are
+    deleted until it fits max_bytes: older session directories first, then
+    this session's oldest chunks (coarser levels follow level 0's cutoff).
+    Row indices stay absolute; _first[level] is the oldest one still held.
+
+    Tk thread only; chunk files are written through np.memmap.
+    """
+
+    def __init__(self, root_dir: str, n_bins: int,
+                 chunk_rows: int = SPEC_ARCHIVE_CHUNK_ROWS, levels: int = SPEC_ARCHIVE_LEVELS,
+                 max_bytes: int = SPEC_ARCHIVE_MAX_BYTES):
+        self.n_bins = int(n_bins)
+        self.chunk_rows = int(chunk_rows)
+        self.levels = int(levels) + 1
+        self.root_dir = root_dir
+        self.max_bytes = int(max_bytes)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(root_dir, f"{stamp}_n{self.n_bins}")
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "archive.json"), "w") as f:
+            json.dump({
+                "n_bins": self.n_bins,
+                "chunk_rows": self.chunk_rows,
+                "decimation": SPEC_ARCHIVE_DECIMATION,
+                "levels": self.levels,
+                "dtype": "float32",
+                "meta_dtype": [list(d) for d in ARCHIVE_META_DTYPE.descr],
+            }, f, indent=2)
+        self._count = [0] * self.levels
+        self._first = [0] * self.levels
+        # _times[level][j] is the time of row _first[level] + j.
+        self._times = [np.empty(1024, dtype=np.float64) for _ in range(self.levels)]
+        self._writers = [None] * self.levels          # (chunk_idx, rows_mm, meta_mm)
+        self._readers = {}                             # (level, chunk) -> (rows_mm, meta_mm)
+        # Pending max over the rows not yet folded into the next level.
+        self._acc = [None] * self.levels
+        self._acc_n = [0] * self.levels
+        self._acc_meta = [None] * self.levels
+        self._last_t = -math.inf
+
+    @property
+    def rows(self) -> int:
+        return self._count[0] - self._first[0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c - f for c, f in zip(self._count, self._first)) * self.n_bins * 4
+
+    def time_span(self):
+        """(first, last) arrival time of archived rows, or (None, None)."""
+        if self.rows == 0:
+            return None, None
+        return float(self._times[0][0]), float(self._times[0][self.rows - 1])
+
+    def _chunk_files(self, level: int, chunk: int):
+        base = os.path.join(self.path, f"L{level}_{chunk:05d}")
+        return base + ".f32", base + ".meta"
+
+    def _writer(self, level: int, chunk: int):
+        w = self._writers[level]
+        if w is not None and w[0] == chunk:
+            return w
+        if w is not None:
+            w[1].flush()
+            w[2].flush()
+        rows_path, meta_path = self._chunk_files(level, chunk)
+        rows_mm = np.memmap(rows_path, dtype=np.float32, mode="w+", shape=(self.chunk_rows, self.n_bins))
+        meta_mm = np.memmap(meta_path, dtype=ARCHIVE_META_DTYPE, mode="w+", shape=(self.chunk_rows,))
+        self._writers[level] = (chunk, rows_mm, meta_mm)
+        self._readers[(level, chunk)] = (rows_mm, meta_mm)
+        if level == 0 and chunk > 0:
+            self._enforce_retention()
+        return self._writers[level]
+
+    @staticmethod
+    def _session_bytes(path: str) -> int:
+        total = 0
+        for entry in os.scandir(path):
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _drop_chunk(self, level: int, chunk: int):
+        for path in self._chunk_files(level, chunk):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._readers.pop((level, chunk), None)
+        first = (chunk + 1) * self.chunk_rows
+        self._times[level] = self._times[level][first - self._first[level]:].copy()
+        self._first[level] = first
+
+    def _enforce_retention(self):
+        if self.max_bytes <= 0:
+            return
+        chunk_bytes = self.chunk_rows * (self.n_bins * 4 + ARCHIVE_META_DTYPE.itemsize)
+        total = sum(-(-c // self.chunk_rows) - f // self.chunk_rows
+                    for c, f in zip(self._count, self._first)) * chunk_bytes
+        sessions = []
+        try:
+            for entry in sorted(os.scandir(self.root_dir), key=lambda e: e.name):
+                if (entry.is_dir() and entry.path != self.path
+                        and os.path.exists(os.path.join(entry.path, "archive.json"))):
+                    sessions.append((entry.path, self._session_bytes(entry.path)))
+        except OSError:
+            pass
+        total += sum(n for _, n in sessions)
+        for path, n in sessions:   # names start with the session time stamp
+            if total <= self.max_bytes:
+                return
+            shutil.rmtree(path, ignore_errors=True)
+            total -= n
+            logging.info(f"SPEC: removed archive {path} (retention)")
+        while total > self.max_bytes:
+            chunk = self._first[0] // self.chunk_rows
+            if chunk >= self._writers[0][0]:
+                break   # only the chunk being written is left
+            self._drop_chunk(0, chunk)
+            total -= chunk_bytes
+            cutoff = self._times[0][0]
+            for level in range(1, self.levels):
+                w = self._writers[level]
+                while w is not None:
+                    chunk = self._first[level] // self.chunk_rows
+                    last = (chunk + 1) * self.chunk_rows - 1 - self._first[level]
+                    if chunk >= w[0] or self._times[level][last] >= cutoff:
+                        break
+                    self._drop_chunk(level, chunk)
+                    total -= chunk_bytes
+
+    def _reader(self, level: int, chunk: int):
+        r = self._readers.get((level, chunk))
+        if r is None:
+            if len(self._readers) > 64:
+                # Drop read-only maps of old chunks; the active writers stay.
+                live = {(lvl, w[0]) for lvl, w in enumerate(self._writers) if w is not None}
+                self._readers = {k: v for k, v in self._readers.items() if k in live}
+            rows_path, meta_path = self._chunk_files(level, chunk)
+            r = (
+                np.memmap(rows_path, dtype=np.float32, mode="r", shape=(self.chunk_rows, self.n_bins)),
+                np.memmap(meta_path, dtype=ARCHIVE_META_DTYPE, mode="r", shape=(self.chunk_rows,)),
+            )
+            self._readers[(level, chunk)] = r
+        return r
+
+    def _put(self, level: int, row: np.ndarray, rec: tuple):
+        i = self._count[level]
+        chunk, pos = divmod(i, self.chunk_rows)
+        _, rows_mm, meta_mm = self._writer(level, chunk)
+        rows_mm[pos] = row
+        meta_mm[pos] = rec
+        times = self._times[level]
+        j = i - self._first[level]
+        if j >= len(times):
+            times = np.resize(times, 2 * len(times))
+            self._times[level] = times
+        times[j] = rec[0]
+        self._count[level] = i + 1
+        up = level + 1
+        if up >= self.levels:
+            return
+        if self._acc_n[up] == 0:
+            self._acc[up] = np.array(row, dtype=np.float32)
+            self._acc_meta[up] = rec
+        else:
+            np.fmax(self._acc[up], row, out=self._acc[up])
+        self._acc_n[up] += 1
+        if self._acc_n[up] == SPEC_ARCHIVE_DECIMATION:
+            self._acc_n[up] = 0
+            self._put(up, self._acc[up], self._acc_meta[up])
+
+    def append(self, row: np.ndarray, meta: dict, t: float):
+        """Archive one native-resolution row received at wall-clock time t."""
+        if len(row) != self.n_bins:
+            raise ValueError(f"row has {len(row)} bins, archive expects {self.n_bins}")
+        # The time index must stay sorted for searchsorted.
+        t = max(float(t), self._last_t)
+        self._last_t = t
+        meta = meta or {}
+
+        def _num(key):
+            v = meta.get(key)
+            return float(v) if isinstance(v, (int, float)) else np.nan
+
+        self._put(0, row, (t, _num("center_frequency"), _num("fmin"), _num("fmax")))
+
+    def flush(self):
+        for w in self._writers:
+            if w is not None:
+                w[1].flush()
+                w[2].flush()
+
+    def close(self):
+        self.flush()
+        self._writers = [None] * self.levels
+        self._readers = {}
+
+    def read(self, level: int, start: int, stop: int, col0: int = 0, col1: int = None):
+        """Return (rows[start:stop, col0:col1], meta[start:stop]) copied across chunks."""
+        col1 = self.n_bins if col1 is None else col1
+        stop = min(stop, self._count[level])
+        start = max(self._first[level], min(start, stop))
+        rows = np.empty((stop - start, col1 - col0), dtype=np.float32)
+        meta = np.empty(stop - start, dtype=ARCHIVE_META_DTYPE)
+        i = start
+        while i < stop:
+            chunk, pos = divmod(i, self.chunk_rows)
+            k = min(stop - i, self.chunk_rows - pos)
+            rows_mm, meta_mm = self._reader(level, chunk)
+            rows[i - start:i - start + k] = rows_mm[pos:pos + k, col0:col1]
+            meta[i - start:i - start + k] = meta_mm[pos:pos + k]
+            i += k
+        return rows, meta
+
+    def view(self, t0: float, t1: float, frac0: float, frac1: float,
+             width: int, height: int, reducer: str = "max"):
+        """Render [t0, t1) x [frac0, frac1) of the band to a (height, width) block.
+
+        Row 0 is the newest time (t1), matching the live waterfall. The
+        coarsest level with at least ~height rows in the window is used, so
+        cost follows the screen size rather than the archived duration; rows
+        not yet folded into that level are taken from the finer levels, so
+        the live edge is drawn too. Pixel rows with no data (before/after the archive, or inside a gap
+        in the stream) are NaN. Returns (block, meta_of_newest_row_or_None).
+        """
+        out = np.full((height, width), np.nan, dtype=np.float32)
+        if self.rows == 0 or t1 <= t0 or width <= 0 or height <= 0:
+            return out, None
+        col0 = max(0, min(self.n_bins - 1, int(frac0 * self.n_bins)))
+        col1 = max(col0 + 1, min(self.n_bins, int(math.ceil(frac1 * self.n_bins))))
+        level = 0
+        for lvl in range(self.levels - 1, -1, -1):
+            times = self._times[lvl][:self._count[lvl] - self._first[lvl]]
+            i0, i1 = np.searchsorted(times, (t0, t1))
+            if i1 - i0 >= height or lvl == 0:
+                level = lvl
+                break
+        first = self._first[level]
+        times = self._times[level][:self._count[level] - first]
+        i0, i1 = np.searchsorted(times, (t0, t1))
+        # One row either side so held rows at the window edges are known.
+        i0 = max(0, i0 - 1)
+        i1 = min(len(times), i1 + 1)
+        rows, meta = self.read(level, first + i0, first + i1, col0, col1)
+        if level > 0 and i1 == len(times):
+            # Row k of level L folds rows [k*D, (k+1)*D) of level L-1; the rest
+            # of each finer level is still pending in _acc.
+            parts = [(rows, meta)]
+            start = self._count[level]
+            for lvl in range(level - 1, -1, -1):
+                start *= SPEC_ARCHIVE_DECIMATION
+                parts.append(self.read(lvl, start, self._count[lvl], col0, col1))
+                start = self._count[lvl]
+            rows = np.concatenate([r for r, _ in parts])
+            meta = np.concatenate([m for _, m in parts])
+        if len(rows) == 0:
+            return out, None
+        rows = _spec_reduce_rows(rows, width, reducer)
+        t = meta["t"]
+        dt = np.diff(t)
+        max_gap = 4.0 * float(np.median(dt)) if len(dt) else 0.0
+        max_gap = max(max_gap, 1.0)
+        # Pixel j (ascending time) covers [edges[j], edges[j+1]).
+        edges = t0 + (t1 - t0) * np.arange(height + 1) / height
+        idx = np.searchsorted(t, edges)
+        lo, hi = idx[:-1], idx[1:]
+        full = hi > lo
+        asc = np.full((height, width), np.nan, dtype=np.float32)
+        if np.any(full):
+            starts = lo[full]
+            red = np.maximum.reduceat(rows, starts, axis=0)
+            # reduceat runs each segment to the next start; trim the last one.
+            last = starts[-1]
+            red[-1] = np.max(rows[last:hi[full][-1]], axis=0)
+            asc[full] = red
+        # Zoomed in past the row rate: hold the previous row across the gap.
+        hold = ~full & (lo > 0) & (lo < len(t))
+        if np.any(hold):
+            prev = lo[hold] - 1
+            ok = (t[lo[hold]] - t[prev]) <= max_gap
+            rows_idx = np.nonzero(hold)[0][ok]
+            asc[rows_idx] = rows[prev[ok]]
+        out[:] = asc[::-1]
+        newest = int(min(len(meta), max(1, np.searchsorted(t, t1)))) - 1
+        rec = meta[newest]
+        newest_meta = {
+            "t": float(rec["t"]),
+            "center_frequency": float(rec["cf"]),
+            "fmin": float(rec["fmin"]),
+            "fmax": float(rec["fmax"]),
+            "level": level,
+            "col0": col0,
+            "col1": col1,
+        }
+        return out, newest_meta
+
+
+class WaterfallTiles:
+    """Waterfall pixels as a stack of fixed-height image tiles on a canvas.
+
+    Rather than shifting and re-uploading the whole (h, w, 3) image each tick,
+    new rows are painted into the top tile only, every tile is moved down with
+    a single canvas.move(), and only the tiles that changed are pasted. When
+    the top tile is full, the tile that has scrolled off the bottom is recycled
+    above it (a scroll offset over a ring of tiles). Pixel row y on screen
+    still corresponds to viewport offset y.
+
+    Tk thread only.
+    """
+
+    TAG = "spec_wf_tile"
+
+    def __init__(self, canvas: tk.Canvas, width: int, height: int, tile_rows: int = SPEC_WF_TILE_ROWS):
+        self._canvas = canvas
+        self.width = width
+        self.height = height
+        self._t = max(1, tile_rows)
+        n_tiles = -(-height // self._t) + 1
+        self._pixels = [np.zeros((self._t, width, 3), dtype=np.uint8) for _ in range(n_tiles)]
+        self._photos = [
+            _PILImageTk.PhotoImage(image=_PILImage.fromarray(px, "RGB")) for px in self._pixels
+        ]
+        self._items = [
+            canvas.create_image(0, 0, anchor="nw", image=photo, tags=(self.TAG,))
+            for photo in self._photos
+        ]
+        canvas.tag_lower(self.TAG)
+        self._y = [0] * n_tiles
+        self._order = deque()   # tile indices, top to bottom
+        self._fill = self._t    # rows written into the top tile
+        self._layout()
+
+    def _layout(self):
+        self._order = deque(range(len(self._pixels)))
+        for pos, i in enumerate(self._order):
+            self._y[i] = pos * self._t
+            self._canvas.coords(self._items[i], 0, self._y[i])
+        self._fill = self._t
+
+    def push_rows(self, rgb: np.ndarray):
+        """Scroll in (count, width, 3) new rows; rgb[0] is the newest (top) row."""
+        count = len(rgb)
+        if count <= 0:
+            return
+        t = self._t
+        dirty = set()
+        moved = set()
+        rem = count
+        while rem:
+            if self._fill == t:
+                # Recycle the bottom tile (off-screen) as the new top tile.
+                top = self._order[0]
+                i = self._order.pop()
+                self._order.appendleft(i)
+                self._y[i] = self._y[top] - t
+                moved.add(i)
+                self._fill = 0
+            top = self._order[0]
+            k = min(t - self._fill, rem)
+            self._pixels[top][t - self._fill - k:t - self._fill] = rgb[rem - k:rem]
+            dirty.add(top)
+            self._fill += k
+            rem -= k
+        for i in moved:
+            self._canvas.coords(self._items[i], 0, self._y[i])
+        self._canvas.move(self.TAG, 0, count)
+        for i in range(len(self._y)):
+            self._y[i] += count
+        for i in dirty:
+            self._photos[i].paste(_PILImage.fromarray(self._pixels[i], "RGB"))
+
+    def repaint(self, rgb: np.ndarray):
+        """Lay tiles out from scratch with rgb[0] at the top; rows past rgb stay black."""
+        self._layout()
+        t = self._t
+        n = len(rgb)
+        for pos, i in enumerate(self._order):
+            lo = pos * t
+            px = self._pixels[i]
+            k = max(0, min(t, n - lo))
+            if k:
+                px[:k] = rgb[lo:lo + k]
+            px[k:] = 0
+            self._photos[i].paste(_PILImage.fromarray(px, "RGB"))
+
+    def destroy(self):
+        self._canvas.delete(self.TAG)
+        self._photos = []
+        self._pixels = []
+
+
+class LineRaster:
+    """Persistent RGB raster for the SPEC line plot, pasted like the waterfall.
+
+    Traces are drawn as vertical per-column spans with one mask assignment
+    each, instead of pushing long coordinate lists through a canvas polyline.
+
+    Tk thread only.
+    """
+
+    BACKGROUND = (0x11, 0x11, 0x11)
+
+    def __init__(self, canvas: tk.Canvas, width: int, height: int):
+        self._canvas = canvas
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self._yy = np.arange(height, dtype=np.intp)[:, None]
+        self._photo = _PILImageTk.PhotoImage(image=_PILImage.fromarray(self.pixels, "RGB"))
+        self._item = canvas.create_image(0, 0, anchor="nw", image=self._photo)
+        canvas.tag_lower(self._item)
+
+    def clear(self, background: np.ndarray = None):
+        """Start a frame from the flat background or a (height, width, 3) image."""
+        if background is None:
+            self.pixels[:] = self.BACKGROUND
+        else:
+            self.pixels[:] = background
+
+    def spans(self, top: np.ndarray, bot: np.ndarray, color: tuple):
+        """Fill rows top[x]..bot[x] (inclusive) of every column x."""
+        mask = (self._yy >= top) & (self._yy <= bot)
+        self.pixels[mask] = color
+
+    def hline(self, y: int, color: tuple, dash: int = 4):
+        """Dashed horizontal line at pixel row y."""
+        if 0 <= y < self.height:
+            on = (np.arange(self.width) // dash) % 2 == 0
+            self.pixels[y, on] = color
+
+    def paste(self):
+        self._photo.paste(_PILImage.fromarray(self.pixels, "RGB"))
+
+    def destroy(self):
+        self._canvas.delete(self._item)
+        self._photo = None
+
+
+# ===== MQTT LOG HELPERS ===== #
+
+class MqttLogIndex:
+    """Bounded, sequence-numbered MQTT message store with a visible-row index.
+
+    Messages live in a fixed ring addressed by a monotonically increasing
+    sequence number, so appends and evictions never copy the buffer. The
+    index holds the sequence numbers of the messages that pass the display
+    filter; the viewer maps a scroll position straight to a row through it
+    and formats nothing until that row is on screen.
+
+    Callers serialize access (the GUI holds _mqtt_lock).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._ring = [None] * self.capacity
+        self.next_seq = 0
+        self.first_seq = 0      # oldest sequence number actually held
+        self._index = np.empty(1024, dtype=np.int64)
+        self._lo = 0
+        self._hi = 0
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def get(self, seq: int):
+        """(ts, topic, payload) for a live sequence number, else None."""
+        if self.first_seq <= seq < self.next_seq:
+            return self._ring[seq % self.capacity]
+        return None
+
+    def seqs(self, start: int, stop: int) -> np.ndarray:
+        """Sequence numbers of visible rows start..stop-1."""
+        n = len(self)
+        start = min(max(0, start), n)
+        stop = min(max(start, stop), n)
+        return self._index[self._lo + start:self._lo + stop]
+
+    def row_of(self, seq: int) -> int:
+        """Visible row holding seq, or the row it would be inserted at."""
+        view = self._index[self._lo:self._hi]
+        return int(np.searchsorted(view, seq))
+
+    def append(self, entry: tuple, visible: bool) -> int:
+        seq = self.next_seq
+        self._ring[seq % self.capacity] = entry
+        self.next_seq = seq + 1
+        self.first_seq = max(self.first_seq, self.next_seq - self.capacity)
+        if visible:
+            self._push(seq)
+        self._evict()
+        return seq
+
+    def rebuild(self, visible) -> None:
+        """Rebuild the index with visible(topic) -> bool over live messages.
+
+        The predicate is evaluated once per distinct topic.
+        """
+        cache = {}
+        keep = []
+        for seq in range(self.first_seq, self.next_seq):
+            topic = self._ring[seq % self.capacity][1]
+            shown = cache.get(topic)
+            if shown is None:
+                shown = cache[topic] = bool(visible(topic))
+            if shown:
+                keep.append(seq)
+        self._index = np.empty(max(1024, 2 * len(keep)), dtype=np.int64)
+        self._index[:len(keep)] = keep
+        self._lo = 0
+        self._hi = len(keep)
+
+    def resize(self, capacity: int, visible) -> None:
+        """Change capacity keeping the newest messages."""
+        keep = [self._ring[s % self.capacity] for s in range(self.first_seq, self.next_seq)]
+        keep = keep[-max(1, int(capacity)):]
+        base = self.next_seq - len(keep)
+        self.capacity = max(1, int(capacity))
+        self._ring = [None] * self.capacity
+        for i, entry in enumerate(keep):
+            self._ring[(base + i) % self.capacity] = entry
+        self.first_seq = base
+        self.rebuild(visible)
+
+    def clear(self) -> None:
+        self._ring = [None] * self.capacity
+        self.next_seq = 0
+        self.first_seq = 0
+        self._lo = self._hi = 0
+
+    def _push(self, seq: int) -> None:
+        if self._hi == len(self._index):
+            live = self._index[self._lo:self._hi]
+            if self._lo < len(self._index) // 2:
+                grown = np.empty(2 * len(self._index), dtype=np.int64)
+                grown[:len(live)] = live
+                self._index = grown
+            else:
+                self._index[:len(live)] = live.copy()
+            self._lo, self._hi = 0, len(live)
+        self._index[self._hi] = seq
+        self._hi += 1
+
+    def _evict(self) -> None:
+        first = self.first_seq
+        while self._lo < self._hi and self._index[self._lo] < first:
+            self._lo += 1
+
+
+def _mqtt_pattern_regex(pattern: str) -> str:
+    """Regex source for one filter term: 're:<regex>' (searched anywhere) or
+    an MQTT topic pattern with '+' / '#' wildcards (whole topic)."""
+    if pattern.startswith("re:"):
+        return f"(?:{pattern[3:]})"
+    parts = pattern.split("/")
+    out = []
+    for i, part in enumerate(parts):
+        if part == "#" and i == len(parts) - 1:
+            # '#' also matches the parent level itself ('a/#' matches 'a')
+            return "^" + ("/".join(out) + "(?:/.*)?" if out else ".*") + "$"
+        out.append("[^/]*" if part == "+" else re.escape(part))
+    return "^" + "/".join(out) + "$"
+
+
+class MqttTopicFilter:
+    """Compiled include/exclude topic filter for the MQTT tab.
+
+    Terms are MQTT patterns or 're:' regexes; suppress_words hides any topic
+    with one of those levels (case-insensitive), as the Suppress checkboxes
+    always did. Every term set compiles into a single regex once, and the
+    verdict is cached per distinct topic, so the MQTT thread pays one dict
+    lookup per message. Instances are immutable; replace to change filters.
+    """
+
+    CACHE_MAX = 8192
+
+    def __init__(self, include=(), exclude=(), suppress_words=()):
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.suppress_words = tuple(suppress_words)
+        try:
+            self._include_re = (re.compile("|".join(_mqtt_pattern_regex(p) for p in self.include))
+                                if self.include else None)
+            exclude_src = [_mqtt_pattern_regex(p) for p in self.exclude]
+        except re.error as e:
+            raise ValueError(f"bad topic filter: {e}") from None
+        if self.suppress_words:
+            words = "|".join(re.escape(w) for w in self.suppress_words)
+            exclude_src.append(f"(?i:(?:^|/)(?:{words})(?:/|$))")
+        try:
+            self._exclude_re = re.compile("|".join(exclude_src)) if exclude_src else None
+        except re.error as e:
+            raise ValueError(f"bad topic filter: {e}") from None
+        self._cache = {}
+
+    @staticmethod
+    def split_terms(text: str) -> list:
+        return [t for t in re.split(r"[,\s]+", text or "") if t]
+
+    def allows(self, topic: str) -> bool:
+        verdict = self._cache.get(topic)
+        if verdict is None:
+            verdict = ((self._include_re is None or self._include_re.search(topic) is not None)
+                       and (self._exclude_re is None or self._exclude_re.search(topic) is None))
+            if len(self._cache) >= self.CACHE_MAX:
+                self._cache.clear()
+            self._cache[topic] = verdict
+        return verdict
+
+
 # ===== MAIN GUI CLASS ===== #
 
 class MEPGui:
@@ -309,11 +1464,19 @@ class MEPGui:
         
         # MQTT streaming
         self._mqtt_buffer_max_messages = MQTT_LOG_BUFFER_MAX_MESSAGES
-        self._mqtt_widget_max_lines = MQTT_LOG_WIDGET_MAX_LINES
-        self._mqtt_messages = deque(maxlen=self._mqtt_buffer_max_messages)
+        self._mqtt_messages = MqttLogIndex(self._mqtt_buffer_max_messages)
+        self._mqtt_filter = MqttTopicFilter(suppress_words=MQTT_LOG_DEFAULT_SUPPRESS)
         self._mqtt_lock = threading.Lock()
-        self._mqtt_rendered_count = 0
         self._mqtt_paused = False
+        self._mqtt_view_top = 0          # first visible index row
+        self._mqtt_view_top_seq = None   # anchor while scrolled back
+        self._mqtt_view_follow = True    # pin the view to the newest row
+        self._mqtt_view_rows = 12
+        self._mqtt_view_seqs = []        # seqs currently drawn, top to bottom
+        self._mqtt_selected_seq = None
+        self._mqtt_render_after_id = None
+        self._mqtt_store = None          # MqttStoreWriter, started with the bus
+        self._mqtt_search_busy = False
         self._gui_queue = queue.SimpleQueue()
         self._gui_queue_closed = False
         
@@ -339,21 +1502,34 @@ class MEPGui:
         self._spec_latest_entry = None        # newest entry for line-plot native resolution
         self._spec_viewport = SpectrumViewport()   # screen-resolution ring (Tk thread only)
         self._spec_bins = None               # line-plot resolution override (None = native)
+        self._spec_reduce = self._spec_viewport.reducer  # bins-to-pixels reducer (SPEC_REDUCE_MODES)
         self._spec_render_interval_ms = 40   # render cadence (~25 FPS)
         self._spec_render_after_id = None
         self._spec_force_render = False
         self._spec_last_arrival = None
+        self._spec_effective_interval_ms = self._spec_render_interval_ms  # after CPU-budget stretch
+        self._spec_phase_ms = {}             # EWMA render cost per phase (insert/colormap/paste/line)
+        self._spec_render_cost_ms = 0.0      # EWMA total cost of one render tick
+        self._spec_last_render_t = None
+        self._spec_dropped = 0               # frames lost to _spec_pending overflow (guarded by _spec_lock)
+        self._spec_coalesced = 0             # frames merged into another frame's waterfall row
         self._spec_log_dt = False
         self._spec_color_lut = self._spec_build_color_lut()
         # Waterfall image (Tk thread only)
-        self._spec_pixels = None             # (h, w, 3) uint8 pixel buffer
-        self._spec_photo = None              # one persistent ImageTk.PhotoImage
-        self._spec_wf_image_id = None        # canvas item id for the waterfall image
+        self._spec_wf_tiles = None           # WaterfallTiles (scrolling PhotoImage tiles)
         self._spec_wf_resize_after_id = None
         self._spec_wf_target_size = None
         # Persistent canvas items (created once, updated via coords/itemconfig)
-        self._spec_line_item = None
         self._spec_line_labels = {}
+        self._spec_trace_mode = "off"        # SPEC_TRACE_MODES overlay on the line plot
+        self._spec_panorama = None           # SpectrumPanorama while sweep stitching is on
+        self._spec_panorama_gen = 0
+        self._spec_archive = None            # SpectrumArchive (optional on-disk history)
+        self._spec_archive_enabled = False
+        self._spec_hist = None               # history view {t1, span, f0, f1}; None = live
+        self._spec_hist_block = None         # last rendered history block (cursor readout)
+        self._spec_hist_meta = None
+        self._spec_line_raster = None        # LineRaster for the live line + overlays
         self._spec_wf_labels = {}
 
         # False until root.mainloop() is running; _gui_call routes to _gui_queue until then,
@@ -382,6 +1558,10 @@ class MEPGui:
         # NOTE: announce MUST be registered before registers so that
         # emit-cached fires _on_afe_announce first, populating _afe_reg_pins
         # before register data tries to use them.
+        try:
+            self._mqtt_store = MqttStoreWriter(MQTT_STORE_DIR)
+        except Exception as e:
+            logging.warning("MQTT store: recording disabled (%s)", e)
         self.bus.on_message(self._on_mqtt_message)
         self.bus.on_connection_state(self._on_mqtt_connection_state)
         self.bus.on_status(RECORDER_STATUS_TOPIC, self._on_recorder_status)
@@ -400,8 +1580,17 @@ class MEPGui:
         self.bus.on_status(AFE_HK_TOPIC, self._on_hk)
         self.bus.on_status(AFE_ANNOUNCE_TOPIC, self._on_afe_announce)
         self.bus.on_status(AFE_REGISTERS_TOPIC, self._on_afe_registers)
+        self.bus.on_status(LINK_MONITOR_STATUS_TOPIC, self._on_link_status)
         self.bus.on_status_pattern(self.bus.spec_topic, self._on_spec_data, subscribe=False)
 
+        # ---- Docker events (container state pushed, not polled) ----
+        self.docker.on_service_state(self._on_docker_service_state)
+        if not self.docker.events_start():
+            logging.debug("DOCKER: engine socket unavailable; container state is refresh-only")
+        # Resource sampling runs from startup so sweep steps are covered even
+        # if the DOC tab is never opened; its "Sample" checkbox pauses it.
+        self.docker.stats.start()
+
         # Refresh status grid from any cached state.
         self._refresh_status_grid()
         print("  Startup complete — entering event loop.", flush=True)
@@ -454,15 +1643,40 @@ class MEPGui:
     # ------------------------------------------------------------------ #
 
     def _on_mqtt_message(self, topic: str, payload: bytes):
-        """Global listener: log every MQTT message in the MQTT tab.
-
-        No topic is dropped here — what the human sees is governed entirely by
-        the Suppress checkboxes (Announce / +/data/+ / Status) at display time
-        in _mqtt_flush_buffer_to_widget(). Spectrum frames match the '+/data/+'
-        suppression, so they are hidden by default without being special-cased.
+        """Global listener: feed the MQTT tab and the on-disk store.
+
+        Every message is appended to the on-disk MQTT store, unfiltered. The
+        tab's compiled topic filter (Suppress checkboxes + Include/Exclude) is
+        applied here, on the MQTT thread, so suppressed messages are never
+        handed to Tk, buffered or formatted. Spectrum frames match the
+        '+/data/+' suppression, so they are dropped by default without being
+        special-cased.
         """
+        store = self._mqtt_store
+        if store is not None:
+            store.submit(topic, payload)
+        if not self._mqtt_filter.allows(topic):
+            return
         self._gui_call(self._mqtt_log_message, topic, payload)
 
+    def _on_docker_service_state(self, service: str, info: dict, action: str):
+        """Docker events thread: forward a container state change to the
+        capture controller, the MQTT bus and the DOC tab."""
+        capture = self.capture
+        if capture is not None:
+            capture.notify_service_state(service, info.get("state"), info.get("exit_code"))
+        if action != "sync" and self.bus.is_connected():
+            self.bus.publish_command(DOCKER_EVENTS_TOPIC, {
+                "service": service,
+                "action": action,
+                "state": info.get("state"),
+                "exit_code": info.get("exit_code"),
+                "health": info.get("health"),
+                "container": info.get("container"),
+                "timestamp": info.get("t"),
+            }, sleep_s=0)
+        self._gui_call(self._docker_apply_service_state, service, info, action)
+
     def _on_mqtt_connection_state(self, status: dict):
         self._gui_call(self._refresh_status_grid)
 
@@ -489,6 +1703,9 @@ class MEPGui:
         logging.info(f"AFE: {state}")
         self._gui_call(self._refresh_status_grid)
 
+    def _on_link_status(self, data: dict):
+        self._gui_call(self._refresh_link_status_cell)
+
     def _on_gnss(self, data: dict):
         self._gui_call(self._tlm_gps_update, data)
 
@@ -662,6 +1879,12 @@ class MEPGui:
 
             logging.info("Creating capture controller")
             self.capture = CaptureController(self.bus)
+            self.capture.on_step(self.docker.stats.mark_step)
+            # Events only report changes: seed the recorder state already known.
+            recorder = self.docker.service_state(DOCKER_RECORDER_SERVICE)
+            if recorder is not None:
+                self.capture.notify_service_state(
+                    DOCKER_RECORDER_SERVICE, recorder.get("state"), recorder.get("exit_code"))
 
             self.capture.configure_sweep(
                 channel=params["channel"],
@@ -900,6 +2123,7 @@ class MEPGui:
             ("afe", "AFE", 0, 2),
             ("tuner", "Tuner", 1, 0),
             ("recorder", "Recorder", 1, 1),
+            ("link", "Link", 1, 2),
         ]
 
         for key, label, row, col in specs:
@@ -929,15 +2153,12 @@ class MEPGui:
                 "detail": "",
             }
 
-        # Keep 2x3 geometry; leave final slot intentionally empty.
-        spacer = ttk.Frame(parent)
-        spacer.grid(row=1, column=2, padx=2, pady=2, sticky="ew")
-
         self._set_status_cell("mqtt", "gray", "unknown")
         self._set_status_cell("rfsoc", "gray", "unknown")
         self._set_status_cell("afe", "gray", "unknown")
         self._set_status_cell("tuner", "gray", "unknown")
         self._set_status_cell("recorder", "gray", "unknown")
+        self._set_status_cell("link", "gray", "no monitor")
 
     def _status_led_color(self, level: str) -> str:
         return {
@@ -1098,6 +2319,44 @@ class MEPGui:
                 level = "yellow" if mqtt_ok else "red"
                 self._set_status_cell("recorder", level, "no data", detail="No recorder status in cache")
 
+        self._refresh_link_status_cell()
+
+    def _refresh_link_status_cell(self):
+        """Show the mep_link_monitor.py report; stale after three missed intervals."""
+        link = self.bus.get_cached_status(LINK_MONITOR_STATUS_TOPIC)
+        if not isinstance(link, dict):
+            self._set_status_cell("link", "gray", "no monitor", detail="mep_link_monitor.py is not publishing")
+            return
+        interval_s = self._safe_float(link.get("interval_s"), 1.0) or 1.0
+        ts = self._safe_float(link.get("timestamp"), 0.0)
+        age_s = time.time() - ts
+        state = str(link.get("state", "unknown")).lower()
+        loss_pct = (self._safe_float(link.get("loss_rate"), 0.0) or 0.0) * 100.0
+        lines = [f"source={link.get('source', '?')}, age={age_s:.1f}s"]
+        channels = link.get("channels") if isinstance(link.get("channels"), dict) else {}
+        for ch, c in sorted(channels.items()):
+            if not isinstance(c, dict):
+                continue
+            bursts = ", ".join(f"{k}:{v}" for k, v in (c.get("burst_hist") or {}).items() if v)
+            lines.append(
+                f"{ch}: {c.get('state', '?')}, rx={c.get('received', 0)}, lost={c.get('lost', 0)} "
+                f"({(self._safe_float(c.get('loss_rate'), 0.0) or 0.0) * 100:.4f}%), "
+                f"ooo={c.get('out_of_order', 0)}, dup={c.get('duplicate', 0)}, late={c.get('late', 0)}, "
+                f"jitter={self._safe_float(c.get('jitter_us'), 0.0) or 0.0:.0f}us"
+                + (f", bursts[{bursts}]" if bursts else "")
+            )
+        detail = "\n".join(lines)
+        if age_s > 3 * interval_s:
+            self._set_status_cell("link", "gray", "stale", detail=detail)
+        elif state == "idle":
+            self._set_status_cell("link", "gray", "idle", detail=detail)
+        elif state == "fail":
+            self._set_status_cell("link", "red", f"loss {loss_pct:.3f}%", detail=detail)
+        elif state == "loss":
+            self._set_status_cell("link", "yellow", f"loss {loss_pct:.3f}%", detail=detail)
+        else:
+            self._set_status_cell("link", "green", "ok", detail=detail)
+
     def _build_tune_section(self, parent: ttk.Frame, row: int):
         frame = ttk.LabelFrame(parent, text="Tune")
         frame.grid(row=row, column=0, padx=10, pady=6, sticky="ew")
@@ -1331,8 +2590,8 @@ class MEPGui:
         if new_spec_visible != self._spec_tab_visible:
             self._spec_tab_visible = new_spec_visible
             self._spec_update_stream_state()
-        if tab_text == "MQTT":
-            self._mqtt_render_from_buffer()
+        if tab_text == "MQTT" and hasattr(self, "_mqtt_text"):
+            self._mqtt_render_view()
 
     # ---- MQTT tab ---- #
 
@@ -1540,34 +2799,50 @@ class MEPGui:
         suppress_f.columnconfigure(1, weight=1)
         suppress_f.columnconfigure(2, weight=1)
 
-        self._vars["mqtt_suppress_announce"] = tk.BooleanVar(value=True)
+        words = self._mqtt_filter.suppress_words
+        self._vars["mqtt_suppress_announce"] = tk.BooleanVar(value="announce" in words)
         ttk.Checkbutton(suppress_f, text="Announce",
                         variable=self._vars["mqtt_suppress_announce"]).grid(
             row=0, column=0, sticky="w", padx=5, pady=(2, 4))
         self._vars["mqtt_suppress_announce"].trace_add(
-            "write", lambda *_: self._mqtt_render_from_buffer())
+            "write", lambda *_: self._mqtt_compile_filter())
 
-        self._vars["mqtt_suppress_data"] = tk.BooleanVar(value=True)
+        self._vars["mqtt_suppress_data"] = tk.BooleanVar(value="data" in words)
         ttk.Checkbutton(suppress_f, text="+/data/+",
                         variable=self._vars["mqtt_suppress_data"]).grid(
             row=0, column=1, sticky="w", padx=5, pady=(2, 4))
         self._vars["mqtt_suppress_data"].trace_add(
-            "write", lambda *_: self._mqtt_render_from_buffer())
+            "write", lambda *_: self._mqtt_compile_filter())
 
-        self._vars["mqtt_suppress_status"] = tk.BooleanVar(value=False)
+        self._vars["mqtt_suppress_status"] = tk.BooleanVar(value="status" in words)
         ttk.Checkbutton(suppress_f, text="Status",
                         variable=self._vars["mqtt_suppress_status"]).grid(
             row=0, column=2, sticky="w", padx=5, pady=(2, 4))
         self._vars["mqtt_suppress_status"].trace_add(
-            "write", lambda *_: self._mqtt_render_from_buffer())
+            "write", lambda *_: self._mqtt_compile_filter())
+
+        # Custom filters: MQTT patterns (+/#) or re:<regex>, comma/space separated.
+        # Applied on the MQTT thread before buffering, so hidden messages cost
+        # no memory and cannot be recovered by relaxing the filter later.
+        self._vars["mqtt_filter_include"] = tk.StringVar(value=" ".join(self._mqtt_filter.include))
+        self._vars["mqtt_filter_exclude"] = tk.StringVar(value=" ".join(self._mqtt_filter.exclude))
+        ttk.Label(suppress_f, text="Include").grid(row=1, column=0, sticky="w", padx=5, pady=(0, 2))
+        include_entry = ttk.Entry(suppress_f, textvariable=self._vars["mqtt_filter_include"])
+        include_entry.grid(row=1, column=1, columnspan=2, sticky="ew", padx=5, pady=(0, 2))
+        ttk.Label(suppress_f, text="Exclude").grid(row=2, column=0, sticky="w", padx=5, pady=(0, 2))
+        exclude_entry = ttk.Entry(suppress_f, textvariable=self._vars["mqtt_filter_exclude"])
+        exclude_entry.grid(row=2, column=1, columnspan=2, sticky="ew", padx=5, pady=(0, 2))
+        for entry in (include_entry, exclude_entry):
+            entry.bind("<Return>", lambda e: self._mqtt_compile_filter())
+        ttk.Button(suppress_f, text="Apply Filters",
+                   command=self._mqtt_compile_filter).grid(
+            row=3, column=0, columnspan=3, sticky="ew", padx=5, pady=(0, 4))
 
         retention_f = ttk.Frame(log_ctl_f)
         retention_f.grid(row=3, column=0, columnspan=3, sticky="ew", padx=5, pady=(0, 4))
         retention_f.columnconfigure(1, weight=1)
-        retention_f.columnconfigure(3, weight=1)
 
         self._vars["mqtt_buffer_max_messages"] = tk.IntVar(value=self._mqtt_buffer_max_messages)
-        self._vars["mqtt_widget_max_lines"] = tk.IntVar(value=self._mqtt_widget_max_lines)
 
         ttk.Label(retention_f, text="Buffer Msgs").grid(row=0, column=0, sticky="w", padx=(0, 4))
         ttk.Spinbox(
@@ -1579,29 +2854,78 @@ class MEPGui:
             width=10,
         ).grid(row=0, column=1, sticky="w")
 
-        ttk.Label(retention_f, text="Max Lines").grid(row=0, column=2, sticky="w", padx=(12, 4))
-        ttk.Spinbox(
-            retention_f,
-            from_=100,
-            to=50000,
-            increment=100,
-            textvariable=self._vars["mqtt_widget_max_lines"],
-            width=10,
-        ).grid(row=0, column=3, sticky="w")
-
         ttk.Button(retention_f, text="Apply Retention",
                    command=self._mqtt_apply_retention_settings).grid(
-            row=0, column=4, padx=(12, 0), sticky="e")
+            row=0, column=2, padx=(12, 0), sticky="e")
+
+        # ---- Store search (on-disk history, results in the detail pane) ---- #
+        search_f = ttk.LabelFrame(log_ctl_f, text="Search Store")
+        search_f.grid(row=4, column=0, columnspan=3, sticky="ew", padx=5, pady=(0, 4))
+        search_f.columnconfigure(1, weight=1)
+        search_f.columnconfigure(3, weight=1)
+
+        self._vars["mqtt_search_topic"] = tk.StringVar(value="")
+        self._vars["mqtt_search_text"] = tk.StringVar(value="")
+        self._vars["mqtt_search_since"] = tk.StringVar(value="-1h")
+        self._vars["mqtt_search_regex"] = tk.BooleanVar(value=False)
+        self._vars["mqtt_search_state"] = tk.StringVar(
+            value=MQTT_STORE_DIR if self._mqtt_store is not None else "recording disabled")
+
+        ttk.Label(search_f, text="Topic").grid(row=0, column=0, sticky="w", padx=(5, 2), pady=2)
+        ttk.Entry(search_f, textvariable=self._vars["mqtt_search_topic"]).grid(
+            row=0, column=1, sticky="ew", pady=2)
+        ttk.Label(search_f, text="Since").grid(row=0, column=2, sticky="w", padx=(8, 2), pady=2)
+        ttk.Entry(search_f, textvariable=self._vars["mqtt_search_since"], width=10).grid(
+            row=0, column=3, sticky="ew", padx=(0, 5), pady=2)
+        ttk.Label(search_f, text="Text").grid(row=1, column=0, sticky="w", padx=(5, 2), pady=2)
+        ttk.Entry(search_f, textvariable=self._vars["mqtt_search_text"]).grid(
+            row=1, column=1, sticky="ew", pady=2)
+        ttk.Checkbutton(search_f, text="Regex",
+                        variable=self._vars["mqtt_search_regex"]).grid(
+            row=1, column=2, sticky="w", padx=(8, 2), pady=2)
+        ttk.Button(search_f, text="Search",
+                   command=self._mqtt_store_search).grid(
+            row=1, column=3, sticky="ew", padx=(0, 5), pady=2)
+        ttk.Label(search_f, textvariable=self._vars["mqtt_search_state"],
+                  foreground="grey", font=("TkFixedFont", 8)).grid(
+            row=2, column=0, columnspan=4, sticky="w", padx=5, pady=(0, 2))
 
         # ---- Message log (shorter to leave room for publish panel) ---- #
-        self._mqtt_text = scrolledtext.ScrolledText(
-            frame, height=12, wrap="word", font=("TkFixedFont", 9),
+        # Virtualized: the list widget only ever holds the rows on screen, one
+        # line per message; the scrollbar is driven from the message index.
+        # Clicking a row pretty-prints that one message in the detail pane.
+        log_pane = ttk.PanedWindow(frame, orient="vertical")
+        log_pane.grid(row=1, column=0, sticky="nsew", padx=4, pady=(0, 2))
+
+        list_f = ttk.Frame(log_pane)
+        list_f.columnconfigure(0, weight=1)
+        list_f.rowconfigure(0, weight=1)
+        self._mqtt_text = tk.Text(
+            list_f, height=self._mqtt_view_rows, wrap="none", font=("TkFixedFont", 9),
+            background="#f5f5f5", exportselection=False, cursor="arrow")
+        self._mqtt_text.grid(row=0, column=0, sticky="nsew")
+        self._mqtt_text.tag_configure("mqtt_sel", background="#cde3f7")
+        self._mqtt_scroll = ttk.Scrollbar(list_f, orient="vertical",
+                                          command=self._mqtt_view_yview)
+        self._mqtt_scroll.grid(row=0, column=1, sticky="ns")
+        self._mqtt_text.bind("<Key>", self._mqtt_view_key)
+        self._mqtt_text.bind("<Button-1>", self._mqtt_view_click)
+        self._mqtt_text.bind("<MouseWheel>",
+            lambda e: self._mqtt_view_scroll(-3 if e.delta > 0 else 3))
+        self._mqtt_text.bind("<Button-4>", lambda e: self._mqtt_view_scroll(-3))
+        self._mqtt_text.bind("<Button-5>", lambda e: self._mqtt_view_scroll(3))
+        self._mqtt_text.bind("<Configure>", self._mqtt_view_configure)
+        self._bind_copy_menu(self._mqtt_text, allow_paste=False)
+        log_pane.add(list_f, weight=3)
+
+        self._mqtt_detail_text = scrolledtext.ScrolledText(
+            log_pane, height=6, wrap="word", font=("TkFixedFont", 9),
             background="#f5f5f5", exportselection=False)
-        self._mqtt_text.grid(row=1, column=0, sticky="nsew", padx=4, pady=(0, 2))
-        self._mqtt_text.bind("<Key>",
+        self._mqtt_detail_text.bind("<Key>",
             lambda e: None if (e.state & 0x4 and e.keysym in ("c", "C", "a", "A"))
                       else "break")
-        self._bind_copy_menu(self._mqtt_text, allow_paste=False)
+        self._bind_copy_menu(self._mqtt_detail_text, allow_paste=False)
+        log_pane.add(self._mqtt_detail_text, weight=1)
 
         # ---- Manual publish ---- #
         pub_f = ttk.LabelFrame(frame, text="Publish Message")
@@ -1670,6 +2994,19 @@ class MEPGui:
             variable=self._vars["spec_log_dt"],
             command=lambda: setattr(self, "_spec_log_dt", self._vars["spec_log_dt"].get()),
         ).grid(row=1, column=2, columnspan=2, sticky="e", padx=5, pady=(0, 2))
+        self._vars["spec_archive"] = tk.BooleanVar(value=self._spec_archive_enabled)
+        ttk.Checkbutton(
+            cfg_f, text="Archive history",
+            variable=self._vars["spec_archive"],
+            command=self._spec_toggle_archive,
+        ).grid(row=2, column=0, sticky="w", padx=5, pady=(0, 2))
+        self._vars["spec_archive_state"] = tk.StringVar(value="off (wheel over waterfall scrolls history)")
+        ttk.Label(cfg_f, textvariable=self._vars["spec_archive_state"], foreground="grey").grid(
+            row=2, column=1, sticky="w", padx=5, pady=(0, 2)
+        )
+        ttk.Button(cfg_f, text="Live", command=self._spec_history_exit).grid(
+            row=2, column=2, columnspan=2, sticky="e", padx=5, pady=(0, 2)
+        )
 
         ctl_f = ttk.LabelFrame(frame, text="Display")
         ctl_f.grid(row=1, column=0, padx=4, pady=(2, 2), sticky="ew")
@@ -1706,6 +3043,41 @@ class MEPGui:
             )
             btn.grid(row=0, column=i, padx=(0 if i == 0 else 2, 0), pady=0, sticky="w")
             self._spec_bin_buttons[n] = btn
+        reduce_f = ttk.Frame(ctl_f)
+        reduce_f.grid(row=1, column=5, sticky="e", padx=5, pady=(0, 2))
+        ttk.Label(reduce_f, text="Reduce").pack(side="left", padx=(0, 2))
+        self._vars["spec_reduce"] = tk.StringVar(value=self._spec_reduce)
+        reduce_combo = ttk.Combobox(reduce_f, textvariable=self._vars["spec_reduce"],
+                                    values=list(SPEC_REDUCE_MODES), width=8, state="readonly")
+        reduce_combo.pack(side="left")
+        reduce_combo.bind("<<ComboboxSelected>>", lambda _e: self._spec_apply_reduce())
+        trace_f = ttk.Frame(ctl_f)
+        trace_f.grid(row=3, column=0, columnspan=6, sticky="w", padx=5, pady=(0, 4))
+        ttk.Label(trace_f, text="Trace").pack(side="left", padx=(0, 2))
+        self._vars["spec_trace"] = tk.StringVar(value=self._spec_trace_mode)
+        trace_combo = ttk.Combobox(trace_f, textvariable=self._vars["spec_trace"],
+                                   values=list(SPEC_TRACE_MODES), width=9, state="readonly")
+        trace_combo.pack(side="left")
+        trace_combo.bind("<<ComboboxSelected>>", lambda _e: self._spec_apply_trace_mode())
+        ttk.Button(trace_f, text="Reset", command=self._spec_reset_traces).pack(side="left", padx=(6, 0))
+        ttk.Button(trace_f, text="Export...", command=self._spec_export_traces).pack(side="left", padx=(4, 0))
+        ttk.Label(trace_f, text="Thr").pack(side="left", padx=(12, 2))
+        self._vars["spec_threshold"] = tk.StringVar(value="")
+        thr_entry = ttk.Entry(trace_f, textvariable=self._vars["spec_threshold"], width=7)
+        thr_entry.pack(side="left")
+        thr_entry.bind("<Return>", lambda _e: self._spec_request_render())
+        self._vars["spec_panorama"] = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            trace_f, text="Sweep panorama",
+            variable=self._vars["spec_panorama"],
+            command=self._spec_apply_panorama,
+        ).pack(side="left", padx=(16, 2))
+        ttk.Label(trace_f, text="Overlap").pack(side="left", padx=(4, 2))
+        self._vars["spec_panorama_overlap"] = tk.StringVar(value=SPEC_PANORAMA_OVERLAP_MODES[0])
+        overlap_combo = ttk.Combobox(trace_f, textvariable=self._vars["spec_panorama_overlap"],
+                                     values=list(SPEC_PANORAMA_OVERLAP_MODES), width=5, state="readonly")
+        overlap_combo.pack(side="left")
+        overlap_combo.bind("<<ComboboxSelected>>", lambda _e: self._spec_apply_panorama())
         ctl_f.columnconfigure(2, weight=1)
         ctl_f.columnconfigure(4, weight=1)
         ttk.Label(ctl_f, text="Refresh (ms)").grid(row=2, column=0, sticky="w", padx=5, pady=(0, 4))
@@ -1732,6 +3104,9 @@ class MEPGui:
         self._spec_wf_canvas.bind("<Motion>", lambda e: self._spec_cursor_update(e, from_waterfall=True))
         self._spec_wf_canvas.bind("<Button-1>", lambda e: self._spec_cursor_update(e, from_waterfall=True))
         self._spec_wf_canvas.bind("<Configure>", lambda e: self._spec_wf_resize_request(e.width, e.height))
+        self._spec_wf_canvas.bind("<MouseWheel>", lambda e: self._spec_wf_wheel(e, 1 if e.delta > 0 else -1))
+        self._spec_wf_canvas.bind("<Button-4>", lambda e: self._spec_wf_wheel(e, 1))
+        self._spec_wf_canvas.bind("<Button-5>", lambda e: self._spec_wf_wheel(e, -1))
 
         self._vars["spec_summary"] = tk.StringVar(value="Paused. Press Stream to start SPEC updates")
         ttk.Label(frame, textvariable=self._vars["spec_summary"], foreground="grey",
@@ -1762,32 +3137,20 @@ class MEPGui:
         self._spec_wf_resize(w, h)
 
     def _spec_wf_resize(self, w: int, h: int):
-        """Reallocate pixel buffer and viewport on canvas resize.
+        """Reallocate image tiles and viewport on canvas resize.
 
         The viewport resamples and preserves as many rows as fit the new height.
-        The old PhotoImage is released after Tk has been given the new one.
         """
         w = max(4, w)
         h = max(4, h)
-        if self._spec_pixels is not None and self._spec_pixels.shape[:2] == (h, w):
+        tiles = self._spec_wf_tiles
+        if tiles is not None and (tiles.width, tiles.height) == (w, h):
             return
         # Resize viewport (resamples existing rows to new width, trims to new height)
         self._spec_viewport.resize(w, h)
-        # Allocate new pixel buffer
-        self._spec_pixels = np.zeros((h, w, 3), dtype=np.uint8)
-        # Allocate new PhotoImage, release old one after Tk has the new reference
-        pil = _PILImage.fromarray(self._spec_pixels, "RGB")
-        new_photo = _PILImageTk.PhotoImage(image=pil)
-        if self._spec_wf_image_id is None:
-            self._spec_wf_image_id = self._spec_wf_canvas.create_image(
-                0, 0, anchor="nw", image=new_photo
-            )
-        else:
-            self._spec_wf_canvas.itemconfig(self._spec_wf_image_id, image=new_photo)
-        old_photo = self._spec_photo
-        self._spec_photo = new_photo
-        if old_photo is not None:
-            del old_photo
+        if tiles is not None:
+            tiles.destroy()
+        self._spec_wf_tiles = WaterfallTiles(self._spec_wf_canvas, w, h)
         # Repaint from viewport if any data is present
         vmin, vmax = self._spec_color_range()
         if vmin is not None and self._spec_viewport.valid_rows > 0:
@@ -1799,17 +3162,15 @@ class MEPGui:
         Does not touch the viewport — call viewport.clear() separately when
         a complete data reset is needed (e.g. Stream button press).
         """
-        if self._spec_pixels is not None and self._spec_photo is not None:
-            self._spec_pixels[:] = 0
-            pil = _PILImage.fromarray(self._spec_pixels, "RGB")
-            self._spec_photo.paste(pil)
+        if self._spec_wf_tiles is not None:
+            self._spec_wf_tiles.repaint(np.zeros((0, self._spec_wf_tiles.width, 3), dtype=np.uint8))
         for item in self._spec_wf_labels.values():
             self._spec_wf_canvas.delete(item)
         self._spec_wf_labels = {}
-        if self._spec_line_item is not None:
+        if self._spec_line_labels or self._spec_line_raster is not None:
             self._spec_line_canvas.delete("all")
-            self._spec_line_item = None
             self._spec_line_labels = {}
+            self._spec_line_raster = None
 
     def _spec_stream_on(self):
         """User clicked Stream: reset display and request active streaming."""
@@ -1818,6 +3179,8 @@ class MEPGui:
         self._spec_viewport.clear()
         with self._spec_lock:
             self._spec_pending.clear()
+            self._spec_dropped = 0
+        self._spec_coalesced = 0
         self._spec_latest_entry = None
         self._spec_reset_canvas()
         self._spec_update_stream_state()
@@ -1886,6 +3249,77 @@ class MEPGui:
         # at native resolution, so no buffer reset is needed — just redraw.
         self._spec_request_render()
 
+    def _spec_apply_reduce(self):
+        mode = str(self._vars["spec_reduce"].get()).strip().lower()
+        if mode not in SPEC_REDUCE_MODES:
+            logging.error("SPEC: reducer must be one of %s", ", ".join(SPEC_REDUCE_MODES))
+            self._vars["spec_reduce"].set(self._spec_reduce)
+            return
+        self._spec_reduce = mode
+        # Applies to rows decimated from now on; rows already in the waterfall
+        # keep the reducer they were stored with.
+        self._spec_viewport.reducer = mode
+        self._spec_request_render()
+
+    def _spec_apply_trace_mode(self):
+        mode = str(self._vars["spec_trace"].get()).strip().lower()
+        if mode not in SPEC_TRACE_MODES:
+            self._vars["spec_trace"].set(self._spec_trace_mode)
+            return
+        self._spec_trace_mode = mode
+        traces = self._spec_viewport.traces
+        if mode == "persist" and not traces.persist_enabled:
+            traces.persist = None  # start a fresh density rather than resume a stale one
+        traces.persist_enabled = mode == "persist"
+        self._spec_request_render()
+
+    def _spec_reset_traces(self):
+        """Restart all trace accumulators from the next frame."""
+        self._spec_viewport.traces.reset()
+        self._spec_request_render()
+
+    def _spec_export_traces(self):
+        """Save the accumulated traces to an .npz chosen by the user."""
+        traces = self._spec_viewport.traces
+        if traces.count == 0:
+            logging.warning("SPEC: no traces to export yet")
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Export SPEC traces",
+            defaultextension=".npz",
+            filetypes=[("NumPy archive", "*.npz"), ("All files", "*")],
+            initialfile=f"spec_traces_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.npz",
+        )
+        if not path:
+            return
+        try:
+            traces.export(path)
+        except Exception as e:
+            logging.error(f"SPEC: trace export failed: {e}")
+            return
+        logging.info(f"SPEC: exported {traces.count} frames of traces to {path}")
+
+    def _spec_apply_panorama(self):
+        """Switch between per-frame display and sweep panorama stitching.
+
+        In panorama mode the line plot shows the wideband grid (pass in
+        progress over the last complete pass) and the waterfall advances one
+        row per completed sweep pass. Either switch starts a clean display.
+        """
+        enabled = bool(self._vars["spec_panorama"].get())
+        overlap = str(self._vars["spec_panorama_overlap"].get())
+        pano = self._spec_panorama
+        if enabled and pano is not None and pano.overlap != overlap:
+            pano.overlap = overlap
+            pano.reset_pass()
+            return
+        if enabled == (pano is not None):
+            return
+        self._spec_panorama = SpectrumPanorama(overlap=overlap) if enabled else None
+        self._spec_panorama_gen = 0
+        self._spec_clear_now()
+
     def _spec_apply_render_interval(self, ms: int):
         ms = max(10, min(500, ms))
         self._spec_render_interval_ms = ms
@@ -1909,42 +3343,44 @@ class MEPGui:
             lut[idx] = (r, g, b)
         return lut
 
-    def _spec_row_to_rgb(self, db_row, w: int, vmin: float, vmax: float):
-        """Map one native dB row to a (w, 3) uint8 RGB strip via the colormap.
+    def _spec_rows_to_rgb(self, db_rows: np.ndarray, w: int, vmin: float, vmax: float):
+        """Map (rows, n) dB values to a (rows, w, 3) uint8 RGB block via the colormap.
 
-        The native spectrum is resampled directly to the pixel width here — a
-        single resampling step (no intermediate bin-count round-trip).
+        All rows go through one resample (cached index map) and one LUT gather,
+        so painting a burst costs the same number of NumPy calls as one row.
+        Missing values (NaN) map to the bottom of the colormap.
         """
-        vals = _spec_resample_1d(db_row, w)
-        scale = 255.0 / (vmax - vmin)
-        idx = np.clip((vals - vmin) * scale, 0, 255).astype(np.uint8)
-        return self._spec_color_lut[idx]
+        vals = _spec_resample_rows(db_rows, w)
+        if vals is db_rows:
+            vals = vals.copy()
+        vals -= vmin
+        vals *= 255.0 / (vmax - vmin)
+        np.clip(vals, 0, 255, out=vals)
+        np.nan_to_num(vals, copy=False, nan=0.0)
+        return self._spec_color_lut[vals.astype(np.uint8)]
 
     def _spec_blit_new_rows(self, count: int, vmin: float, vmax: float):
-        """Scroll the pixel buffer down by ``count`` rows and paint the newest rows.
+        """Scroll the waterfall down by ``count`` rows and paint the newest rows.
 
         The ``count`` newest viewport rows (offset 0 = newest = top) are
-        colour-mapped and the whole buffer is pasted into the persistent
-        PhotoImage in a single X11 op, so catching up on a burst of frames costs
-        one blit regardless of how many rows arrived since the last tick.
+        colour-mapped in one pass and handed to the tile stack, which moves the
+        existing image on the canvas and uploads only the band that changed —
+        per-tick cost follows the number of new rows, not the window area.
         """
-        if self._spec_pixels is None or self._spec_photo is None or count <= 0:
-            return
-        h, w, _ = self._spec_pixels.shape
-        if count >= h:
+        tiles = self._spec_wf_tiles
+        if tiles is None or count <= 0 or self._spec_hist is not None:
+            return  # the history view stays put while live rows keep arriving
+        if count >= tiles.height:
             # Every visible row is new — rebuild from the viewport at one scale.
             self._spec_repaint_all(vmin, vmax)
             return
-        # Shift existing rows down by ``count``. NumPy buffers the overlapping
-        # slice assignment, so the down-shift is correct.
-        self._spec_pixels[count:] = self._spec_pixels[:-count]
-        # Paint the ``count`` newest rows at the top (pixel row i = offset i).
-        for i in range(count):
-            row_vals, _ = self._spec_viewport.row_at_offset(i)  # 0 = newest
-            if row_vals is not None:
-                self._spec_pixels[i] = self._spec_row_to_rgb(row_vals, w, vmin, vmax)
-        pil = _PILImage.fromarray(self._spec_pixels, "RGB")
-        self._spec_photo.paste(pil)
+        t0 = time.perf_counter()
+        rows = self._spec_viewport.rows_newest_first(count)  # 0 = newest
+        rgb = self._spec_rows_to_rgb(rows, tiles.width, vmin, vmax)
+        t1 = time.perf_counter()
+        tiles.push_rows(rgb)
+        self._spec_note_phase("colormap", t1 - t0)
+        self._spec_note_phase("paste", time.perf_counter() - t1)
 
     def _spec_repaint_all(self, vmin: float, vmax: float):
         """Rebuild the entire pixel buffer from viewport rows at a consistent scale.
@@ -1952,17 +3388,139 @@ class MEPGui:
         Called on colour-range changes and canvas resize so every visible row
         uses the same mapping — prevents colour drift across the image.
         """
-        if self._spec_pixels is None or self._spec_photo is None:
-            return
-        h, w, _ = self._spec_pixels.shape
-        self._spec_pixels[:] = 0
-        n = min(self._spec_viewport.valid_rows, h)
-        for i in range(n):
-            row_vals, _ = self._spec_viewport.row_at_offset(i)  # 0=newest=top
-            if row_vals is not None:
-                self._spec_pixels[i] = self._spec_row_to_rgb(row_vals, w, vmin, vmax)
-        pil = _PILImage.fromarray(self._spec_pixels, "RGB")
-        self._spec_photo.paste(pil)
+        tiles = self._spec_wf_tiles
+        if tiles is None:
+            return
+        if self._spec_hist is not None:
+            self._spec_render_history(vmin, vmax)
+            return
+        t0 = time.perf_counter()
+        rows = self._spec_viewport.rows_newest_first(tiles.height)  # 0=newest=top
+        rgb = self._spec_rows_to_rgb(rows, tiles.width, vmin, vmax)
+        t1 = time.perf_counter()
+        tiles.repaint(rgb)
+        self._spec_note_phase("colormap", t1 - t0)
+        self._spec_note_phase("paste", time.perf_counter() - t1)
+
+    # --- SPEC history archive ---
+
+    def _spec_toggle_archive(self):
+        """Start/stop appending SPEC rows to the on-disk archive.
+
+        Stopping keeps the archive open so its history can still be browsed;
+        restarting continues the same archive (the gap shows as empty rows).
+        """
+        self._spec_archive_enabled = bool(self._vars["spec_archive"].get())
+        if not self._spec_archive_enabled and self._spec_archive is not None:
+            self._spec_archive.flush()
+        self._spec_update_archive_state()
+
+    def _spec_archive_row(self, entry: dict, meta: dict):
+        row = entry["row"]
+        arch = self._spec_archive
+        try:
+            if arch is None or arch.n_bins != len(row):
+                # Bin count changed: history at another resolution goes to a new archive.
+                if arch is not None:
+                    arch.close()
+                    self._spec_hist = None
+                arch = SpectrumArchive(SPEC_ARCHIVE_DIR, len(row))
+                self._spec_archive = arch
+                logging.info(f"SPEC: archiving history to {arch.path}")
+            arch.append(row, meta, entry.get("rx_time") or time.time())
+        except (OSError, ValueError) as e:
+            logging.error(f"SPEC: archive write failed, archiving disabled: {e}")
+            self._spec_archive_enabled = False
+            if "spec_archive" in self._vars:
+                self._vars["spec_archive"].set(False)
+
+    def _spec_update_archive_state(self):
+        if "spec_archive_state" not in self._vars:
+            return
+        arch = self._spec_archive
+        if arch is None:
+            text = "on, waiting for frames" if self._spec_archive_enabled else "off"
+        else:
+            first, last = arch.time_span()
+            dur = 0.0 if first is None else last - first
+            state = "on" if self._spec_archive_enabled else "stopped"
+            text = f"{state}: {arch.rows} rows, {dur / 60.0:.1f} min, {arch.nbytes / 1e6:.0f} MB"
+        if self._spec_hist is not None:
+            text += "  [history view]"
+        self._vars["spec_archive_state"].set(text)
+
+    def _spec_wf_wheel(self, event, step: int):
+        """Mouse wheel over the waterfall: browse the archive.
+
+        Wheel scrolls back/forward in time (forward past the newest row returns
+        to live), Ctrl+wheel zooms time and Shift+wheel zooms frequency, both
+        about the cursor.
+        """
+        arch = self._spec_archive
+        tiles = self._spec_wf_tiles
+        if arch is None or arch.rows == 0 or tiles is None:
+            return
+        first, last = arch.time_span()
+        total = max(last - first, 1.0)
+        hist = self._spec_hist
+        if hist is None:
+            # Start from what the live waterfall shows: the newest screenful of rows.
+            span = total * min(1.0, tiles.height / max(1, arch.rows))
+            hist = {"t1": last, "span": max(span, 1.0), "f0": 0.0, "f1": 1.0}
+        fy = max(0.0, min(1.0, event.y / max(1, tiles.height)))
+        fx = max(0.0, min(1.0, event.x / max(1, tiles.width)))
+        factor = 1.0 / 1.25 if step > 0 else 1.25
+        if event.state & 0x4:
+            t_cur = hist["t1"] - fy * hist["span"]
+            hist["span"] = max(0.05, min(hist["span"] * factor, total * 1.1))
+            hist["t1"] = t_cur + fy * hist["span"]
+        elif event.state & 0x1:
+            f_cur = hist["f0"] + fx * (hist["f1"] - hist["f0"])
+            width = max(4.0 / arch.n_bins, min(1.0, (hist["f1"] - hist["f0"]) * factor))
+            hist["f0"] = max(0.0, min(1.0 - width, f_cur - fx * width))
+            hist["f1"] = hist["f0"] + width
+        else:
+            if step < 0 and hist["t1"] >= last and self._spec_hist is not None:
+                self._spec_history_exit()
+                return
+            hist["t1"] += (-0.1 if step > 0 else 0.1) * hist["span"]
+            hist["t1"] = max(first + 0.1 * hist["span"], min(last, hist["t1"]))
+        self._spec_hist = hist
+        self._spec_update_archive_state()
+        vmin, vmax = self._spec_color_range()
+        if vmin is not None:
+            self._spec_render_history(vmin, vmax)
+
+    def _spec_history_exit(self):
+        """Leave the history view and repaint the live waterfall."""
+        if self._spec_hist is None:
+            return
+        self._spec_hist = None
+        self._spec_hist_block = None
+        self._spec_hist_meta = None
+        self._spec_update_archive_state()
+        vmin, vmax = self._spec_color_range()
+        if vmin is not None:
+            self._spec_repaint_all(vmin, vmax)
+        if self._spec_latest_entry is not None:
+            self._spec_update_wf_labels(self._spec_latest_entry)
+
+    def _spec_render_history(self, vmin: float, vmax: float):
+        """Paint the archived window described by ``_spec_hist`` into the waterfall."""
+        tiles = self._spec_wf_tiles
+        arch = self._spec_archive
+        hist = self._spec_hist
+        if tiles is None or arch is None or hist is None:
+            return
+        block, meta = arch.view(
+            hist["t1"] - hist["span"], hist["t1"], hist["f0"], hist["f1"],
+            tiles.width, tiles.height, self._spec_reduce,
+        )
+        self._spec_hist_block = block
+        self._spec_hist_meta = meta
+        tiles.repaint(self._spec_rows_to_rgb(block, tiles.width, vmin, vmax))
+        if self._spec_latest_entry is not None:
+            self._spec_update_wf_labels(self._spec_latest_entry)
 
     def _spec_freq_axis(self, latest: dict, n_bins: int):
         """Return (lo, hi, is_hz). Absolute Hz when metadata is present, else bin indices."""
@@ -1990,7 +3548,27 @@ class MEPGui:
         w = max(10, canvas.winfo_width())
         x = max(0, min(w - 1, event.x))
 
-        if from_waterfall:
+        if from_waterfall and self._spec_hist is not None:
+            block = self._spec_hist_block
+            if block is None or self._spec_archive is None:
+                return
+            hist = self._spec_hist
+            bh, bw = block.shape
+            y = max(0, min(bh - 1, event.y))
+            col = max(0, min(bw - 1, x))
+            meta = {k: (None if isinstance(v, float) and math.isnan(v) else v)
+                    for k, v in (self._spec_hist_meta or {}).items()}
+            a0, a1, is_hz = self._spec_freq_axis(meta, self._spec_archive.n_bins)
+            frac = hist["f0"] + (hist["f1"] - hist["f0"]) * (col + 0.5) / bw
+            freq = a0 + (a1 - a0) * frac
+            t = hist["t1"] - hist["span"] * (y + 0.5) / bh
+            amp = float(block[y, col])
+            ts = datetime.datetime.fromtimestamp(t).strftime("%H:%M:%S.%f")[:-3]
+            label = (
+                f"Cursor: f={self._spec_fmt_axis(freq, is_hz)}  t={ts}  "
+                + ("pwr=no data" if math.isnan(amp) else f"pwr={self._spec_fmt_amp(amp)}")
+            )
+        elif from_waterfall:
             h = max(1, self._spec_wf_canvas.winfo_height())
             y = max(0, min(h - 1, event.y))
             n_valid = self._spec_viewport.valid_rows
@@ -2017,7 +3595,7 @@ class MEPGui:
             if latest is None:
                 return
             native = latest["row"]
-            display = native if self._spec_bins is None else _spec_resample_1d(native, self._spec_bins)
+            display = native if self._spec_bins is None else _spec_reduce_rows(native, self._spec_bins, self._spec_reduce)
             n = len(display)
             if n <= 0:
                 return
@@ -2059,7 +3637,10 @@ class MEPGui:
         if self._spec_log_dt and self._spec_last_arrival is not None:
             logging.info(f"SPEC frame dt={(now - self._spec_last_arrival) * 1000:.0f} ms")
         self._spec_last_arrival = now
+        entry["rx_time"] = time.time()
         with self._spec_lock:
+            if len(self._spec_pending) == self._spec_pending.maxlen:
+                self._spec_dropped += 1  # append below evicts the oldest frame
             self._spec_pending.append(entry)
 
     def _spec_request_render(self):
@@ -2084,14 +3665,79 @@ class MEPGui:
                 pass
             self._spec_render_after_id = None
 
+    def _spec_note_phase(self, phase: str, seconds: float):
+        """Fold one render-phase timing (seconds) into its EWMA (ms)."""
+        ms = seconds * 1000.0
+        prev = self._spec_phase_ms.get(phase)
+        self._spec_phase_ms[phase] = ms if prev is None else prev + SPEC_RENDER_COST_GAIN * (ms - prev)
+
+    @staticmethod
+    def _spec_coalesce(entries: list, max_rows: int) -> list:
+        """Group consecutive frames so at most ~max_rows waterfall rows result.
+
+        Frames are only grouped with neighbours on the same frequency axis
+        (bin count, center frequency and span), so a retune never merges rows
+        from two tunings.
+        """
+        k = -(-len(entries) // max(1, max_rows))
+        if k <= 1:
+            return [[e] for e in entries]
+        groups = []
+        for entry in entries:
+            g = groups[-1] if groups else None
+            if (g is not None and len(g) < k and len(g[0]["row"]) == len(entry["row"])
+                    and all(g[0].get(f) == entry.get(f) for f in ("center_frequency", "fmin", "fmax"))):
+                g.append(entry)
+            else:
+                groups.append([entry])
+        return groups
+
+    @staticmethod
+    def _spec_entry_meta(entry: dict) -> dict:
+        """Viewport/archive metadata of one SPEC frame."""
+        return {
+            "ts": entry.get("ts"),
+            "center_frequency": entry.get("center_frequency"),
+            "fmin": entry.get("fmin"),
+            "fmax": entry.get("fmax"),
+            "scan_time": entry.get("scan_time"),
+            "n": entry.get("n"),
+        }
+
+    def _spec_merge_rows(self, group: list) -> np.ndarray:
+        """One native row from a group of frames, using the active reducer."""
+        rows = np.stack([e["row"] for e in group])
+        if self._spec_reduce == "min":
+            return rows.min(axis=0)
+        if self._spec_reduce == "mean":
+            return rows.mean(axis=0, dtype=np.float32)
+        return rows.max(axis=0)
+
+    def _spec_schedule_next(self, cost_s: float):
+        """Re-arm the render timer, stretching the tick to stay within the CPU budget."""
+        cost_ms = cost_s * 1000.0
+        self._spec_render_cost_ms += SPEC_RENDER_COST_GAIN * (cost_ms - self._spec_render_cost_ms)
+        budget_ms = self._spec_render_cost_ms / SPEC_RENDER_CPU_BUDGET
+        self._spec_effective_interval_ms = int(min(
+            SPEC_RENDER_MAX_INTERVAL_MS, max(self._spec_render_interval_ms, budget_ms)
+        ))
+        if self._spec_is_active:
+            self._spec_render_after_id = self.root.after(
+                self._spec_effective_interval_ms, self._spec_render
+            )
+
     def _spec_render(self):
         """Consumer (Tk thread): drain all pending frames, update viewport, render.
 
         Every frame queued since the last tick is drained (oldest first) and
         accepted into the viewport, then the waterfall is advanced by the number
-        of new rows in a single block blit. This catches up on bursts without
-        dropping fresh frames and without one PhotoImage paste per row.
+        of new rows in a single block blit. When frames arrive faster than the
+        waterfall may scroll (SPEC_WF_MAX_ROWS_PER_S), consecutive frames are
+        coalesced into one row with the active reducer; traces and the archive
+        still see every frame. Each phase is timed, and the next tick is
+        scheduled so rendering stays within SPEC_RENDER_CPU_BUDGET.
         """
+        t_start = time.perf_counter()
         self._spec_render_after_id = None
         force = self._spec_force_render
         self._spec_force_render = False
@@ -2101,36 +3747,74 @@ class MEPGui:
             entries = list(self._spec_pending)
             self._spec_pending.clear()
 
+        vmin, vmax = self._spec_color_range()
+        if vmin is not None:
+            self._spec_viewport.traces.set_persist_range(vmin, vmax)
+        now = time.monotonic()
+        elapsed = now - (self._spec_last_render_t or now) or self._spec_effective_interval_ms / 1000.0
+        self._spec_last_render_t = now
         new_count = 0
-        for entry in entries:
-            meta = {
-                "ts": entry.get("ts"),
-                "center_frequency": entry.get("center_frequency"),
-                "fmin": entry.get("fmin"),
-                "fmax": entry.get("fmax"),
-                "scan_time": entry.get("scan_time"),
-                "n": entry.get("n"),
-            }
-            if self._spec_viewport.accept_row(entry["row"], meta):
+        line_dirty = False
+        pano = self._spec_panorama
+        if pano is None:
+            groups = self._spec_coalesce(entries, math.ceil(elapsed * SPEC_WF_MAX_ROWS_PER_S))
+        else:
+            groups = [[e] for e in entries]  # pass rows are already rare
+        for group in groups:
+            entry = group[-1]
+            meta = self._spec_entry_meta(entry)
+            if pano is not None:
+                # Sweep steps feed the panorama; only completed passes reach the waterfall.
+                done = pano.add(entry["row"], meta, entry.get("rx_time"))
+                if pano.generation != self._spec_panorama_gen:
+                    # Grid extent grew: rows laid out on the old grid no longer line up.
+                    self._spec_panorama_gen = pano.generation
+                    self._spec_viewport.clear()
+                    new_count = 0
+                    force = True
+                line_dirty = True
+                if done is None:
+                    continue
+                entry = done
+                meta = self._spec_entry_meta(done)
+            if len(group) == 1:
+                accepted = self._spec_viewport.accept_row(entry["row"], meta)
+            else:
+                for e in group:
+                    self._spec_viewport.traces.update(e["row"], e)
+                accepted = self._spec_viewport.accept_row(self._spec_merge_rows(group), meta, update_traces=False)
+                self._spec_coalesced += len(group) - 1
+            if accepted:
                 self._spec_latest_entry = entry
                 new_count += 1
+                if self._spec_archive_enabled:
+                    if pano is not None:
+                        self._spec_archive_row(entry, meta)   # the completed pass
+                    else:
+                        for e in group:
+                            self._spec_archive_row(e, self._spec_entry_meta(e))
+        if new_count and self._spec_archive is not None:
+            self._spec_update_archive_state()
+        if pano is not None and line_dirty:
+            self._spec_latest_entry = pano.line_entry()
+        if entries:
+            self._spec_note_phase("insert", time.perf_counter() - t_start)
 
         latest = self._spec_latest_entry
-        if latest is not None and (new_count or force):
+        if latest is not None and (new_count or force or line_dirty):
             vmin, vmax = self._spec_color_range()
             if vmin is not None:
-                if new_count:
-                    self._spec_blit_new_rows(new_count, vmin, vmax)
-                elif force:
+                if force:
                     self._spec_repaint_all(vmin, vmax)
+                elif new_count:
+                    self._spec_blit_new_rows(new_count, vmin, vmax)
+                t_line = time.perf_counter()
                 self._spec_update_line(latest, vmin, vmax)
                 self._spec_update_wf_labels(latest)
+                self._spec_note_phase("line", time.perf_counter() - t_line)
                 self._spec_update_summary(latest)
 
-        if self._spec_is_active:
-            self._spec_render_after_id = self.root.after(
-                self._spec_render_interval_ms, self._spec_render
-            )
+        self._spec_schedule_next(time.perf_counter() - t_start)
 
     def _spec_color_range(self):
         """Return the active (vmin, vmax) from the sliders, or (None, None)."""
@@ -2172,11 +3856,10 @@ class MEPGui:
         self._spec_request_render()
 
     def _spec_ensure_line_items(self):
-        """Create the persistent FFT line + label items once."""
-        if self._spec_line_item is not None:
+        """Create the persistent FFT label items once (the trace itself is a raster)."""
+        if self._spec_line_labels:
             return
         c = self._spec_line_canvas
-        self._spec_line_item = c.create_line(0, 0, 0, 0, fill="#6ad7ff", width=1)
         self._spec_line_labels = {
             "title": c.create_text(6, 6, anchor="nw", fill="#cccccc", text="Live FFT"),
             "ylab": c.create_text(6, 0, anchor="w", fill="#aaaaaa", text="Power (dBFS)"),
@@ -2188,21 +3871,45 @@ class MEPGui:
         }
 
     def _spec_update_line(self, latest: dict, vmin: float, vmax: float):
-        """Update the FFT line + labels in place (resampled to the chosen bin count)."""
+        """Rasterize the FFT line, overlays and labels (decimated to the chosen bin count).
+
+        Everything is drawn with numpy into a persistent RGB buffer and pasted
+        once: the persistence image (or flat background), the selected trace,
+        the threshold line and finally the live trace. Each trace is reduced to
+        per-column min/max spans, so the cost follows the canvas width rather
+        than the bin count. In envelope mode the live trace keeps each
+        point's min..max band.
+        """
         c = self._spec_line_canvas
         self._spec_ensure_line_items()
         native = latest["row"]
-        vals = native if self._spec_bins is None else _spec_resample_1d(native, self._spec_bins)
         w = max(10, c.winfo_width())
         h = max(10, c.winfo_height())
-        n = len(vals)
-        xs = (np.arange(n) * (w - 1) / max(1, n - 1)).astype(int)
-        y_norm = np.clip((vals - vmin) / (vmax - vmin), 0.0, 1.0)
-        ys = ((1.0 - y_norm) * (h - 1)).astype(int)
-        pts = np.empty(n * 2, dtype=int)
-        pts[0::2] = xs
-        pts[1::2] = ys
-        c.coords(self._spec_line_item, *pts.tolist())
+        raster = self._spec_line_raster
+        if raster is None or (raster.width, raster.height) != (w, h):
+            if raster is not None:
+                raster.destroy()
+            raster = LineRaster(c, w, h)
+            self._spec_line_raster = raster
+
+        raster.clear(self._spec_persist_rgb(w, h))
+        trace = self._spec_viewport.traces.trace(self._spec_trace_mode)
+        if trace is not None:
+            if self._spec_bins is not None:
+                reducer = {"max hold": "max", "min hold": "min"}.get(self._spec_trace_mode, "mean")
+                trace = _spec_reduce_rows(trace, self._spec_bins, reducer)
+            raster.spans(*_spec_column_spans(trace, trace, w, h, vmin, vmax), (0xff, 0xb3, 0x47))
+        thr = self._spec_threshold_db()
+        if thr is not None and vmin <= thr <= vmax:
+            raster.hline(int(round((vmax - thr) * (h - 1) / (vmax - vmin))), (0xe0, 0x50, 0x50))
+        if self._spec_bins is not None and self._spec_reduce == "envelope" and len(native) > self._spec_bins:
+            lo, hi = _spec_envelope_rows(native, self._spec_bins)
+        else:
+            lo = native if self._spec_bins is None else _spec_reduce_rows(native, self._spec_bins, self._spec_reduce)
+            hi = lo
+        raster.spans(*_spec_column_spans(lo, hi, w, h, vmin, vmax), (0x6a, 0xd7, 0xff))
+        raster.paste()
+
         f0, f1, is_hz = self._spec_freq_axis(latest, len(native))
         lbl = self._spec_line_labels
         c.coords(lbl["ylab"], 6, h // 2)
@@ -2215,6 +3922,31 @@ class MEPGui:
         c.itemconfig(lbl["f1"], text=self._spec_fmt_axis(f1, is_hz))
         c.coords(lbl["fmid"], w // 2, h - 4)
 
+    def _spec_threshold_db(self):
+        """Threshold overlay level from the Thr entry, or None when blank/invalid."""
+        var = self._vars.get("spec_threshold")
+        if var is None:
+            return None
+        try:
+            return float(var.get())
+        except (ValueError, tk.TclError):
+            return None
+
+    def _spec_persist_rgb(self, w: int, h: int):
+        """Persistence density as a (h, w, 3) colour-mapped background, or None."""
+        if self._spec_trace_mode != "persist":
+            return None
+        density = self._spec_viewport.traces.persist
+        if density is None:
+            return None
+        # Columns: max-reduce bins to pixels; rows: nearest level per pixel row.
+        cols = _spec_reduce_rows(density, w, "max")
+        rows = cols[(np.arange(h) * density.shape[0]) // h]
+        peak = float(rows.max())
+        if peak > 0:
+            rows *= 255.0 / peak
+        return self._spec_color_lut[rows.astype(np.uint8)]
+
     def _spec_ensure_wf_items(self):
         """Create the persistent waterfall overlay label items once."""
         if self._spec_wf_labels:
@@ -2238,15 +3970,31 @@ class MEPGui:
         w = max(10, c.winfo_width())
         h = max(10, c.winfo_height())
         n = len(latest["row"])
-        f0, f1, is_hz = self._spec_freq_axis(latest, n)
         lbl = self._spec_wf_labels
         c.coords(lbl["now"], w // 2, 6)
+        hist = self._spec_hist
+        if hist is not None:
+            # History view: axis from the archived rows, narrowed to the zoomed band.
+            meta = self._spec_hist_meta or {}
+            meta = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in meta.items()}
+            a0, a1, is_hz = self._spec_freq_axis(meta, self._spec_archive.n_bins)
+            f0 = a0 + (a1 - a0) * hist["f0"]
+            f1 = a0 + (a1 - a0) * hist["f1"]
+            t1 = datetime.datetime.fromtimestamp(hist["t1"]).strftime("%H:%M:%S")
+            c.itemconfig(lbl["title"], text="History")
+            c.itemconfig(lbl["now"], text=t1)
+            c.coords(lbl["span"], w // 2, h - 4)
+            c.itemconfig(lbl["span"], text=f"-{hist['span']:.1f} s", state="normal")
+        else:
+            f0, f1, is_hz = self._spec_freq_axis(latest, n)
+            c.itemconfig(lbl["title"], text="Waterfall")
+            c.itemconfig(lbl["now"], text="now")
         scan_t = latest.get("scan_time")
-        if isinstance(scan_t, (int, float)) and scan_t > 0:
+        if hist is None and isinstance(scan_t, (int, float)) and scan_t > 0:
             span = scan_t * max(1, self._spec_viewport.valid_rows)
             c.coords(lbl["span"], w // 2, h - 4)
             c.itemconfig(lbl["span"], text=f"-{span:.1f} s", state="normal")
-        else:
+        elif hist is None:
             c.itemconfig(lbl["span"], state="hidden")
         c.coords(lbl["tlab"], w // 2, h - 20)
         c.coords(lbl["f0"], 6, h - 18)
@@ -2261,9 +4009,22 @@ class MEPGui:
             line_mode = "native" if self._spec_bins is None else str(self._spec_bins)
             self._vars["spec_summary"].set(
                 f"ts={latest.get('ts', '?')}   cf={latest.get('center_frequency', '?')} Hz   "
-                f"sr={latest.get('sample_rate', '?')} Hz   line={line_mode} (src {latest.get('n', '?')})"
+                f"sr={latest.get('sample_rate', '?')} Hz   line={line_mode} (src {latest.get('n', '?')}, "
+                f"{self._spec_reduce})   {self._spec_render_stats_text()}"
             )
 
+    def _spec_render_stats_text(self) -> str:
+        with self._spec_lock:
+            dropped = self._spec_dropped
+        phases = " ".join(
+            f"{name} {self._spec_phase_ms[name]:.1f}"
+            for name in ("insert", "colormap", "paste", "line") if name in self._spec_phase_ms
+        )
+        return (
+            f"dropped={dropped} coalesced={self._spec_coalesced}   "
+            f"render {self._spec_render_cost_ms:.1f} ms/{self._spec_effective_interval_ms} ms ({phases})"
+        )
+
     def _mqtt_publish_manual(self):
         """Publish an arbitrary MQTT message from the manual publish panel."""
         topic = self._vars["mqtt_pub_topic"].get().strip()
@@ -2280,12 +4041,16 @@ class MEPGui:
     def _mqtt_stream_pause(self):
         """Pause the MQTT stream log."""
         self._mqtt_paused = True
+        self._mqtt_view_follow = False
         self._vars["mqtt_stream_state"].set("paused")
 
     def _mqtt_stream_resume(self):
         """Resume the MQTT stream log."""
         self._mqtt_paused = False
+        self._mqtt_view_follow = True
         self._vars["mqtt_stream_state"].set("live")
+        if hasattr(self, "_mqtt_text"):
+            self._mqtt_render_view()
 
     def _mqtt_format_entry(self, ts: str, topic: str, payload: bytes) -> str:
         try:
@@ -2306,55 +4071,61 @@ class MEPGui:
 
     def _mqtt_capture_message(self, topic: str, payload: bytes):
         ts = datetime.datetime.now().strftime("%H:%M:%S")
+        visible = self._mqtt_filter.allows(topic)
         with self._mqtt_lock:
-            self._mqtt_messages.append((ts, topic, payload))
+            self._mqtt_messages.append((ts, topic, payload), visible)
 
     def _mqtt_apply_retention_settings(self):
         try:
             buffer_max = int(self._vars["mqtt_buffer_max_messages"].get())
-            widget_max = int(self._vars["mqtt_widget_max_lines"].get())
         except (KeyError, tk.TclError, ValueError):
             logging.error("MQTT: retention settings must be integers")
             return
 
-        if buffer_max < 100 or widget_max < 100:
+        if buffer_max < 100:
             logging.error("MQTT: retention settings must be at least 100")
             return
 
         with self._mqtt_lock:
-            entries = list(self._mqtt_messages)
             self._mqtt_buffer_max_messages = buffer_max
-            self._mqtt_messages = deque(entries[-buffer_max:], maxlen=buffer_max)
-
-        self._mqtt_widget_max_lines = widget_max
-        self._mqtt_rendered_count = 0
-        if hasattr(self, "_mqtt_text"):
-            self._mqtt_render_from_buffer()
-
-        logging.info(
-            "MQTT: retention updated (buffer=%s messages, widget=%s lines)",
-            buffer_max,
-            widget_max,
-        )
-
-    def _mqtt_topic_is_suppressed(self, topic: str) -> bool:
-        topic = (topic or "").strip().lower()
-        parts = [p for p in topic.split("/") if p]
-
-        if bool(self._vars.get("mqtt_suppress_announce", tk.BooleanVar(value=False)).get()):
-            if "announce" in parts:
-                return True
-
-        if bool(self._vars.get("mqtt_suppress_data", tk.BooleanVar(value=False)).get()):
-            if "data" in parts:
-                return True
+            self._mqtt_messages.resize(buffer_max, self._mqtt_filter.allows)
+        self._mqtt_render_view()
+
+        logging.info("MQTT: retention updated (buffer=%s messages)", buffer_max)
+
+    def _mqtt_compile_filter(self):
+        """Compile the Suppress checkboxes and Include/Exclude terms once."""
+        words = tuple(word for word, key in (
+            ("announce", "mqtt_suppress_announce"),
+            ("data", "mqtt_suppress_data"),
+            ("status", "mqtt_suppress_status"),
+        ) if bool(self._vars[key].get()))
+        try:
+            compiled = MqttTopicFilter(
+                include=MqttTopicFilter.split_terms(self._vars["mqtt_filter_include"].get()),
+                exclude=MqttTopicFilter.split_terms(self._vars["mqtt_filter_exclude"].get()),
+                suppress_words=words,
+            )
+        except ValueError as e:
+            logging.error("MQTT: %s", e)
+            return
+        # Single reference swap; the MQTT thread picks it up on its next message.
+        self._mqtt_filter = compiled
+        self._mqtt_render_from_buffer()
 
-        if bool(self._vars.get("mqtt_suppress_status", tk.BooleanVar(value=False)).get()):
-            if "status" in parts:
-                return True
-        return False
+    @staticmethod
+    def _mqtt_format_row(ts: str, topic: str, payload: bytes) -> str:
+        """One-line summary; decodes only the preview slice of the payload."""
+        head = payload[:MQTT_LOG_PREVIEW_CHARS]
+        preview = " ".join(head.decode("utf-8", errors="replace").split())
+        if len(payload) > MQTT_LOG_PREVIEW_CHARS:
+            preview += f" … ({len(payload)} B)"
+        elif not preview:
+            preview = "<empty>"
+        return f"{ts}  {topic}  {preview}"
 
     def _mqtt_flush_buffer_to_widget(self):
+        """Schedule one coalesced view redraw for newly captured messages."""
         if not hasattr(self, "_mqtt_text"):
             return
         if not self._is_adv_tab_selected("MQTT"):
@@ -2362,50 +4133,175 @@ class MEPGui:
         # Do not log if stream is paused
         if self._mqtt_paused:
             return
+        if self._mqtt_render_after_id is None:
+            self._mqtt_render_after_id = self.root.after(
+                MQTT_LOG_RENDER_INTERVAL_MS, self._mqtt_render_view)
 
-        with self._mqtt_lock:
-            entries = list(self._mqtt_messages)
-            start = min(self._mqtt_rendered_count, len(entries))
-            tail = entries[start:]
-
-        if not tail:
+    def _mqtt_render_view(self):
+        """Draw only the index rows that fit in the list widget."""
+        if self._mqtt_render_after_id is not None:
+            try:
+                self.root.after_cancel(self._mqtt_render_after_id)
+            except Exception:
+                pass
+            self._mqtt_render_after_id = None
+        if not hasattr(self, "_mqtt_text"):
             return
 
-        lines = []
-        for ts, topic, payload in tail:
-            if self._mqtt_topic_is_suppressed(topic):
-                continue
-            lines.append(self._mqtt_format_entry(ts, topic, payload))
-
-        if lines:
-            self._mqtt_text.insert("end", "".join(lines))
-            self._mqtt_text.see("end")
-
-        self._mqtt_rendered_count = len(entries)
-        self._mqtt_trim_widget_lines()
+        rows = self._mqtt_view_rows
+        with self._mqtt_lock:
+            index = self._mqtt_messages
+            n = len(index)
+            last_top = max(0, n - rows)
+            if self._mqtt_view_follow or self._mqtt_view_top_seq is None:
+                top = last_top
+            else:
+                top = min(index.row_of(self._mqtt_view_top_seq), last_top)
+            seqs = index.seqs(top, top + rows).tolist()
+            entries = [index.get(seq) for seq in seqs]
+
+        self._mqtt_view_top = top
+        self._mqtt_view_top_seq = seqs[0] if seqs else None
+        self._mqtt_view_seqs = seqs
+
+        text = self._mqtt_text
+        text.delete("1.0", "end")
+        text.insert("1.0", "\n".join(self._mqtt_format_row(*e) for e in entries))
+        if self._mqtt_selected_seq in seqs:
+            line = seqs.index(self._mqtt_selected_seq) + 1
+            text.tag_add("mqtt_sel", f"{line}.0", f"{line}.0 lineend+1c")
+
+        if n:
+            self._mqtt_scroll.set(top / n, min(1.0, (top + rows) / n))
+        else:
+            self._mqtt_scroll.set(0.0, 1.0)
 
-    def _mqtt_trim_widget_lines(self, max_lines: int = None):
-        if not hasattr(self, "_mqtt_text"):
+    def _mqtt_view_set_top(self, top: int):
+        with self._mqtt_lock:
+            n = len(self._mqtt_messages)
+            top = min(max(0, int(top)), max(0, n - self._mqtt_view_rows))
+            seqs = self._mqtt_messages.seqs(top, top + 1)
+            self._mqtt_view_top_seq = int(seqs[0]) if len(seqs) else None
+        # Scrolling back to the bottom re-attaches the view to the live tail
+        self._mqtt_view_follow = (not self._mqtt_paused
+                                  and top >= n - self._mqtt_view_rows)
+        self._mqtt_render_view()
+
+    def _mqtt_view_scroll(self, delta: int):
+        self._mqtt_view_set_top(self._mqtt_view_top + delta)
+        return "break"
+
+    def _mqtt_view_yview(self, *args):
+        """Scrollbar command: map moveto/scroll onto index rows."""
+        if not args:
             return
-        if max_lines is None:
-            max_lines = self._mqtt_widget_max_lines
-        lines = int(self._mqtt_text.index("end-1c").split(".")[0])
-        if lines > max_lines:
-            self._mqtt_text.delete("1.0", f"{lines - max_lines}.0")
+        if args[0] == "moveto":
+            with self._mqtt_lock:
+                n = len(self._mqtt_messages)
+            self._mqtt_view_set_top(int(float(args[1]) * n))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            step = self._mqtt_view_rows if args[2] == "pages" else 1
+            self._mqtt_view_scroll(count * step)
+
+    def _mqtt_view_key(self, e):
+        if e.state & 0x4 and e.keysym in ("c", "C", "a", "A"):
+            return None
+        steps = {"Up": -1, "Down": 1,
+                 "Prior": -self._mqtt_view_rows, "Next": self._mqtt_view_rows}
+        if e.keysym in steps:
+            return self._mqtt_view_scroll(steps[e.keysym])
+        if e.keysym == "Home":
+            self._mqtt_view_set_top(0)
+        elif e.keysym == "End":
+            self._mqtt_view_set_top(len(self._mqtt_messages))
+        return "break"
+
+    def _mqtt_view_click(self, e):
+        self._mqtt_text.focus_set()
+        line = int(self._mqtt_text.index(f"@{e.x},{e.y}").split(".")[0]) - 1
+        if 0 <= line < len(self._mqtt_view_seqs):
+            self._mqtt_selected_seq = self._mqtt_view_seqs[line]
+            self._mqtt_show_detail(self._mqtt_selected_seq)
+            self._mqtt_render_view()
+        return "break"
+
+    def _mqtt_view_configure(self, e):
+        linespace = tkfont.Font(font=self._mqtt_text.cget("font")).metrics("linespace")
+        rows = max(1, int(e.height) // max(1, linespace))
+        if rows != self._mqtt_view_rows:
+            self._mqtt_view_rows = rows
+            self._mqtt_render_view()
+
+    def _mqtt_show_detail(self, seq: int):
+        """Pretty-print a single message into the detail pane."""
+        with self._mqtt_lock:
+            entry = self._mqtt_messages.get(seq)
+        body = self._mqtt_format_entry(*entry) if entry else "<message no longer buffered>\n"
+        self._mqtt_detail_text.delete("1.0", "end")
+        self._mqtt_detail_text.insert("1.0", body)
 
     def _mqtt_render_from_buffer(self):
+        """Rebuild the visible-row index (filters changed) and redraw."""
         if not hasattr(self, "_mqtt_text"):
             return
-        self._mqtt_text.delete("1.0", "end")
-        self._mqtt_rendered_count = 0
-        self._mqtt_flush_buffer_to_widget()
+        with self._mqtt_lock:
+            self._mqtt_messages.rebuild(self._mqtt_filter.allows)
+        self._mqtt_render_view()
 
     def _mqtt_clear_buffer_and_widget(self):
         with self._mqtt_lock:
             self._mqtt_messages.clear()
-        self._mqtt_rendered_count = 0
+        self._mqtt_selected_seq = None
+        self._mqtt_view_top_seq = None
+        self._mqtt_view_follow = not self._mqtt_paused
         if hasattr(self, "_mqtt_text"):
-            self._mqtt_text.delete("1.0", "end")
+            self._mqtt_detail_text.delete("1.0", "end")
+            self._mqtt_render_view()
+
+    def _mqtt_store_search(self):
+        """Query the on-disk store off the Tk thread; newest matches first."""
+        if self._mqtt_search_busy:
+            return
+        topic = self._vars["mqtt_search_topic"].get().strip()
+        text = self._vars["mqtt_search_text"].get()
+        since = self._vars["mqtt_search_since"].get().strip()
+        use_regex = bool(self._vars["mqtt_search_regex"].get())
+        try:
+            t0 = mqtt_store_parse_time(since) if since else None
+        except ValueError:
+            logging.error("MQTT search: bad Since value %r (epoch, -15m / -2h, or ISO 8601)", since)
+            return
+        topics = topic.split() or None
+        self._mqtt_search_busy = True
+        self._vars["mqtt_search_state"].set("searching…")
+
+        def _worker():
+            try:
+                hits = list(MqttStoreReader(MQTT_STORE_DIR).query(
+                    topics, t0=t0,
+                    contains=None if use_regex or not text else text,
+                    regex=text if use_regex and text else None,
+                    limit=MQTT_STORE_SEARCH_LIMIT, newest_first=True))
+                err = None
+            except Exception as e:
+                hits, err = [], e
+            self._gui_call(self._mqtt_store_search_done, hits, err)
+
+        threading.Thread(target=_worker, name="mqtt-search", daemon=True).start()
+
+    def _mqtt_store_search_done(self, hits: list, err):
+        self._mqtt_search_busy = False
+        if err is not None:
+            self._vars["mqtt_search_state"].set(f"search failed: {err}")
+            return
+        more = "+" if len(hits) >= MQTT_STORE_SEARCH_LIMIT else ""
+        self._vars["mqtt_search_state"].set(f"{len(hits)}{more} match(es), newest first")
+        self._mqtt_selected_seq = None
+        self._mqtt_detail_text.delete("1.0", "end")
+        self._mqtt_detail_text.insert(
+            "1.0", "\n".join(mqtt_store_format_message(t, tp, p) for t, tp, p in hits))
+        self._mqtt_render_view()
 
     def _mqtt_log_message(self, topic: str, payload: bytes):
         """Compatibility shim for legacy call sites; routes through buffered model."""
@@ -4836,6 +6732,26 @@ class MEPGui:
 
         threading.Thread(target=_worker, daemon=True, name="docker_refresh").start()
 
+    def _docker_apply_service_state(self, service: str, info: dict, action: str):
+        if action == "die":
+            level = logging.INFO if info.get("exit_code") in ("0", 0) else logging.WARNING
+            logging.log(level, "DOCKER: %s exited (code %s)", service, info.get("exit_code"))
+        elif action == "oom":
+            logging.warning("DOCKER: %s was OOM-killed", service)
+        elif action in ("start", "restart", "destroy"):
+            logging.info("DOCKER: %s %s", service, action)
+        if "docker_services_summary" in self._vars and self.docker.service_names:
+            running = sum(
+                1 for svc in self.docker.service_names
+                if self.docker.services.get(svc, {}).get("state", "").lower() == "running"
+            )
+            self._vars["docker_services_summary"].set(f"{running}/{len(self.docker.service_names)}")
+        if service not in self.docker.services and action in ("create", "start"):
+            # New container: pick up its full row with one refresh.
+            self._docker_refresh_status_async()
+            return
+        self._docker_render_service_list()
+
     def _docker_render_service_list(self):
         tree = getattr(self, "_docker_services_tree", None)
         if tree is None:
@@ -5095,54 +7011,53 @@ class MEPGui:
         if self.docker.log_paused:
             return
 
-        tail = self.docker.get_new_log_entries()
-        if not tail:
-            return
-
-        for ts, line in tail:
-            clean = re.sub(r"\x1b\[[0-9;]*[A-Za-z]", "", line)
-            self._docker_log_text.insert("end", f"{ts}  ", ("docker_ts",))
-            if " | " in clean:
-                svc, msg = clean.split(" | ", 1)
-                svc = svc.strip()
-                if svc:
-                    self._docker_log_text.insert("end", f"{svc} | ", ("docker_svc",))
-                self._docker_insert_pretty_log_message(msg)
-            else:
-                self._docker_insert_pretty_log_message(clean)
-            self._docker_log_text.insert("end", "\n")
+        tail = self.docker.get_new_log_entries(min_level=self._docker_log_min_level())
+        if tail:
+            self._docker_log_sink.write([self._docker_log_line_segments(e) for e in tail])
 
-        self._docker_log_text.see("end")
-        self._docker_trim_widget_lines()
+    def _docker_log_min_level(self):
+        level = self._vars.get("docker_log_level")
+        level = level.get() if level is not None else "ALL"
+        return None if level == "ALL" else level
 
-    def _docker_insert_pretty_log_message(self, msg: str):
+    def _docker_refilter_log(self):
+        """Redraw the buffered lines under the current Level filter (no re-parse)."""
+        if not hasattr(self, "_docker_log_sink"):
+            return
+        entries = self.docker.reread_log(min_level=self._docker_log_min_level(),
+                                         limit=DOCKER_LOG_WIDGET_MAX_LINES)
+        self._docker_log_sink.clear()
+        if entries:
+            self._docker_log_sink.write([self._docker_log_line_segments(e) for e in entries])
+
+    def _docker_log_line_segments(self, entry: tuple) -> list:
+        _seq, t, svc, level, body = entry
+        segments = [(datetime.datetime.fromtimestamp(t).strftime("%H:%M:%S") + "  ", "docker_ts")]
+        if svc:
+            segments.append((f"{svc} | ", "docker_svc"))
+        return segments + self._docker_pretty_log_segments(body, level)
+
+    @staticmethod
+    def _docker_pretty_log_segments(msg: str, level: str = "") -> list:
+        """(text, tag) segments for one log message body; level as parsed on ingest."""
         text = (msg or "").rstrip()
 
         # Pretty-print JSON payloads when possible.
         if text.startswith("{") or text.startswith("["):
             try:
                 parsed = json.loads(text)
-                pretty = json.dumps(parsed, indent=2, sort_keys=True)
-                self._docker_log_text.insert("end", pretty, ("docker_json",))
-                return
+                return [(json.dumps(parsed, indent=2, sort_keys=True), "docker_json")]
             except Exception:
                 pass
 
-        m = re.match(r"^((?:\d{4}-\d{2}-\d{2}[ T])?\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)\s+(TRACE|DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL)\s+(.*)$", text, re.IGNORECASE)
-        if m:
-            inner_ts, level, rest = m.groups()
-            self._docker_log_text.insert("end", f"{inner_ts} ", ("docker_ts",))
-            lvl = level.upper()
-            lvl_tag = "docker_lvl"
-            if lvl in ("ERROR", "CRITICAL"):
-                lvl_tag = "docker_err"
-            elif lvl in ("WARN", "WARNING"):
-                lvl_tag = "docker_warn"
-            elif lvl == "INFO":
-                lvl_tag = "docker_info"
-            self._docker_log_text.insert("end", f"{lvl:<8}", (lvl_tag,))
-            self._docker_log_text.insert("end", rest, ("docker_msg",))
-            return
+        if level:
+            if level in ("ERROR", "CRITICAL"):
+                return [(text, "docker_err")]
+            if level == "WARNING":
+                return [(text, "docker_warn")]
+            if level == "INFO":
+                return [(text, "docker_info")]
+            return [(text, "docker_lvl")]
 
         upper = text.upper()
         tag = "docker_msg"
@@ -5152,24 +7067,81 @@ class MEPGui:
             tag = "docker_warn"
         elif "INFO" in upper:
             tag = "docker_info"
-        self._docker_log_text.insert("end", text, (tag,))
-
-    def _docker_trim_widget_lines(self, max_lines: int = 800):
-        if not hasattr(self, "_docker_log_text"):
-            return
-        lines = int(self._docker_log_text.index("end-1c").split(".")[0])
-        if lines > max_lines:
-            self._docker_log_text.delete("1.0", f"{lines - max_lines}.0")
+        return [(text, tag)]
 
     def _docker_clear_buffer_and_widget(self):
         self.docker.clear_log()
-        if hasattr(self, "_docker_log_text"):
-            self._docker_log_text.delete("1.0", "end")
+        if hasattr(self, "_docker_log_sink"):
+            self._docker_log_sink.clear()
+
+    def _docker_stats_toggle(self):
+        if self._vars["docker_stats_enabled"].get():
+            self.docker.stats.start()
+        else:
+            self.docker.stats.stop()
+
+    def _docker_stats_render(self):
+        """Refresh the Resources table from the sampler's newest rows (1 Hz housekeeping)."""
+        tree = getattr(self, "_docker_stats_tree", None)
+        if tree is None:
+            return
+        latest = self.docker.stats.latest()
+
+        def _num(value, scale=1.0, fmt="{:.1f}"):
+            return fmt.format(value / scale) if math.isfinite(value) else "—"
+
+        for service in sorted(latest):
+            row = latest[service]
+            values = (
+                _num(row["cpu_pct"]),
+                _num(row["mem_bytes"], 2**20),
+                _num(row["net_rx_Bps"], 1e3),
+                _num(row["net_tx_Bps"], 1e3),
+                _num(row["blk_read_Bps"], 1e3),
+                _num(row["blk_write_Bps"], 1e3),
+                row["source"],
+            )
+            if tree.exists(service):
+                tree.item(service, values=values)
+            else:
+                tree.insert("", "end", iid=service, text=service, values=values)
+        for iid in tree.get_children():
+            if iid not in latest:
+                tree.delete(iid)
+        steps = self.docker.stats.steps()
+        text = f"{len(steps)} sweep steps"
+        if steps and steps[-1]["t1"] is None:
+            text += f" (step {steps[-1]['index']} @ {steps[-1]['f_hz'] / 1e6:.3f} MHz, {steps[-1]['preset']})"
+        self._vars["docker_stats_steps"].set(text)
+
+    def _docker_stats_export(self, mode: str):
+        """Save per-step summaries or raw samples to a CSV chosen by the user."""
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title=f"Export container {mode}",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("All files", "*")],
+            initialfile=f"docker_{mode}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        )
+        if not path:
+            return
+        try:
+            n = self.docker.stats.export_csv(path, mode)
+        except Exception as e:
+            logging.error(f"DOCKER: stats export failed: {e}")
+            return
+        logging.info(f"DOCKER: exported {n} {mode} rows to {path}")
+
+    def _docker_stats_clear(self):
+        self.docker.stats.clear()
+        for iid in self._docker_stats_tree.get_children():
+            self._docker_stats_tree.delete(iid)
+        self._vars["docker_stats_steps"].set("0 sweep steps")
 
     def _build_docker_tab(self, frame: ttk.Frame):
         """DOC tab: compose service status, logs, and service controls."""
         frame.columnconfigure(0, weight=1)
-        frame.rowconfigure(2, weight=1)
+        frame.rowconfigure(3, weight=1)
 
         def _ro_row(parent, row, col, label, key):
             sv = self._vars.get(key)
@@ -5312,8 +7284,56 @@ class MEPGui:
         self._docker_bind_hover_preview(b_up, "up")
         self._docker_bind_hover_preview(b_down, "down")
 
+        res_f = ttk.LabelFrame(frame, text="Resources")
+        res_f.grid(row=2, column=0, padx=4, pady=(2, 2), sticky="ew")
+        res_f.columnconfigure(0, weight=1)
+
+        self._docker_stats_tree = ttk.Treeview(
+            res_f,
+            columns=("cpu", "mem", "net_rx", "net_tx", "blk_read", "blk_write", "source"),
+            show="tree headings",
+            selectmode="none",
+            height=4,
+        )
+        self._docker_stats_tree.heading("#0", text="Service")
+        self._docker_stats_tree.column("#0", width=140, minwidth=100, anchor="w")
+        for col, text, width in (
+            ("cpu", "CPU %", 70), ("mem", "Mem MiB", 80),
+            ("net_rx", "Net RX kB/s", 95), ("net_tx", "Net TX kB/s", 95),
+            ("blk_read", "Blk R kB/s", 90), ("blk_write", "Blk W kB/s", 90),
+            ("source", "Source", 70),
+        ):
+            self._docker_stats_tree.heading(col, text=text)
+            self._docker_stats_tree.column(col, width=width, minwidth=60, anchor="e" if col != "source" else "w")
+        self._docker_stats_tree.grid(row=0, column=0, sticky="ew", padx=4, pady=(4, 2))
+
+        res_ctl = ttk.Frame(res_f)
+        res_ctl.grid(row=1, column=0, sticky="ew", padx=4, pady=(0, 4))
+        res_ctl.columnconfigure(1, weight=1)
+        self._vars["docker_stats_enabled"] = tk.BooleanVar(value=self.docker.stats.running)
+        ttk.Checkbutton(
+            res_ctl, text="Sample", variable=self._vars["docker_stats_enabled"],
+            command=self._docker_stats_toggle,
+        ).grid(row=0, column=0, sticky="w", padx=(0, 8))
+        self._vars["docker_stats_steps"] = tk.StringVar(value="0 sweep steps")
+        ttk.Label(
+            res_ctl,
+            textvariable=self._vars["docker_stats_steps"],
+            foreground="grey",
+            font=("TkFixedFont", 8),
+        ).grid(row=0, column=1, sticky="w")
+        ttk.Button(res_ctl, text="Export Steps CSV", command=lambda: self._docker_stats_export("steps")).grid(
+            row=0, column=2, sticky="ew", padx=(0, 4)
+        )
+        ttk.Button(res_ctl, text="Export Samples CSV", command=lambda: self._docker_stats_export("samples")).grid(
+            row=0, column=3, sticky="ew", padx=(0, 4)
+        )
+        ttk.Button(res_ctl, text="Clear", command=self._docker_stats_clear).grid(
+            row=0, column=4, sticky="ew"
+        )
+
         log_f = ttk.LabelFrame(frame, text="Logs")
-        log_f.grid(row=2, column=0, padx=4, pady=(2, 2), sticky="nsew")
+        log_f.grid(row=3, column=0, padx=4, pady=(2, 2), sticky="nsew")
         log_f.columnconfigure(0, weight=1)
         log_f.rowconfigure(1, weight=1)
 
@@ -5340,6 +7360,14 @@ class MEPGui:
             variable=self._vars["docker_log_mode"],
             command=self._docker_on_log_mode_changed,
         ).grid(row=0, column=2, sticky="w")
+        self._vars["docker_log_level"] = tk.StringVar(value="ALL")
+        ttk.Label(mode_f, text="Level:").grid(row=0, column=3, sticky="w", padx=(8, 4))
+        level_combo = ttk.Combobox(
+            mode_f, textvariable=self._vars["docker_log_level"], width=9, state="readonly",
+            values=("ALL", "DEBUG", "INFO", "WARNING", "ERROR"),
+        )
+        level_combo.grid(row=0, column=4, sticky="w")
+        level_combo.bind("<<ComboboxSelected>>", lambda _e: self._docker_refilter_log())
 
         self._vars["docker_stream_state"] = tk.StringVar(value="paused")
         ttk.Label(
@@ -5380,11 +7408,12 @@ class MEPGui:
             lambda e: None if (e.state & 0x4 and e.keysym in ("c", "C", "a", "A")) else "break",
         )
         self._bind_copy_menu(self._docker_log_text)
+        self._docker_log_sink = _LogSink(self._docker_log_text, DOCKER_LOG_WIDGET_MAX_LINES)
 
         self._add_copyable_note(
             frame,
             "Source: docker compose project at /opt/radiohound/docker",
-            row=3,
+            row=4,
             wraplength=420,
         )
         self.root.after(100, self._docker_refresh_status_async)
@@ -6345,6 +8374,8 @@ class MEPGui:
 
     def _poll_housekeeping(self):
         self._jetson_health_poll()
+        self._refresh_link_status_cell()
+        self._docker_stats_render()
         self.root.after(1000, self._poll_housekeeping)
 
 
@@ -6380,6 +8411,8 @@ def main():
         try:
             app._spec_is_active = False
             app._spec_stop_render_loop()
+            if app._spec_archive is not None:
+                app._spec_archive.close()
         except Exception as e:
             logging.debug(f"Exception stopping SPEC during cleanup: {e}")
         try:
@@ -6387,6 +8420,16 @@ def main():
                 app.bus.disconnect()
         except Exception as e:
             logging.debug(f"Exception during cleanup: {e}")
+        try:
+            app.docker.events_stop()
+            app.docker.stats.stop()
+        except Exception as e:
+            logging.debug(f"Exception stopping docker events during cleanup: {e}")
+        try:
+            if getattr(app, "_mqtt_store", None) is not None:
+                app._mqtt_store.close()
+        except Exception as e:
+            logging.debug(f"Exception closing MQTT store during cleanup: {e}")
         try:
             if getattr(app, "_gps_monitor", None) is not None:
                 app._gps_monitor.stop()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+mep_link_monitor.py
+
+Passive RFSoC -> Jetson UDP link monitor.
+
+Watches the recorder channel ports and checks MEP packet sample_idx continuity
+against pkt_samples, so dropped packets show up while a capture is running
+instead of as gaps in DigitalRF get_continuous_blocks() afterwards. Every
+interval it publishes loss rate, burst-length histogram and inter-packet
+jitter per channel on LINK_MONITOR_STATUS_TOPIC (shown in the GUI status grid).
+
+Sources:
+  raw  - AF_PACKET sniff (needs CAP_NET_RAW). The recorder keeps receiving;
+         only the first SNAP_BYTES of each frame are copied to this process.
+  udp  - bind the channel ports directly (or --port-offset for a mirrored
+         copy), for when the recorder is stopped or forwards packets.
+
+Per packet:
+  in order      - sample_idx == previous sample_idx + pkt_samples
+  lost          - forward jump; the missing packets count as one burst
+  out-of-order  - late packet that fills a remembered hole (undoes a loss)
+  duplicate     - sample_idx already seen
+  late          - older packet no longer tracked as a hole or seen; ignored
+  resync        - jump beyond --resync-s (stream restart), not counted as loss
+
+Usage:
+    sudo python3 scripts/mep_link_monitor.py --iface eth1 --channels A,B
+    python3 scripts/mep_link_monitor.py --source udp --channels A --no-mqtt
+"""
+
+import argparse
+import json
+import logging
+import os
+import selectors
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    MEPBus,
+    MQTT_BROKER,
+    MQTT_PORT,
+    LINK_MONITOR_STATUS_TOPIC,
+    RECORDER_CHANNEL_PORTS,
+    MEP_PACKET_HEADER_BYTES,
+    MEP_PACKET_HEADER_STRUCT,
+)
+
+ETH_HEADER_BYTES = 14
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+IPPROTO_UDP = 17
+UDP_HEADER_BYTES = 8
+# Link + IP + UDP + MEP header all fit; the kernel truncates the IQ payload.
+SNAP_BYTES = 256
+SOCKET_RCVBUF_BYTES = 32 * 1024 * 1024
+
+# Burst-length histogram bucket upper bounds (packets); last bucket is open.
+BURST_BUCKETS = (1, 2, 4, 8, 16, 64, 256)
+# Missing packet starts remembered so late arrivals count as reordered.
+HOLE_TRACK_MAX = 4096
+# Recently seen packet starts remembered for duplicate detection.
+SEEN_TRACK_MAX = 1024
+# RFC 3550 interarrival jitter gain.
+JITTER_GAIN = 1.0 / 16.0
+
+DEFAULT_INTERVAL_S = 1.0
+DEFAULT_RESYNC_S = 1.0
+DEFAULT_WARN_LOSS = 1e-5
+DEFAULT_FAIL_LOSS = 1e-3
+
+_U16_BE = struct.Struct("!H")
+
+
+def _burst_labels() -> list[str]:
+    labels = []
+    lo = 1
+    for hi in BURST_BUCKETS:
+        labels.append(str(hi) if hi == lo else f"{lo}-{hi}")
+        lo = hi + 1
+    labels.append(f">{BURST_BUCKETS[-1]}")
+    return labels
+
+
+BURST_LABELS = _burst_labels()
+
+
+def _burst_bucket(n_packets: int) -> int:
+    for i, hi in enumerate(BURST_BUCKETS):
+        if n_packets <= hi:
+            return i
+    return len(BURST_BUCKETS)
+
+
+def _zero_counts() -> dict:
+    return {
+        "received": 0,
+        "lost": 0,
+        "out_of_order": 0,
+        "duplicate": 0,
+        "late": 0,
+        "resync": 0,
+        "retune": 0,
+        "bursts": [0] * (len(BURST_BUCKETS) + 1),
+        "max_gap_s": 0.0,
+    }
+
+
+def _loss_rate(counts: dict) -> float:
+    # A late packet can undo a loss counted in the previous window.
+    lost = max(counts["lost"], 0)
+    expected = counts["received"] - counts["duplicate"] - counts["late"] + lost
+    return lost / expected if expected > 0 else 0.0
+
+
+# ===== CONTINUITY TRACKING ===== #
+
+class ContinuityTracker:
+    """Sample-index continuity for one channel port.
+
+    Keeps cumulative totals and a per-report window. Not thread-safe; one
+    capture loop owns all trackers.
+    """
+
+    def __init__(self, channel: str, port: int, resync_s: float = DEFAULT_RESYNC_S):
+        self.channel = channel
+        self.port = port
+        self._resync_s = float(resync_s)
+        self._expected = None
+        self._freq_idx = None
+        self._pkt_samples = 0
+        self._sample_rate_hz = 0.0
+        self._holes = set()
+        self._hole_order = deque()
+        self._seen = set()
+        self._seen_order = deque()
+        self._last_arrival = None
+        self._last_sample = None
+        self._jitter_s = 0.0
+        self._window_start = time.monotonic()
+        self.totals = _zero_counts()
+        self.window = _zero_counts()
+
+    def _count(self, key: str, n: int = 1):
+        self.totals[key] += n
+        self.window[key] += n
+
+    def _remember_seen(self, sample_idx: int):
+        self._seen.add(sample_idx)
+        self._seen_order.append(sample_idx)
+        if len(self._seen_order) > SEEN_TRACK_MAX:
+            self._seen.discard(self._seen_order.popleft())
+
+    def _remember_holes(self, start: int, n_packets: int, pkt_samples: int):
+        # Huge bursts are not enumerated; late packets from them become resyncs.
+        n_track = min(n_packets, HOLE_TRACK_MAX)
+        for k in range(n_packets - n_track, n_packets):
+            idx = start + k * pkt_samples
+            self._holes.add(idx)
+            self._hole_order.append(idx)
+        while len(self._hole_order) > HOLE_TRACK_MAX:
+            self._holes.discard(self._hole_order.popleft())
+
+    def _resync(self, sample_idx: int, pkt_samples: int):
+        self._expected = sample_idx + pkt_samples
+        self._holes.clear()
+        self._hole_order.clear()
+        self._last_arrival = None
+        self._last_sample = None
+
+    def _is_restart(self, backward: int, pkt_samples: int) -> bool:
+        """True if a jump back by `backward` samples means the counter restarted."""
+        if self._sample_rate_hz:
+            return backward > self._resync_s * self._sample_rate_hz
+        return backward > SEEN_TRACK_MAX * pkt_samples
+
+    def observe(
+        self,
+        sample_idx: int,
+        pkt_samples: int,
+        freq_idx: int,
+        sample_rate_hz: float,
+        arrival: float,
+    ):
+        """Classify one packet header observed at monotonic time arrival."""
+        if pkt_samples <= 0:
+            pkt_samples = self._pkt_samples or 1
+        self._pkt_samples = pkt_samples
+        if sample_rate_hz > 0:
+            self._sample_rate_hz = sample_rate_hz
+        self._count("received")
+
+        if self._expected is None:
+            self._freq_idx = freq_idx
+            self._resync(sample_idx, pkt_samples)
+        elif freq_idx != self._freq_idx:
+            # Retunes may restart the sample counter; never score them as loss.
+            self._freq_idx = freq_idx
+            self._count("retune")
+            self._resync(sample_idx, pkt_samples)
+        elif sample_idx == self._expected:
+            self._expected = sample_idx + pkt_samples
+        elif sample_idx > self._expected:
+            gap = sample_idx - self._expected
+            if self._sample_rate_hz and gap > self._resync_s * self._sample_rate_hz:
+                self._count("resync")
+                self._resync(sample_idx, pkt_samples)
+            else:
+                n_lost = -(-gap // pkt_samples)
+                self._count("lost", n_lost)
+                bucket = _burst_bucket(n_lost)
+                self.totals["bursts"][bucket] += 1
+                self.window["bursts"][bucket] += 1
+                self._remember_holes(self._expected, n_lost, pkt_samples)
+                self._expected = sample_idx + pkt_samples
+                # Jitter is only meaningful between in-order neighbours.
+                self._last_arrival = None
+        elif sample_idx in self._holes:
+            self._holes.discard(sample_idx)
+            self._count("out_of_order")
+            self._count("lost", -1)
+            self._remember_seen(sample_idx)
+            return
+        elif sample_idx in self._seen:
+            self._count("duplicate")
+            return
+        elif self._is_restart(self._expected - sample_idx, pkt_samples):
+            # Far behind the stream: the counter restarted.
+            self._count("resync")
+            self._resync(sample_idx, pkt_samples)
+        else:
+            # Stale duplicate or reordered packet that is no longer tracked;
+            # the stream position (_expected) is unchanged.
+            self._count("late")
+            return
+
+        self._remember_seen(sample_idx)
+        if self._last_arrival is not None and self._sample_rate_hz > 0:
+            arrival_dt = arrival - self._last_arrival
+            expected_dt = (sample_idx - self._last_sample) / self._sample_rate_hz
+            self._jitter_s += (abs(arrival_dt - expected_dt) - self._jitter_s) * JITTER_GAIN
+            if arrival_dt > self.window["max_gap_s"]:
+                self.window["max_gap_s"] = arrival_dt
+            if arrival_dt > self.totals["max_gap_s"]:
+                self.totals["max_gap_s"] = arrival_dt
+        self._last_arrival = arrival
+        self._last_sample = sample_idx
+
+    def snapshot(self, warn_loss: float, fail_loss: float, reset_window: bool = True) -> dict:
+        """Return a JSON-ready summary of the current window (and totals)."""
+        now = time.monotonic()
+        elapsed = max(now - self._window_start, 1e-9)
+        w = self.window
+        loss = _loss_rate(w)
+        if w["received"] == 0:
+            state = "idle"
+        elif loss > fail_loss:
+            state = "fail"
+        elif loss > warn_loss:
+            state = "loss"
+        else:
+            state = "ok"
+        out = {
+            "port": self.port,
+            "state": state,
+            "received": w["received"],
+            "lost": max(w["lost"], 0),
+            "out_of_order": w["out_of_order"],
+            "duplicate": w["duplicate"],
+            "late": w["late"],
+            "resync": w["resync"],
+            "retune": w["retune"],
+            "loss_rate": loss,
+            "loss_rate_total": _loss_rate(self.totals),
+            "lost_total": self.totals["lost"],
+            "received_total": self.totals["received"],
+            "burst_hist": dict(zip(BURST_LABELS, w["bursts"])),
+            "burst_hist_total": dict(zip(BURST_LABELS, self.totals["bursts"])),
+            "jitter_us": self._jitter_s * 1e6,
+            "max_gap_ms": w["max_gap_s"] * 1e3,
+            "pkt_rate_hz": w["received"] / elapsed,
+            "pkt_samples": self._pkt_samples,
+            "sample_rate_hz": self._sample_rate_hz,
+            "freq_idx": self._freq_idx,
+        }
+        if reset_window:
+            self.window = _zero_counts()
+            self._window_start = now
+        return out
+
+
+# ===== PACKET SOURCES ===== #
+
+def _udp_payload_offset(frame: memoryview, nbytes: int, ports: dict) -> tuple:
+    """Return (dst_port, payload_offset) for an IPv4/UDP frame to a watched port."""
+    if nbytes < ETH_HEADER_BYTES:
+        return None, 0
+    ethertype = _U16_BE.unpack_from(frame, 12)[0]
+    off = ETH_HEADER_BYTES
+    while ethertype in (ETH_P_8021Q, ETH_P_8021AD) and nbytes >= off + 4:
+        ethertype = _U16_BE.unpack_from(frame, off + 2)[0]
+        off += 4
+    if ethertype != ETH_P_IP or nbytes < off + 20:
+        return None, 0
+    ver_ihl = frame[off]
+    if ver_ihl >> 4 != 4 or frame[off + 9] != IPPROTO_UDP:
+        return None, 0
+    if _U16_BE.unpack_from(frame, off + 6)[0] & 0x1FFF:
+        return None, 0  # non-first fragment: no UDP header
+    udp = off + (ver_ihl & 0x0F) * 4
+    if nbytes < udp + UDP_HEADER_BYTES + MEP_PACKET_HEADER_BYTES:
+        return None, 0
+    dport = _U16_BE.unpack_from(frame, udp + 2)[0]
+    if dport not in ports:
+        return None, 0
+    return dport, udp + UDP_HEADER_BYTES
+
+
+def _observe_header(tracker: ContinuityTracker, buf, offset: int, arrival: float):
+    (sample_idx, sr_num, sr_den, freq_idx, _nsub, pkt_samples, _bits, _cplx) = (
+        MEP_PACKET_HEADER_STRUCT.unpack_from(buf, offset)
+    )
+    sample_rate_hz = sr_num / sr_den if sr_den else 0.0
+    tracker.observe(sample_idx, pkt_samples, freq_idx, sample_rate_hz, arrival)
+
+
+class RawSniffer:
+    """AF_PACKET capture of IPv4/UDP frames addressed to the channel ports.
+
+    The socket takes every ethertype (ETH_P_ALL), not just ETH_P_IP, so
+    802.1Q/802.1ad-tagged frames reach _udp_payload_offset and are unwrapped
+    there; everything else is dropped by that parser.
+    """
+
+    def __init__(self, trackers: dict, iface: str = ""):
+        self._trackers = trackers
+        self.label = f"raw:{iface or 'any'}"
+        self._sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_BYTES)
+        except OSError:
+            pass
+        if iface:
+            self._sock.bind((iface, 0))
+        self._sock.settimeout(0.2)
+        self._buf = bytearray(SNAP_BYTES)
+        self._view = memoryview(self._buf)
+
+    def pump(self, deadline: float):
+        sock = self._sock
+        view = self._view
+        trackers = self._trackers
+        outgoing = socket.PACKET_OUTGOING
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            try:
+                nbytes, addr = sock.recvfrom_into(view, SNAP_BYTES)
+            except socket.timeout:
+                continue
+            # Loopback frames appear twice (out + in); count the receive side.
+            if addr[2] == outgoing:
+                continue
+            dport, off = _udp_payload_offset(view, nbytes, trackers)
+            if dport is None:
+                continue
+            _observe_header(trackers[dport], view, off, time.monotonic())
+
+    def close(self):
+        self._sock.close()
+
+
+class UdpListener:
+    """Bind the channel ports (or a mirrored copy at port + offset)."""
+
+    def __init__(self, trackers: dict, bind_addr: str = "0.0.0.0", port_offset: int = 0):
+        self._trackers = trackers
+        self.label = f"udp:{bind_addr}" + (f"+{port_offset}" if port_offset else "")
+        self._selector = selectors.DefaultSelector()
+        self._socks = []
+        for port in trackers:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_BYTES)
+            except OSError:
+                pass
+            sock.bind((bind_addr, port + port_offset))
+            sock.setblocking(False)
+            self._selector.register(sock, selectors.EVENT_READ, port)
+            self._socks.append(sock)
+        self._buf = bytearray(SNAP_BYTES)
+        self._view = memoryview(self._buf)
+
+    def pump(self, deadline: float):
+        view = self._view
+        trackers = self._trackers
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            for key, _mask in self._selector.select(min(remaining, 0.2)):
+                sock = key.fileobj
+                tracker = trackers[key.data]
+                while True:
+                    try:
+                        nbytes = sock.recv_into(view, SNAP_BYTES)
+                    except BlockingIOError:
+                        break
+                    if nbytes >= MEP_PACKET_HEADER_BYTES:
+                        _observe_header(tracker, view, 0, time.monotonic())
+
+    def close(self):
+        self._selector.close()
+        for sock in self._socks:
+            sock.close()
+
+
+# ===== REPORTING ===== #
+
+def build_report(trackers: dict, source_label: str, interval_s: float,
+                 warn_loss: float, fail_loss: float) -> dict:
+    channels = {}
+    received = lost = duplicate = late = 0
+    for tracker in trackers.values():
+        snap = tracker.snapshot(warn_loss, fail_loss)
+        channels[tracker.channel] = snap
+        received += snap["received"]
+        lost += snap["lost"]
+        duplicate += snap["duplicate"]
+        late += snap["late"]
+    loss = _loss_rate({"received": received, "lost": lost, "duplicate": duplicate, "late": late})
+    states = [c["state"] for c in channels.values()]
+    for state in ("fail", "loss", "ok"):
+        if state in states:
+            overall = state
+            break
+    else:
+        overall = "idle"
+    return {
+        "state": overall,
+        "timestamp": time.time(),
+        "interval_s": interval_s,
+        "source": source_label,
+        "received": received,
+        "lost": lost,
+        "loss_rate": loss,
+        "channels": channels,
+    }
+
+
+def _format_report(report: dict) -> str:
+    parts = [f"{report['state']:>4}"]
+    for ch, c in report["channels"].items():
+        parts.append(
+            f"{ch}: rx={c['received']} lost={c['lost']} ({c['loss_rate'] * 100:.4f}%) "
+            f"ooo={c['out_of_order']} dup={c['duplicate']} late={c['late']} jit={c['jitter_us']:.0f}us"
+        )
+    return "  ".join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Passive MEP UDP packet continuity / loss monitor.")
+    ap.add_argument("--source", choices=("raw", "udp"), default="raw",
+                    help="raw = AF_PACKET sniff (needs CAP_NET_RAW), udp = bind the ports")
+    ap.add_argument("--iface", default="", help="Interface for --source raw (default: all)")
+    ap.add_argument("--bind", default="0.0.0.0", help="Bind address for --source udp")
+    ap.add_argument("--port-offset", type=int, default=0,
+                    help="Listen on channel port + offset (mirrored copy) for --source udp")
+    ap.add_argument("--channels", default=",".join(sorted(RECORDER_CHANNEL_PORTS)),
+                    help="Comma-separated channels to watch (default: all)")
+    ap.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_S, help="Report interval in seconds")
+    ap.add_argument("--resync-s", type=float, default=DEFAULT_RESYNC_S,
+                    help="Forward jumps longer than this many seconds are stream restarts, not loss")
+    ap.add_argument("--warn-loss", type=float, default=DEFAULT_WARN_LOSS, help="Loss fraction reported as 'loss'")
+    ap.add_argument("--fail-loss", type=float, default=DEFAULT_FAIL_LOSS, help="Loss fraction reported as 'fail'")
+    ap.add_argument("--host", default=MQTT_BROKER, help="MQTT broker host")
+    ap.add_argument("--port", type=int, default=MQTT_PORT, help="MQTT broker port")
+    ap.add_argument("--topic", default=LINK_MONITOR_STATUS_TOPIC, help="MQTT topic for reports")
+    ap.add_argument("--no-mqtt", action="store_true", help="Print reports only")
+    ap.add_argument("--json", action="store_true", help="Print full JSON reports instead of one-line summaries")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    trackers = {}
+    for ch in (c.strip().upper() for c in args.channels.split(",") if c.strip()):
+        if ch not in RECORDER_CHANNEL_PORTS:
+            ap.error(f"unknown channel {ch!r}; choose from {sorted(RECORDER_CHANNEL_PORTS)}")
+        port = RECORDER_CHANNEL_PORTS[ch]
+        trackers[port] = ContinuityTracker(ch, port, resync_s=args.resync_s)
+
+    try:
+        if args.source == "raw":
+            source = RawSniffer(trackers, iface=args.iface)
+        else:
+            source = UdpListener(trackers, bind_addr=args.bind, port_offset=args.port_offset)
+    except PermissionError:
+        logging.error("Raw capture needs CAP_NET_RAW: run with sudo, or use --source udp")
+        return 1
+    except OSError as e:
+        logging.error("Could not open %s capture: %s", args.source, e)
+        return 1
+
+    bus = None if args.no_mqtt else MEPBus(args.host, args.port)
+    logging.info("Watching %s on %s", ", ".join(f"{t.channel}:{t.port}" for t in trackers.values()), source.label)
+
+    try:
+        next_report = time.monotonic() + args.interval
+        while True:
+            source.pump(next_report)
+            next_report += args.interval
+            report = build_report(trackers, source.label, args.interval, args.warn_loss, args.fail_loss)
+            print(json.dumps(report) if args.json else _format_report(report), flush=True)
+            if bus is not None:
+                bus.publish_command(args.topic, report, sleep_s=0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+        if bus is not None:
+            bus.disconnect()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+mep_mqtt_store.py
+
+Searchable on-disk capture of every MQTT message seen by the MEPBus global
+listener.
+
+The store is a directory of rotating, append-only segments:
+
+  seg_NNNNNN.log  - raw payload bytes, back to back
+  seg_NNNNNN.idx  - one MQTT_STORE_INDEX_DTYPE record per message
+                    (receive time, topic id, payload offset, payload length)
+  topics.txt      - topic table; line k is the topic with id k
+
+Receive times are forced non-decreasing within the store, so a time range is
+two binary searches on the memory-mapped index. Topic filters (exact names or
+MQTT '+'/'#' patterns) are resolved against the topic table once and applied
+as an integer mask. Payload filters (substring or regex) run directly on the
+memory-mapped segment, one message span at a time; payload bytes are only
+copied out for the messages a query returns. Oldest segments are deleted once
+the store exceeds --max-mb.
+
+Only one writer may own a store at a time (flock on .lock); any number of
+readers can query it while it is being written.
+
+Subcommands:
+  record  - subscribe to the broker and append everything that arrives
+  query   - print messages by topic / time range / substring / regex
+  topics  - list topics with message counts and time spans
+
+The GUI records through MqttStoreWriter (a background thread fed from the
+MQTT listener) and searches through MqttStoreReader.
+
+Usage:
+    python3 scripts/mep_mqtt_store.py record --subscribe '#'
+    python3 scripts/mep_mqtt_store.py query --topic tuner_control/response --since -1h
+    python3 scripts/mep_mqtt_store.py query --topic 'afe/#' --since 2025-01-01T12:00 --until 2025-01-01T13:00 --regex '"state": *"error"'
+    python3 scripts/mep_mqtt_store.py topics
+"""
+
+import argparse
+import datetime
+import fcntl
+import glob
+import json
+import logging
+import mmap
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    LOG_DIR,
+    MEPBus,
+    MQTT_BROKER,
+    MQTT_PORT,
+)
+
+MQTT_STORE_DIR = os.path.join(LOG_DIR, "mqtt_store")
+MQTT_STORE_SEGMENT_BYTES = 64 * 1024 * 1024
+MQTT_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Messages queued between the MQTT thread and the writer thread.
+MQTT_STORE_QUEUE_MAX = 20000
+MQTT_STORE_FLUSH_S = 0.5
+
+MQTT_STORE_INDEX_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("topic", "<u4"),
+    ("length", "<u4"),
+    ("offset", "<u8"),
+])
+
+_SEGMENT_RE = re.compile(r"seg_(\d{6})\.idx$")
+
+
+def _segment_paths(root: str, seg: int) -> tuple:
+    base = os.path.join(root, f"seg_{seg:06d}")
+    return base + ".log", base + ".idx"
+
+
+def _list_segments(root: str) -> list:
+    segs = []
+    for path in glob.glob(os.path.join(root, "seg_*.idx")):
+        m = _SEGMENT_RE.search(path)
+        if m:
+            segs.append(int(m.group(1)))
+    return sorted(segs)
+
+
+def _segment_bytes(root: str, seg: int) -> int:
+    total = 0
+    for path in _segment_paths(root, seg):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def parse_time(text: str, now: float = None) -> float:
+    """Epoch seconds, relative '-90s' / '-15m' / '-2h' / '-1d', or ISO 8601 local time."""
+    text = text.strip()
+    now = time.time() if now is None else now
+    m = re.fullmatch(r"-(\d+(?:\.\d*)?)([smhd])", text)
+    if m:
+        scale = {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return now - float(m.group(1)) * scale
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+class MqttStore:
+    """Append side of the store. Single writer; not thread-safe on its own."""
+
+    def __init__(self, root: str = MQTT_STORE_DIR,
+                 segment_bytes: int = MQTT_STORE_SEGMENT_BYTES,
+                 max_bytes: int = MQTT_STORE_MAX_BYTES):
+        self.root = root
+        self.segment_bytes = int(segment_bytes)
+        self.max_bytes = int(max_bytes)
+        os.makedirs(root, exist_ok=True)
+        self._lock_fh = open(os.path.join(root, ".lock"), "w")
+        try:
+            fcntl.flock(self._lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_fh.close()
+            raise RuntimeError(f"MQTT store {root} is already being written by another process")
+
+        self._topics_path = os.path.join(root, "topics.txt")
+        self._topic_ids = {}
+        if os.path.exists(self._topics_path):
+            with open(self._topics_path, "r", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.endswith("\n"):
+                        self._topic_ids.setdefault(line[:-1], len(self._topic_ids))
+        self._topics_fh = open(self._topics_path, "a", encoding="utf-8")
+
+        segs = _list_segments(root)
+        self._last_t = 0.0
+        if segs:
+            idx = MqttStoreReader.load_index(root, segs[-1])
+            if len(idx):
+                self._last_t = float(idx["t"][-1])
+        # Every session starts a fresh segment; existing ones stay read-only.
+        self._seg = segs[-1] + 1 if segs else 0
+        self._sizes = {s: _segment_bytes(root, s) for s in segs}
+        self._log_fh = None
+        self._idx_fh = None
+        self._offset = 0
+        self._record = np.zeros(1, dtype=MQTT_STORE_INDEX_DTYPE)
+        self._open_segment()
+
+    def _open_segment(self):
+        log_path, idx_path = _segment_paths(self.root, self._seg)
+        self._log_fh = open(log_path, "ab")
+        self._idx_fh = open(idx_path, "ab")
+        self._offset = self._log_fh.tell()
+        self._sizes[self._seg] = 0
+
+    def _rotate(self):
+        self.flush()
+        self._log_fh.close()
+        self._idx_fh.close()
+        self._sizes[self._seg] = _segment_bytes(self.root, self._seg)
+        self._seg += 1
+        self._open_segment()
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        total = sum(self._sizes.values())
+        for seg in sorted(self._sizes):
+            if total <= self.max_bytes or seg == self._seg:
+                break
+            for path in _segment_paths(self.root, seg):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= self._sizes.pop(seg)
+            logging.info("MQTT store: removed segment %06d (retention)", seg)
+
+    def _topic_id(self, topic: str) -> int:
+        tid = self._topic_ids.get(topic)
+        if tid is None:
+            tid = self._topic_ids[topic] = len(self._topic_ids)
+            # Topic line lands before any index record that refers to it.
+            self._topics_fh.write(topic.replace("\n", " ") + "\n")
+            self._topics_fh.flush()
+        return tid
+
+    def append(self, topic: str, payload: bytes, t: float = None):
+        if self._offset >= self.segment_bytes:
+            self._rotate()
+        t = time.time() if t is None else float(t)
+        t = self._last_t = max(t, self._last_t)
+        rec = self._record
+        rec["t"] = t
+        rec["topic"] = self._topic_id(topic)
+        rec["length"] = len(payload)
+        rec["offset"] = self._offset
+        self._log_fh.write(payload)
+        self._idx_fh.write(rec.tobytes())
+        self._offset += len(payload)
+        self._sizes[self._seg] += len(payload) + MQTT_STORE_INDEX_DTYPE.itemsize
+
+    def flush(self):
+        # Payload bytes first, so a reader never sees an index record whose
+        # span is not on disk yet.
+        self._log_fh.flush()
+        self._idx_fh.flush()
+
+    def close(self):
+        if self._log_fh is None:
+            return
+        self.flush()
+        for fh in (self._log_fh, self._idx_fh, self._topics_fh):
+            fh.close()
+        self._log_fh = self._idx_fh = None
+        fcntl.flock(self._lock_fh, fcntl.LOCK_UN)
+        self._lock_fh.close()
+
+
+class MqttStoreWriter:
+    """Background-thread recorder: submit() from the MQTT thread never blocks."""
+
+    def __init__(self, root: str = MQTT_STORE_DIR, **store_kwargs):
+        self.store = MqttStore(root, **store_kwargs)
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=MQTT_STORE_QUEUE_MAX)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mqtt-store", daemon=True)
+        self._thread.start()
+
+    def submit(self, topic: str, payload: bytes):
+        try:
+            self._queue.put_nowait((time.time(), topic, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        next_flush = time.monotonic() + MQTT_STORE_FLUSH_S
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                t, topic, payload = self._queue.get(timeout=MQTT_STORE_FLUSH_S)
+            except queue.Empty:
+                t = None
+            if t is not None:
+                try:
+                    self.store.append(topic, payload, t)
+                    self.written += 1
+                except Exception:
+                    logging.exception("MQTT store: append failed for %s", topic)
+            if time.monotonic() >= next_flush:
+                self.store.flush()
+                next_flush = time.monotonic() + MQTT_STORE_FLUSH_S
+        self.store.close()
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+class MqttStoreReader:
+    """Query side of the store. Re-reads the index on every query, so it
+    sees messages appended by a live writer up to its last flush."""
+
+    def __init__(self, root: str = MQTT_STORE_DIR):
+        self.root = root
+
+    @staticmethod
+    def load_index(root: str, seg: int) -> np.ndarray:
+        _, idx_path = _segment_paths(root, seg)
+        try:
+            n = os.path.getsize(idx_path) // MQTT_STORE_INDEX_DTYPE.itemsize
+        except OSError:
+            n = 0
+        if n == 0:
+            return np.zeros(0, dtype=MQTT_STORE_INDEX_DTYPE)
+        # A record being written can leave a partial tail; map whole records only.
+        return np.memmap(idx_path, dtype=MQTT_STORE_INDEX_DTYPE, mode="r", shape=(n,))
+
+    def topics(self) -> list:
+        try:
+            with open(os.path.join(self.root, "topics.txt"), "r", encoding="utf-8") as fh:
+                return [line[:-1] for line in fh if line.endswith("\n")]
+        except OSError:
+            return []
+
+    def topic_ids(self, patterns) -> np.ndarray:
+        """Ids of every known topic matching any exact name or MQTT pattern."""
+        table = self.topics()
+        ids = [i for i, name in enumerate(table)
+               if any(name == p or MEPBus.topic_matches(name, p) for p in patterns)]
+        return np.asarray(ids, dtype=np.uint32)
+
+    def query(self, topics=None, t0: float = None, t1: float = None,
+              contains: bytes = None, regex: str = None, limit: int = None,
+              newest_first: bool = False):
+        """Yield (t, topic, payload) for matching messages.
+
+        topics is a list of names / MQTT patterns (None = all); [t0, t1) bounds
+        the receive time; contains / regex match against the raw payload bytes.
+        """
+        table = self.topics()
+        ids = None if not topics else self.topic_ids(topics)
+        if ids is not None and len(ids) == 0:
+            return
+        rx = re.compile(regex.encode() if isinstance(regex, str) else regex) if regex else None
+        if isinstance(contains, str):
+            contains = contains.encode()
+        segs = _list_segments(self.root)
+        if newest_first:
+            segs = segs[::-1]
+        emitted = 0
+        for seg in segs:
+            idx = self.load_index(self.root, seg)
+            if len(idx) == 0:
+                continue
+            times = idx["t"]
+            if (t0 is not None and times[-1] < t0) or (t1 is not None and times[0] >= t1):
+                continue
+            lo = 0 if t0 is None else int(np.searchsorted(times, t0, side="left"))
+            hi = len(idx) if t1 is None else int(np.searchsorted(times, t1, side="left"))
+            if hi <= lo:
+                continue
+            rows = np.arange(lo, hi)
+            if ids is not None:
+                rows = rows[np.isin(idx["topic"][lo:hi], ids)]
+            if len(rows) == 0:
+                continue
+            if newest_first:
+                rows = rows[::-1]
+            for t, tid, payload in self._scan_segment(seg, idx, rows, contains, rx):
+                yield t, table[tid] if tid < len(table) else f"<topic {tid}>", payload
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+
+    def _scan_segment(self, seg: int, idx: np.ndarray, rows: np.ndarray, contains, rx):
+        log_path, _ = _segment_paths(self.root, seg)
+        size = os.path.getsize(log_path)
+        if size == 0:
+            return  # mmap cannot map an empty file; only empty payloads here
+        with open(log_path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offs = idx["offset"][rows]
+            ends = offs + idx["length"][rows]
+            for r, start, end in zip(rows.tolist(), offs.tolist(), ends.tolist()):
+                if end > size:
+                    continue  # index flushed ahead of a truncated payload
+                if contains and mm.find(contains, start, end) < 0:
+                    continue
+                if rx is not None and rx.search(mm, start, end) is None:
+                    continue
+                yield float(idx["t"][r]), int(idx["topic"][r]), mm[start:end]
+
+    def topic_summary(self) -> dict:
+        """{topic: (count, first_t, last_t)} over the whole store."""
+        table = self.topics()
+        counts = np.zeros(len(table), dtype=np.int64)
+        first = np.full(len(table), np.inf)
+        last = np.full(len(table), -np.inf)
+        for seg in _list_segments(self.root):
+            idx = self.load_index(self.root, seg)
+            if len(idx) == 0:
+                continue
+            tid = idx["topic"].astype(np.intp)
+            known = tid < len(table)
+            tid, t = tid[known], idx["t"][known]
+            np.add.at(counts, tid, 1)
+            np.minimum.at(first, tid, t)
+            np.maximum.at(last, tid, t)
+        return {name: (int(counts[i]), float(first[i]), float(last[i]))
+                for i, name in enumerate(table) if counts[i]}
+
+
+def format_message(t: float, topic: str, payload: bytes, pretty: bool = False) -> str:
+    stamp = datetime.datetime.fromtimestamp(t).isoformat(timespec="milliseconds")
+    text = payload.decode("utf-8", errors="replace")
+    if pretty:
+        try:
+            text = json.dumps(json.loads(text), indent=2, sort_keys=True)
+        except ValueError:
+            pass
+    return f"{stamp}  {topic}  {text}"
+
+
+def run_record(args) -> int:
+    writer = MqttStoreWriter(args.root, segment_bytes=args.segment_mb * 1024 * 1024,
+                             max_bytes=args.max_mb * 1024 * 1024)
+    bus = MEPBus(args.host, args.port)
+    bus.on_message(writer.submit)
+    for pattern in args.subscribe:
+        bus.subscribe(pattern)
+    logging.info("Recording %s into %s", ", ".join(args.subscribe), args.root)
+    try:
+        while True:
+            time.sleep(10.0)
+            logging.info("MQTT store: %d written, %d dropped", writer.written, writer.dropped)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.disconnect()
+        writer.close()
+    return 0
+
+
+def run_query(args) -> int:
+    reader = MqttStoreReader(args.root)
+    t0 = parse_time(args.since) if args.since else None
+    t1 = parse_time(args.until) if args.until else None
+    n = 0
+    for t, topic, payload in reader.query(args.topic or None, t0, t1, args.contains, args.regex,
+                                          limit=args.limit, newest_first=args.newest_first):
+        if args.json:
+            print(json.dumps({"t": t, "topic": topic, "payload": payload.decode("utf-8", errors="replace")}))
+        else:
+            print(format_message(t, topic, payload, pretty=args.pretty))
+        n += 1
+    logging.info("%d message(s)", n)
+    return 0
+
+
+def run_topics(args) -> int:
+    summary = MqttStoreReader(args.root).topic_summary()
+    for name, (count, first, last) in sorted(summary.items()):
+        print(f"{count:10d}  {datetime.datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S}"
+              f" .. {datetime.datetime.fromtimestamp(last):%Y-%m-%d %H:%M:%S}  {name}")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Searchable on-disk MQTT capture store.")
+    ap.add_argument("--root", default=MQTT_STORE_DIR, help="Store directory")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_rec = sub.add_parser("record", help="Append every received MQTT message to the store")
+    p_rec.add_argument("--host", default=MQTT_BROKER, help="MQTT broker host")
+    p_rec.add_argument("--port", type=int, default=MQTT_PORT, help="MQTT broker port")
+    p_rec.add_argument("--subscribe", action="append", default=None,
+                       help="Topic pattern to subscribe (repeatable, default '#')")
+    p_rec.add_argument("--segment-mb", type=int, default=MQTT_STORE_SEGMENT_BYTES // (1024 * 1024),
+                       help="Rotate payload segments at this size")
+    p_rec.add_argument("--max-mb", type=int, default=MQTT_STORE_MAX_BYTES // (1024 * 1024),
+                       help="Delete oldest segments beyond this total size")
+
+    p_q = sub.add_parser("query", help="Print stored messages")
+    p_q.add_argument("--topic", action="append", default=None,
+                     help="Topic name or MQTT pattern (repeatable)")
+    p_q.add_argument("--since", default=None, help="Start time: epoch, -15m / -2h, or ISO 8601")
+    p_q.add_argument("--until", default=None, help="End time (exclusive), same formats")
+    p_q.add_argument("--contains", default=None, help="Payload substring")
+    p_q.add_argument("--regex", default=None, help="Payload regular expression")
+    p_q.add_argument("--limit", type=int, default=None, help="Stop after N messages")
+    p_q.add_argument("--newest-first", action="store_true", help="Newest messages first")
+    p_q.add_argument("--json", action="store_true", help="One JSON object per line")
+    p_q.add_argument("--pretty", action="store_true", help="Pretty-print JSON payloads")
+
+    sub.add_parser("topics", help="List stored topics with counts and time spans")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.cmd == "record":
+        args.subscribe = args.subscribe or ["#"]
+        return run_record(args)
+    if args.cmd == "query":
+        return run_query(args)
+    return run_topics(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
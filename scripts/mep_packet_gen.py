@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+mep_packet_gen.py
+
+Synthetic RFSoC MEP packet stream generator for receiver / recorder load tests.
+
+Emits the exact MEP UDP format (64-byte header per
+utilities/wireshark_rfsoc_mep_dissector.lua, then complex int16 IQ) to the
+RECORDER_CHANNEL_PORTS ports, paced to a sample rate. Nothing is built per
+packet at send time: one cycle of packets (header + payload) is rendered up
+front, and each batch only rewrites its sample_idx column before going out in
+a single sendmmsg(2) call per channel socket.
+
+Signals:
+  tone   - complex tone, quantized so it is periodic over the packet cycle
+  noise  - complex Gaussian noise, repeated every cycle
+  drf    - replay of a DigitalRF channel span (requires digital_rf)
+
+Impairments (per channel, per packet): --loss drops, --duplicate repeats,
+--reorder swaps a packet with its successor. Useful with mep_link_monitor.py.
+
+Usage:
+    python3 scripts/mep_packet_gen.py --channels A --sample-rate-mhz 64
+    python3 scripts/mep_packet_gen.py --signal drf --drf-root /data/captures/x --drf-channel ch0 --loss 1e-4
+"""
+
+import argparse
+import ctypes
+import errno
+import logging
+import math
+import os
+import socket
+import sys
+import time
+from fractions import Fraction
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    RECORDER_CHANNEL_PORTS,
+    MEP_PACKET_HEADER_BYTES,
+    MEP_PACKET_HEADER_DTYPE,
+)
+
+try:
+    import digital_rf
+except Exception:  # pragma: no cover - only needed for --signal drf.
+    digital_rf = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PKT_SAMPLES = 1024
+DEFAULT_BATCH = 64
+DEFAULT_CYCLE_PACKETS = 512
+SOCKET_SNDBUF_BYTES = 16 * 1024 * 1024
+IQ_FULL_SCALE = 32767
+
+
+# ===== sendmmsg(2) ===== #
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fn = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = (ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int)
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+class PacketSender:
+    """Connected UDP socket that sends rows of a packet buffer in batches.
+
+    The mmsghdr/iovec table for every row is built once; a batch is a pointer
+    into it. Impaired batches get a scratch table holding the chosen order.
+    """
+
+    def __init__(self, host: str, port: int, packets: np.ndarray):
+        self.port = port
+        self._packets = packets
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SNDBUF_BYTES)
+        except OSError:
+            pass
+        self._sock.connect((host, port))
+        self._fd = self._sock.fileno()
+        n_rows, row_bytes = packets.shape
+        base = packets.ctypes.data
+        stride = packets.strides[0]
+        self._iov = (_IoVec * n_rows)()
+        self._msgs = (_MMsgHdr * n_rows)()
+        for i in range(n_rows):
+            self._iov[i].iov_base = base + i * stride
+            self._iov[i].iov_len = row_bytes
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iov[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+        self._msg_size = ctypes.sizeof(_MMsgHdr)
+        self._scratch = (_MMsgHdr * (2 * n_rows))()
+        self.sent = 0
+        self.errors = 0
+
+    def send_rows(self, start: int, count: int):
+        """Send rows [start, start + count) in order."""
+        if _sendmmsg is None:
+            self._send_fallback(range(start, start + count))
+            return
+        ptr = ctypes.cast(ctypes.addressof(self._msgs) + start * self._msg_size, ctypes.POINTER(_MMsgHdr))
+        self._sendmmsg_all(ptr, count)
+
+    def send_order(self, rows):
+        """Send an explicit row order (drops, duplicates, swaps already applied)."""
+        if _sendmmsg is None:
+            self._send_fallback(rows)
+            return
+        n = 0
+        for r in rows:
+            self._scratch[n] = self._msgs[r]
+            n += 1
+        if n:
+            self._sendmmsg_all(ctypes.cast(self._scratch, ctypes.POINTER(_MMsgHdr)), n)
+
+    def _sendmmsg_all(self, ptr, count: int):
+        done = 0
+        while done < count:
+            cur = ctypes.cast(ctypes.addressof(ptr.contents) + done * self._msg_size, ctypes.POINTER(_MMsgHdr))
+            rc = _sendmmsg(self._fd, cur, count - done, 0)
+            if rc < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                # ECONNREFUSED (nobody bound on loopback) / ENOBUFS: count and move on.
+                self.errors += count - done
+                return
+            done += rc
+            self.sent += rc
+
+    def _send_fallback(self, rows):
+        for r in rows:
+            try:
+                self._sock.send(self._packets[r])
+                self.sent += 1
+            except OSError:
+                self.errors += 1
+
+    def close(self):
+        self._sock.close()
+
+
+# ===== SIGNALS ===== #
+
+def build_tone(n_samples: int, sample_rate_hz: float, offset_hz: float, amplitude: float) -> tuple:
+    """Return (iq complex64, quantized offset) periodic over n_samples."""
+    cycles = round(offset_hz * n_samples / sample_rate_hz)
+    f_q = cycles * sample_rate_hz / n_samples
+    phase = 2.0 * np.pi * cycles * np.arange(n_samples, dtype=np.float64) / n_samples
+    iq = (amplitude * np.exp(1j * phase)).astype(np.complex64)
+    return iq, f_q
+
+
+def build_noise(n_samples: int, noise_dbfs: float, rng: np.random.Generator) -> np.ndarray:
+    sigma = 10.0 ** (noise_dbfs / 20.0) / math.sqrt(2.0)
+    iq = np.empty(n_samples, dtype=np.complex64)
+    iq.real = rng.normal(0.0, sigma, n_samples)
+    iq.imag = rng.normal(0.0, sigma, n_samples)
+    return iq
+
+
+def load_drf(root: str, channel: str, start_s: float, n_samples: int) -> np.ndarray:
+    if digital_rf is None:
+        raise RuntimeError("digital_rf is not installed")
+    reader = digital_rf.DigitalRFReader(root)
+    bounds_start, bounds_end = reader.get_bounds(channel)
+    props = reader.get_properties(channel)
+    sr = float(props.get("samples_per_second", 0.0)) or 1.0
+    start = bounds_start + int(start_s * sr)
+    n_samples = min(n_samples, bounds_end - start)
+    if n_samples <= 0:
+        raise RuntimeError(f"DigitalRF channel {channel!r} has no data at +{start_s}s")
+    iq = reader.read_vector(start, n_samples, channel).astype(np.complex64, copy=False)
+    peak = float(np.max(np.abs(iq))) if iq.size else 0.0
+    if peak > 1.5:
+        # Raw int16-scale samples: normalize back to full scale = 1.0.
+        iq = iq / IQ_FULL_SCALE
+    return iq
+
+
+def build_packets(iq: np.ndarray, pkt_samples: int, sample_rate_hz: float, freq_idx: int) -> np.ndarray:
+    """Render one cycle of complete packets: (n_packets, header + payload) uint8."""
+    n_packets = len(iq) // pkt_samples
+    payload_bytes = pkt_samples * 2 * 2
+    packets = np.zeros((n_packets, MEP_PACKET_HEADER_BYTES + payload_bytes), dtype=np.uint8)
+    headers = packets_headers(packets)
+    rate = Fraction(sample_rate_hz).limit_denominator(1_000_000)
+    headers["sample_rate_numerator"] = rate.numerator
+    headers["sample_rate_denominator"] = rate.denominator
+    headers["freq_idx"] = freq_idx
+    headers["num_subchannels"] = 1
+    headers["pkt_samples"] = pkt_samples
+    headers["bits_per_int"] = 16
+    headers["is_complex"] = 1
+    payload = packets[:, MEP_PACKET_HEADER_BYTES:].view("<i2").reshape(n_packets, pkt_samples, 2)
+    scaled = iq[: n_packets * pkt_samples].reshape(n_packets, pkt_samples) * IQ_FULL_SCALE
+    np.clip(np.rint(scaled.real), -IQ_FULL_SCALE, IQ_FULL_SCALE, out=payload[..., 0], casting="unsafe")
+    np.clip(np.rint(scaled.imag), -IQ_FULL_SCALE, IQ_FULL_SCALE, out=payload[..., 1], casting="unsafe")
+    return packets
+
+
+def packets_headers(packets: np.ndarray) -> np.ndarray:
+    """Structured (n_packets,) header view into a packet buffer (writes go through)."""
+    return packets[:, :MEP_PACKET_HEADER_BYTES].view(MEP_PACKET_HEADER_DTYPE)[:, 0]
+
+
+# ===== IMPAIRMENTS ===== #
+
+def impaired_order(rows: range, rng: np.random.Generator, loss: float, duplicate: float, reorder: float) -> list:
+    """Apply per-packet drop / duplicate / adjacent-swap decisions to a row range."""
+    n = len(rows)
+    keep = rng.random(n) >= loss
+    order = [r for r, k in zip(rows, keep) if k]
+    if reorder > 0.0 and len(order) > 1:
+        swaps = np.flatnonzero(rng.random(len(order) - 1) < reorder)
+        last = -2
+        for i in swaps:
+            if i > last + 1:
+                order[i], order[i + 1] = order[i + 1], order[i]
+                last = i
+    if duplicate > 0.0 and order:
+        dups = rng.random(len(order)) < duplicate
+        if dups.any():
+            out = []
+            for r, d in zip(order, dups):
+                out.append(r)
+                if d:
+                    out.append(r)
+            order = out
+    return order
+
+
+# ===== MAIN ===== #
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate synthetic RFSoC MEP UDP packet streams.")
+    ap.add_argument("--host", default=DEFAULT_HOST, help="Destination host (default: 127.0.0.1)")
+    ap.add_argument("--channels", default="A", help="Comma-separated channels (ports from RECORDER_CHANNEL_PORTS)")
+    ap.add_argument("--sample-rate-mhz", type=float, default=10.0, help="Sample rate in MHz")
+    ap.add_argument("--pkt-samples", type=int, default=DEFAULT_PKT_SAMPLES, help="Complex samples per packet")
+    ap.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Packets per sendmmsg call")
+    ap.add_argument("--cycle-packets", type=int, default=DEFAULT_CYCLE_PACKETS,
+                    help="Packets rendered up front and repeated (rounded up to a batch multiple)")
+    ap.add_argument("--freq-idx", type=int, default=0, help="freq_idx header value")
+    ap.add_argument("--signal", choices=("tone", "noise", "drf"), default="tone")
+    ap.add_argument("--tone-offset-hz", type=float, default=1e6, help="Tone offset from center")
+    ap.add_argument("--amplitude", type=float, default=0.5, help="Tone amplitude, fraction of full scale")
+    ap.add_argument("--noise-dbfs", type=float, default=-30.0, help="Noise power in dBFS (added to the tone)")
+    ap.add_argument("--drf-root", default="", help="DigitalRF top-level directory for --signal drf")
+    ap.add_argument("--drf-channel", default="", help="DigitalRF channel name for --signal drf")
+    ap.add_argument("--drf-start-s", type=float, default=0.0, help="Replay offset from the start of the channel")
+    ap.add_argument("--loss", type=float, default=0.0, help="Per-packet drop probability")
+    ap.add_argument("--duplicate", type=float, default=0.0, help="Per-packet duplicate probability")
+    ap.add_argument("--reorder", type=float, default=0.0, help="Per-packet swap-with-next probability")
+    ap.add_argument("--duration", type=float, default=0.0, help="Seconds to run (0 = until Ctrl-C)")
+    ap.add_argument("--no-pace", action="store_true", help="Send as fast as possible (throughput test)")
+    ap.add_argument("--seed", type=int, default=None, help="RNG seed for noise and impairments")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    ports = []
+    for ch in (c.strip().upper() for c in args.channels.split(",") if c.strip()):
+        if ch not in RECORDER_CHANNEL_PORTS:
+            ap.error(f"unknown channel {ch!r}; choose from {sorted(RECORDER_CHANNEL_PORTS)}")
+        ports.append(RECORDER_CHANNEL_PORTS[ch])
+    if args.pkt_samples <= 0 or args.batch <= 0:
+        ap.error("--pkt-samples and --batch must be positive")
+
+    fs = args.sample_rate_mhz * 1e6
+    rng = np.random.default_rng(args.seed)
+    cycle_packets = max(args.batch, -(-args.cycle_packets // args.batch) * args.batch)
+    n_samples = cycle_packets * args.pkt_samples
+
+    if args.signal == "drf":
+        if not (args.drf_root and args.drf_channel):
+            ap.error("--signal drf needs --drf-root and --drf-channel")
+        iq = load_drf(args.drf_root, args.drf_channel, args.drf_start_s, n_samples)
+        cycle_packets = max(1, len(iq) // args.pkt_samples // args.batch) * args.batch
+        if len(iq) < cycle_packets * args.pkt_samples:
+            iq = np.resize(iq, cycle_packets * args.pkt_samples)
+    elif args.signal == "noise":
+        iq = build_noise(n_samples, args.noise_dbfs, rng)
+    else:
+        iq, f_q = build_tone(n_samples, fs, args.tone_offset_hz, args.amplitude)
+        iq += build_noise(n_samples, args.noise_dbfs, rng)
+        if f_q != args.tone_offset_hz:
+            logging.info("Tone offset quantized to %.3f Hz (periodic over %d packets)", f_q, cycle_packets)
+
+    packets = build_packets(iq, args.pkt_samples, fs, args.freq_idx)
+    headers = packets_headers(packets)
+    step = np.arange(args.batch, dtype=np.uint64) * np.uint64(args.pkt_samples)
+    senders = [PacketSender(args.host, port, packets) for port in ports]
+    impaired = args.loss > 0.0 or args.duplicate > 0.0 or args.reorder > 0.0
+    if _sendmmsg is None:
+        logging.warning("sendmmsg unavailable; falling back to one send() per packet")
+
+    pkt_bytes = packets.shape[1]
+    logging.info(
+        "Sending %s to %s: %.3f MS/s, %d samples/packet (%d B), batch %d, cycle %d packets",
+        args.signal, ",".join(f"{args.host}:{p}" for p in ports), fs / 1e6,
+        args.pkt_samples, pkt_bytes, args.batch, cycle_packets,
+    )
+
+    batch_s = args.batch * args.pkt_samples / fs
+    sample_idx = int(time.time() * fs) // args.pkt_samples * args.pkt_samples
+    t0 = time.monotonic()
+    t_report = t0 + 1.0
+    t_stop = t0 + args.duration if args.duration > 0 else math.inf
+    n_batches = 0
+    late_batches = 0
+    row = 0
+    last_sent = 0
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= t_stop:
+                break
+            if not args.no_pace:
+                due = t0 + n_batches * batch_s
+                if due > now:
+                    time.sleep(due - now)
+                elif now - due > batch_s:
+                    late_batches += 1
+
+            headers["sample_idx"][row:row + args.batch] = np.uint64(sample_idx) + step
+            rows = range(row, row + args.batch)
+            for sender in senders:
+                if impaired:
+                    sender.send_order(impaired_order(rows, rng, args.loss, args.duplicate, args.reorder))
+                else:
+                    sender.send_rows(row, args.batch)
+
+            sample_idx += args.batch * args.pkt_samples
+            row = (row + args.batch) % cycle_packets
+            n_batches += 1
+
+            now = time.monotonic()
+            if now >= t_report:
+                sent = sum(s.sent for s in senders)
+                errors = sum(s.errors for s in senders)
+                rate_pps = (sent - last_sent) / (now - t_report + 1.0)
+                print(
+                    f"pkts={sent} errors={errors} late_batches={late_batches} "
+                    f"rate={rate_pps * args.pkt_samples / len(senders) / 1e6:.2f} MS/s/ch "
+                    f"({rate_pps * pkt_bytes * 8 / 1e9:.2f} Gb/s)",
+                    flush=True,
+                )
+                last_sent = sent
+                t_report = now + 1.0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sender in senders:
+            sender.close()
+
+    elapsed = max(time.monotonic() - t0, 1e-9)
+    sent = sum(s.sent for s in senders)
+    print(f"sent {sent} packets in {elapsed:.2f} s ({sent * pkt_bytes * 8 / elapsed / 1e9:.2f} Gb/s), "
+          f"errors={sum(s.errors for s in senders)}, late_batches={late_batches}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+mep_pcap_index.py
+
+Vectorized RFSoC MEP packet indexer for pcap / pcapng captures.
+
+Memory-maps the capture and parses every MEP header with numpy instead of
+walking packets one by one (the Wireshark Lua dissector is unusable on
+multi-GB offload captures). Records of equal length are located in strided
+runs, link/IP/UDP headers are decoded column-wise, and the 64-byte MEP
+headers are gathered and viewed through MEP_PACKET_HEADER_DTYPE.
+
+The resulting index (sample_idx, freq_idx, port, file offset, ...) drives:
+  report   - per-port packet/sample rate, sample_idx gaps, freq_idx transitions
+  extract  - copy one port's sample range straight from the mmap into a .npy
+             file or a DigitalRF channel; only the packets that overlap the
+             range are touched, missing samples are zero-filled
+
+Supported link types: Ethernet (optionally VLAN-tagged), raw IPv4, Linux
+cooked capture v1/v2. IPv4 only; non-first fragments are ignored.
+
+Usage:
+    python3 scripts/mep_pcap_index.py report capture.pcapng
+    python3 scripts/mep_pcap_index.py extract capture.pcap --channel A --start +0 --count 10000000 --npy out.npy
+    python3 scripts/mep_pcap_index.py extract capture.pcap --channel A --start 1712345678000000 --count 1e7 --drf /data/out
+"""
+
+import argparse
+import mmap
+import os
+import sys
+from fractions import Fraction
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    RECORDER_CHANNEL_PORTS,
+    MEP_PACKET_HEADER_BYTES,
+    MEP_PACKET_HEADER_DTYPE,
+)
+
+try:
+    import digital_rf
+except Exception:  # pragma: no cover - only needed for extract --drf.
+    digital_rf = None
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_IDB = 0x00000001
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_OPT_IF_TSRESOL = 9
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_IPV4 = 228
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+IPPROTO_UDP = 17
+UDP_HEADER_BYTES = 8
+
+# Strided-run lookahead: start small, double while every record matches.
+RUN_PROBE_MIN = 64
+RUN_PROBE_MAX = 1 << 20
+# Headers are gathered in chunks to bound the (n, 64) temporary.
+GATHER_CHUNK = 1 << 20
+
+INDEX_DTYPE = np.dtype([
+    ("sample_idx", "<u8"),
+    ("freq_idx", "<u4"),
+    ("port", "<u2"),
+    ("pkt_samples", "<u4"),
+    ("num_subchannels", "<u4"),
+    ("bits_per_int", "<u2"),
+    ("is_complex", "u1"),
+    ("sample_rate_numerator", "<u8"),
+    ("sample_rate_denominator", "<u8"),
+    ("offset", "<u8"),          # file offset of the UDP payload (MEP header)
+    ("payload_len", "<u4"),     # captured UDP payload bytes
+    ("ts", "<f8"),              # capture timestamp, epoch seconds (NaN if none)
+])
+
+
+# ===== RECORD WALKING ===== #
+
+def _strided_u32(buf, offset: int, stride: int, count: int, byteorder: str) -> np.ndarray:
+    return np.ndarray((count,), dtype=np.dtype(byteorder + "u4"), buffer=buf, offset=offset, strides=(stride,))
+
+
+def _run_length(buf, offset: int, stride: int, limit: int, field: int, expect: int,
+                byteorder: str, type_field: int = None, type_expect: int = None) -> int:
+    """Number of consecutive records at offset whose length field equals expect."""
+    n = 0
+    probe = RUN_PROBE_MIN
+    while n < limit:
+        count = min(probe, limit - n)
+        base = offset + n * stride
+        lens = _strided_u32(buf, base + field, stride, count, byteorder)
+        bad = lens != expect
+        if type_field is not None:
+            bad |= _strided_u32(buf, base + type_field, stride, count, byteorder) != type_expect
+        first_bad = int(np.argmax(bad)) if bad.any() else count
+        n += first_bad
+        if first_bad < count:
+            break
+        probe = min(probe * 2, RUN_PROBE_MAX)
+    return n
+
+
+def _walk_pcap(buf, size: int) -> tuple:
+    """Classic pcap -> (linktype, data offsets, captured lengths, timestamps)."""
+    magic_le = int.from_bytes(buf[0:4], "little")
+    if magic_le in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+        bo = "<"
+    else:
+        bo = ">"
+        magic_le = int.from_bytes(buf[0:4], "big")
+    ts_scale = 1e-9 if magic_le == PCAP_MAGIC_NS else 1e-6
+    linktype = int.from_bytes(buf[20:24], "little" if bo == "<" else "big") & 0x0FFFFFFF
+    u32 = np.dtype(bo + "u4")
+
+    runs = []
+    off = 24
+    while off + 16 <= size:
+        incl = int(np.frombuffer(buf, dtype=u32, count=1, offset=off + 8)[0])
+        stride = 16 + incl
+        limit = (size - off) // stride
+        if limit <= 0:
+            break  # truncated final record
+        n = max(1, _run_length(buf, off, stride, limit, 8, incl, bo))
+        runs.append(off + np.arange(n, dtype=np.int64) * stride)
+        off += n * stride
+
+    rec = np.concatenate(runs) if runs else np.zeros(0, dtype=np.int64)
+    ts_sec = _gather_u32(buf, rec, bo)
+    ts_frac = _gather_u32(buf, rec + 4, bo)
+    caplen = _gather_u32(buf, rec + 8, bo)
+    ts = ts_sec.astype(np.float64) + ts_frac.astype(np.float64) * ts_scale
+    return linktype, rec + 16, caplen.astype(np.int64), ts
+
+
+def _walk_pcapng(buf, size: int) -> tuple:
+    """pcapng -> (linktype, data offsets, captured lengths, timestamps).
+
+    Enhanced/simple packet blocks are collected; all interfaces must share one
+    link type (true for every offload capture we take).
+    """
+    bo = "<"
+    linktypes = []
+    tsres = []
+    epb_runs = []
+    spb = []
+    off = 0
+    while off + 12 <= size:
+        btype = int.from_bytes(buf[off:off + 4], "little" if bo == "<" else "big")
+        if btype == PCAPNG_SHB:
+            bom = int.from_bytes(buf[off + 8:off + 12], "little")
+            bo = "<" if bom == PCAPNG_BYTE_ORDER_MAGIC else ">"
+            linktypes, tsres = [], []
+        order = "little" if bo == "<" else "big"
+        blen = int.from_bytes(buf[off + 4:off + 8], order)
+        if blen < 12 or off + blen > size:
+            break
+        if btype == PCAPNG_EPB:
+            limit = (size - off) // blen
+            n = max(1, _run_length(buf, off, blen, limit, 4, blen, bo, type_field=0, type_expect=PCAPNG_EPB))
+            epb_runs.append(off + np.arange(n, dtype=np.int64) * blen)
+            off += n * blen
+            continue
+        if btype == PCAPNG_IDB:
+            linktypes.append(int.from_bytes(buf[off + 8:off + 10], order))
+            tsres.append(_idb_tsresol(buf, off, blen, order))
+        elif btype == PCAPNG_SPB:
+            spb.append(off)
+        off += blen
+
+    if len(set(linktypes)) > 1:
+        raise ValueError(f"mixed link types across interfaces: {sorted(set(linktypes))}")
+    linktype = linktypes[0] if linktypes else LINKTYPE_ETHERNET
+    epb = np.concatenate(epb_runs) if epb_runs else np.zeros(0, dtype=np.int64)
+    iface = _gather_u32(buf, epb + 8, bo)
+    ts_raw = (_gather_u32(buf, epb + 12, bo).astype(np.uint64) << np.uint64(32)) | _gather_u32(buf, epb + 16, bo)
+    scale = np.asarray(tsres or [1e-6], dtype=np.float64)
+    ts = ts_raw.astype(np.float64) * scale[np.minimum(iface, len(scale) - 1)]
+    caplen = _gather_u32(buf, epb + 20, bo).astype(np.int64)
+    data = epb + 28
+    if spb:
+        spb = np.asarray(spb, dtype=np.int64)
+        spb_len = _gather_u32(buf, spb + 4, bo).astype(np.int64)
+        orig = _gather_u32(buf, spb + 8, bo).astype(np.int64)
+        data = np.concatenate([data, spb + 12])
+        caplen = np.concatenate([caplen, np.minimum(orig, spb_len - 16)])
+        ts = np.concatenate([ts, np.full(len(spb), np.nan)])
+        order = np.argsort(data, kind="stable")
+        data, caplen, ts = data[order], caplen[order], ts[order]
+    return linktype, data, caplen, ts
+
+
+def _idb_tsresol(buf, off: int, blen: int, order: str) -> float:
+    pos = off + 16
+    end = off + blen - 4
+    while pos + 4 <= end:
+        code = int.from_bytes(buf[pos:pos + 2], order)
+        olen = int.from_bytes(buf[pos + 2:pos + 4], order)
+        if code == 0:
+            break
+        if code == PCAPNG_OPT_IF_TSRESOL and olen >= 1:
+            v = buf[pos + 4]
+            return 2.0 ** -(v & 0x7F) if v & 0x80 else 10.0 ** -v
+        pos += 4 + ((olen + 3) & ~3)
+    return 1e-6
+
+
+# ===== COLUMN DECODE ===== #
+
+def _gather_u32(buf, offsets: np.ndarray, bo: str) -> np.ndarray:
+    u8 = np.frombuffer(buf, dtype=np.uint8)
+    b = u8[offsets[:, None] + np.arange(4)].astype(np.uint32)
+    if bo == "<":
+        return b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16) | (b[:, 3] << 24)
+    return (b[:, 0] << 24) | (b[:, 1] << 16) | (b[:, 2] << 8) | b[:, 3]
+
+
+def _be16(u8: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    return (u8[offsets].astype(np.uint16) << 8) | u8[offsets + 1]
+
+
+def _locate_udp_payloads(buf, linktype: int, data: np.ndarray, caplen: np.ndarray, ports) -> tuple:
+    """Return (record mask, payload offsets, dst ports, payload lengths) for MEP UDP."""
+    u8 = np.frombuffer(buf, dtype=np.uint8)
+    size = len(u8)
+    end = data + caplen
+    ok = caplen >= 20
+
+    if linktype == LINKTYPE_ETHERNET:
+        ok &= caplen >= 14 + 20
+        l3 = data + 14
+        ethertype = np.zeros(len(data), dtype=np.uint16)
+        ethertype[ok] = _be16(u8, data[ok] + 12)
+        for _ in range(2):  # 802.1Q / QinQ
+            tagged = ok & ((ethertype == ETH_P_8021Q) | (ethertype == ETH_P_8021AD)) & (l3 + 4 + 20 <= end)
+            ethertype[tagged] = _be16(u8, l3[tagged] + 2)
+            l3 = np.where(tagged, l3 + 4, l3)
+        ok &= ethertype == ETH_P_IP
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+        l3 = data.copy()
+    elif linktype == LINKTYPE_LINUX_SLL:
+        ok &= caplen >= 16 + 20
+        l3 = data + 16
+        proto = np.zeros(len(data), dtype=np.uint16)
+        proto[ok] = _be16(u8, data[ok] + 14)
+        ok &= proto == ETH_P_IP
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        ok &= caplen >= 20 + 20
+        l3 = data + 20
+        proto = np.zeros(len(data), dtype=np.uint16)
+        proto[ok] = _be16(u8, data[ok])
+        ok &= proto == ETH_P_IP
+    else:
+        raise ValueError(f"unsupported link type {linktype}")
+
+    ok &= l3 + 20 <= np.minimum(end, size)
+    idx = np.flatnonzero(ok)
+    l3 = l3[idx]
+    ver_ihl = u8[l3]
+    keep = (ver_ihl >> 4 == 4) & (u8[l3 + 9] == IPPROTO_UDP) & ((_be16(u8, l3 + 6) & 0x1FFF) == 0)
+    idx, l3, ver_ihl = idx[keep], l3[keep], ver_ihl[keep]
+    udp = l3 + (ver_ihl & 0x0F).astype(np.int64) * 4
+    keep = udp + UDP_HEADER_BYTES + MEP_PACKET_HEADER_BYTES <= end[idx]
+    idx, udp = idx[keep], udp[keep]
+    dport = _be16(u8, udp + 2)
+    keep = np.isin(dport, np.asarray(sorted(ports), dtype=np.uint16))
+    idx, udp, dport = idx[keep], udp[keep], dport[keep]
+    payload = udp + UDP_HEADER_BYTES
+    return idx, payload, dport, (end[idx] - payload)
+
+
+def build_index(path: str, ports=None) -> np.ndarray:
+    """Index every MEP packet in a pcap/pcapng file (capture order)."""
+    ports = set(ports or RECORDER_CHANNEL_PORTS.values())
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 24:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic = int.from_bytes(mm[0:4], "little")
+            if magic == PCAPNG_SHB:
+                linktype, data, caplen, ts = _walk_pcapng(mm, size)
+            else:
+                linktype, data, caplen, ts = _walk_pcap(mm, size)
+            rec, payload, dport, plen = _locate_udp_payloads(mm, linktype, data, caplen, ports)
+
+            index = np.zeros(len(rec), dtype=INDEX_DTYPE)
+            u8 = np.frombuffer(mm, dtype=np.uint8)
+            cols = np.arange(MEP_PACKET_HEADER_BYTES)
+            for lo in range(0, len(rec), GATHER_CHUNK):
+                hi = min(lo + GATHER_CHUNK, len(rec))
+                hdr = u8[payload[lo:hi, None] + cols].view(MEP_PACKET_HEADER_DTYPE)[:, 0]
+                out = index[lo:hi]
+                for name in MEP_PACKET_HEADER_DTYPE.names:
+                    out[name] = hdr[name]
+            del u8
+    index["is_complex"] &= 1
+    index["port"] = dport
+    index["offset"] = payload
+    index["payload_len"] = plen
+    index["ts"] = ts[rec]
+    return index
+
+
+# ===== REPORT ===== #
+
+def _port_channel(port: int) -> str:
+    for ch, p in RECORDER_CHANNEL_PORTS.items():
+        if p == port:
+            return ch
+    return str(port)
+
+
+def summarize_port(index: np.ndarray, port: int, max_items: int = 20) -> dict:
+    """Gaps, rates and freq_idx transitions for one port, in capture order."""
+    rows = index[index["port"] == port]
+    out = {"port": port, "channel": _port_channel(port), "packets": len(rows)}
+    if len(rows) == 0:
+        return out
+    s = rows["sample_idx"].astype(np.int64)
+    n = rows["pkt_samples"].astype(np.int64)
+    fidx = rows["freq_idx"]
+    ts = rows["ts"]
+    num, den = int(rows["sample_rate_numerator"][0]), int(rows["sample_rate_denominator"][0])
+    fs = num / den if den else 0.0
+
+    same_tune = fidx[1:] == fidx[:-1]
+    step = s[1:] - (s[:-1] + n[:-1])
+    gap_at = np.flatnonzero(same_tune & (step > 0))
+    back_at = np.flatnonzero(same_tune & (step < 0))
+    trans_at = np.flatnonzero(~same_tune)
+
+    span_t = float(np.nanmax(ts) - np.nanmin(ts)) if np.isfinite(ts).any() else 0.0
+    samples = int(n.sum())
+    out.update({
+        "sample_rate_hz": fs,
+        "first_sample_idx": int(s[0]),
+        "last_sample_idx": int(s[-1] + n[-1]),
+        "samples": samples,
+        "capture_span_s": span_t,
+        "observed_sample_rate_hz": samples / span_t if span_t > 0 else None,
+        "packet_rate_hz": (len(rows) - 1) / span_t if span_t > 0 else None,
+        "gaps": len(gap_at),
+        "missing_samples": int(step[gap_at].sum()),
+        "backward_steps": len(back_at),
+        "freq_idx_transitions": len(trans_at),
+        "gap_list": [
+            {"sample_idx": int(s[i] + n[i]), "missing": int(step[i]), "ts": float(ts[i + 1])}
+            for i in gap_at[np.argsort(-step[gap_at], kind="stable")][:max_items]
+        ],
+        "transition_list": [
+            {"sample_idx": int(s[i + 1]), "from": int(fidx[i]), "to": int(fidx[i + 1]), "ts": float(ts[i + 1])}
+            for i in trans_at[:max_items]
+        ],
+    })
+    return out
+
+
+def print_report(path: str, index: np.ndarray, max_items: int):
+    print(f"{path}: {len(index)} MEP packets")
+    for port in sorted(np.unique(index["port"]).tolist()):
+        r = summarize_port(index, port, max_items)
+        print(f"\n== channel {r['channel']} (port {port}) ==")
+        print(f"  packets          : {r['packets']}")
+        print(f"  sample_idx       : {r['first_sample_idx']} .. {r['last_sample_idx']} ({r['samples']} samples)")
+        print(f"  header rate      : {r['sample_rate_hz'] / 1e6:.6f} MS/s")
+        if r["observed_sample_rate_hz"]:
+            print(f"  observed rate    : {r['observed_sample_rate_hz'] / 1e6:.6f} MS/s, "
+                  f"{r['packet_rate_hz']:.1f} pkt/s over {r['capture_span_s']:.3f} s")
+        print(f"  gaps             : {r['gaps']} ({r['missing_samples']} samples missing), "
+              f"backward steps: {r['backward_steps']}")
+        for g in r["gap_list"]:
+            print(f"    gap at {g['sample_idx']}: {g['missing']} samples (ts {g['ts']:.6f})")
+        print(f"  freq_idx changes : {r['freq_idx_transitions']}")
+        for t in r["transition_list"]:
+            print(f"    {t['from']} -> {t['to']} at sample_idx {t['sample_idx']} (ts {t['ts']:.6f})")
+
+
+# ===== EXTRACT ===== #
+
+def select_range(index: np.ndarray, port: int, start: int, count: int) -> np.ndarray:
+    """Packets on port overlapping [start, start + count), sorted, duplicates dropped."""
+    rows = index[index["port"] == port]
+    s = rows["sample_idx"].astype(np.int64)
+    hit = (s < start + count) & (s + rows["pkt_samples"].astype(np.int64) > start)
+    rows = rows[hit]
+    rows = rows[np.argsort(rows["sample_idx"], kind="stable")]
+    if len(rows) > 1:
+        rows = rows[np.concatenate([[True], np.diff(rows["sample_idx"].astype(np.int64)) != 0])]
+    return rows
+
+
+def _iter_payload_copies(mm, rows: np.ndarray, start: int, count: int):
+    """Yield (dst_start, dst_stop, int16 (n, nsub, 2) view) clipped to the range."""
+    for r in rows:
+        nsub = max(1, int(r["num_subchannels"]))
+        n = int(r["pkt_samples"])
+        avail = (int(r["payload_len"]) - MEP_PACKET_HEADER_BYTES) // (4 * nsub)
+        n = min(n, avail)
+        s = int(r["sample_idx"])
+        lo = max(s, start)
+        hi = min(s + n, start + count)
+        if hi <= lo:
+            continue
+        src = np.frombuffer(
+            mm, dtype="<i2", count=n * nsub * 2, offset=int(r["offset"]) + MEP_PACKET_HEADER_BYTES
+        ).reshape(n, nsub, 2)
+        yield lo - start, hi - start, src[lo - s:hi - s]
+
+
+def extract_npy(path: str, rows: np.ndarray, start: int, count: int, out_path: str) -> int:
+    """Write int16 IQ (count, num_subchannels, 2) to out_path; returns samples filled."""
+    nsub = max(1, int(rows["num_subchannels"].max())) if len(rows) else 1
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype="<i2", shape=(count, nsub, 2))
+    filled = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for lo, hi, src in _iter_payload_copies(mm, rows, start, count):
+            out[lo:hi, :src.shape[1]] = src
+            filled += hi - lo
+            del src
+    out.flush()
+    del out
+    return filled
+
+
+def extract_drf(path: str, rows: np.ndarray, start: int, count: int, out_dir: str, channel: str) -> int:
+    """Write the range into a DigitalRF channel; gaps stay gaps. Returns samples written."""
+    if digital_rf is None:
+        raise RuntimeError("digital_rf is not installed")
+    if len(rows) == 0:
+        return 0
+    nsub = max(1, int(rows["num_subchannels"].max()))
+    rate = Fraction(int(rows["sample_rate_numerator"][0]), int(rows["sample_rate_denominator"][0]) or 1)
+    cdtype = np.dtype([("r", "<i2"), ("i", "<i2")])
+    chan_dir = os.path.join(out_dir, channel)
+    os.makedirs(chan_dir, exist_ok=True)
+    writer = digital_rf.DigitalRFWriter(
+        chan_dir, cdtype, 3600, 1000, start, rate.numerator, rate.denominator,
+        is_complex=True, num_subchannels=nsub, is_continuous=False,
+    )
+    written = 0
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for lo, hi, src in _iter_payload_copies(mm, rows, start, count):
+                arr = np.ascontiguousarray(src).view(cdtype)[..., 0]
+                writer.rf_write(arr if nsub > 1 else arr[:, 0], next_sample=lo)
+                written += hi - lo
+                del src, arr
+    finally:
+        writer.close()
+    return written
+
+
+def _parse_start(text: str, index: np.ndarray, port: int) -> int:
+    """Absolute sample_idx, or '+N' relative to the port's first packet."""
+    text = text.strip()
+    if text.startswith("+"):
+        rows = index[index["port"] == port]
+        if len(rows) == 0:
+            raise ValueError(f"no packets on port {port}")
+        return int(rows["sample_idx"].min()) + int(float(text[1:]))
+    return int(float(text))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Index RFSoC MEP packets in pcap/pcapng captures.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_common(p):
+        p.add_argument("pcap", help="pcap or pcapng file")
+        p.add_argument("--ports", default="", help="Comma-separated UDP ports (default: RECORDER_CHANNEL_PORTS)")
+        p.add_argument("--save-index", default="", help="Also save the packet index as .npy")
+
+    p_rep = sub.add_parser("report", help="Gaps, rates and freq_idx transitions per port")
+    add_common(p_rep)
+    p_rep.add_argument("--max-items", type=int, default=20, help="Gaps/transitions listed per port")
+
+    p_ext = sub.add_parser("extract", help="Copy a sample range to .npy or DigitalRF")
+    add_common(p_ext)
+    p_ext.add_argument("--channel", default="A", help="Channel letter (or use --port)")
+    p_ext.add_argument("--port", type=int, default=0, help="UDP port (overrides --channel)")
+    p_ext.add_argument("--start", default="+0", help="Start sample_idx, or +N from the first packet")
+    p_ext.add_argument("--count", type=float, required=True, help="Number of samples")
+    dest = p_ext.add_mutually_exclusive_group(required=True)
+    dest.add_argument("--npy", default="", help="Output .npy (int16, shape (count, num_subchannels, 2))")
+    dest.add_argument("--drf", default="", help="Output DigitalRF top-level directory")
+    p_ext.add_argument("--drf-channel", default="", help="DigitalRF channel name (default: ch<channel>)")
+    args = ap.parse_args()
+
+    ports = [int(p) for p in args.ports.split(",") if p.strip()] or None
+    index = build_index(args.pcap, ports)
+    if args.save_index:
+        np.save(args.save_index, index)
+
+    if args.cmd == "report":
+        print_report(args.pcap, index, args.max_items)
+        return 0
+
+    channel = args.channel.strip().upper()
+    port = args.port or RECORDER_CHANNEL_PORTS.get(channel)
+    if port is None:
+        ap.error(f"unknown channel {channel!r}; choose from {sorted(RECORDER_CHANNEL_PORTS)}")
+    start = _parse_start(args.start, index, port)
+    count = int(args.count)
+    rows = select_range(index, port, start, count)
+    if args.npy:
+        filled = extract_npy(args.pcap, rows, start, count, args.npy)
+        dest_txt = args.npy
+    else:
+        drf_channel = args.drf_channel or f"ch{_port_channel(port)}"
+        filled = extract_drf(args.pcap, rows, start, count, args.drf, drf_channel)
+        dest_txt = os.path.join(args.drf, drf_channel)
+    print(f"{dest_txt}: {filled}/{count} samples from {len(rows)} packets "
+          f"(start sample_idx {start}, {count - filled} missing)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+mep_rx_fanout.py
+
+Per-channel multi-process receive supervisor for RFSoC MEP UDP streams.
+
+One Python process serializes every channel socket behind the GIL. This
+supervisor instead spawns one worker process per RECORDER_CHANNEL_PORTS port,
+optionally pinned to a core, with SO_RCVBUF raised. Each worker scatters
+datagrams straight into a shared-memory block ring (recvmsg_into: header into
+a small buffer, IQ payload into the ring slot), so sample blocks reach the
+writer without pickling or an extra copy. Blocks are contiguous sample runs;
+a sample_idx gap or retune closes the current block.
+
+The supervisor runs one writer thread per ring and, every interval, reports
+per-worker throughput, ring pressure and the kernel's per-socket drop counter
+from /proc/net/udp.
+
+Sinks:
+  null  - discard (measure receive capacity)
+  raw   - <out>/<channel>.iq (int16 IQ) + <channel>.blocks.csv (start sample_idx per block)
+  drf   - DigitalRF channel <out>/ch<channel> (requires digital_rf)
+
+Usage:
+    python3 scripts/mep_rx_fanout.py --channels A,B --cores 2,3 --sink null
+    python3 scripts/mep_rx_fanout.py --channels A --cores 4 --sink drf --out /data/captures/fanout
+"""
+
+import argparse
+import csv
+import logging
+import multiprocessing as mp
+import os
+import socket
+import sys
+import threading
+import time
+from fractions import Fraction
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    RECORDER_CHANNEL_PORTS,
+    MEP_PACKET_HEADER_BYTES,
+    MEP_PACKET_HEADER_STRUCT,
+)
+
+try:
+    import digital_rf
+except Exception:  # pragma: no cover - only needed for --sink drf.
+    digital_rf = None
+
+DEFAULT_RCVBUF_BYTES = 64 * 1024 * 1024
+DEFAULT_BLOCK_SAMPLES = 1 << 20
+DEFAULT_RING_SLOTS = 32
+MAX_UDP_PAYLOAD = 65507
+SO_RCVBUFFORCE = getattr(socket, "SO_RCVBUFFORCE", 33)
+IQ_BYTES_PER_SAMPLE = 4  # complex int16, one subchannel
+
+# Per-worker counters in shared memory (uint64 slots).
+STAT_FIELDS = ("packets", "bytes", "samples", "blocks", "ring_full", "gaps", "truncated", "retunes")
+_STAT = {name: i for i, name in enumerate(STAT_FIELDS)}
+
+# Ring control words: [write_seq, read_seq].
+_CTRL_WORDS = 2
+SLOT_META_DTYPE = np.dtype([
+    ("start_sample_idx", "<u8"),
+    ("n_samples", "<u8"),
+    ("freq_idx", "<u4"),
+    ("sample_rate_numerator", "<u8"),
+    ("sample_rate_denominator", "<u8"),
+])
+
+
+# ===== SHARED-MEMORY RING ===== #
+
+class SharedBlockRing:
+    """Single-producer / single-consumer ring of sample blocks in shared memory.
+
+    Layout: control words, per-slot metadata, then n_slots x block_bytes of IQ.
+    The filled-slot semaphore both wakes the consumer and orders the producer's
+    slot writes before the consumer's reads.
+    """
+
+    def __init__(self, n_slots: int, block_samples: int, name: str = None, filled=None):
+        self.n_slots = n_slots
+        self.block_samples = block_samples
+        self.block_bytes = block_samples * IQ_BYTES_PER_SAMPLE
+        ctrl_bytes = _CTRL_WORDS * 8
+        meta_bytes = n_slots * SLOT_META_DTYPE.itemsize
+        self._data_offset = -(-(ctrl_bytes + meta_bytes) // 64) * 64
+        size = self._data_offset + n_slots * self.block_bytes
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.filled = filled
+        buf = self.shm.buf
+        self.ctrl = np.ndarray((_CTRL_WORDS,), dtype=np.uint64, buffer=buf)
+        self.meta = np.ndarray((n_slots,), dtype=SLOT_META_DTYPE, buffer=buf, offset=ctrl_bytes)
+        self.data = np.ndarray(
+            (n_slots, self.block_bytes), dtype=np.uint8, buffer=buf, offset=self._data_offset
+        )
+        if self.owner:
+            self.ctrl[:] = 0
+
+    def spec(self) -> dict:
+        """Arguments for re-attaching in a worker process."""
+        return {"n_slots": self.n_slots, "block_samples": self.block_samples, "name": self.shm.name}
+
+    # ---- producer ---- #
+
+    def free_slot(self):
+        """Index of the next writable slot, or None when the consumer is behind."""
+        w, r = int(self.ctrl[0]), int(self.ctrl[1])
+        if w - r >= self.n_slots:
+            return None
+        return w % self.n_slots
+
+    def commit(self):
+        self.ctrl[0] += 1
+        self.filled.release()
+
+    # ---- consumer ---- #
+
+    def wait_block(self, timeout: float):
+        """Return (meta record, int16 (n, 2) view) of the oldest block, or None."""
+        if not self.filled.acquire(timeout=timeout):
+            return None
+        slot = int(self.ctrl[1]) % self.n_slots
+        meta = self.meta[slot].copy()
+        n = int(meta["n_samples"])
+        iq = self.data[slot, : n * IQ_BYTES_PER_SAMPLE].view("<i2").reshape(n, 2)
+        return meta, iq
+
+    def release(self):
+        self.ctrl[1] += 1
+
+    def pending(self) -> int:
+        return int(self.ctrl[0]) - int(self.ctrl[1])
+
+    def close(self):
+        del self.ctrl, self.meta, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ===== WORKER ===== #
+
+def _open_socket(port: int, bind_addr: str, rcvbuf: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        # Bypasses net.core.rmem_max when running with CAP_NET_ADMIN.
+        sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, rcvbuf)
+    except OSError:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.bind((bind_addr, port))
+    sock.settimeout(0.2)
+    return sock
+
+
+def receive_worker(channel: str, port: int, core, bind_addr: str, rcvbuf: int,
+                   ring_spec: dict, filled, stats_name: str, stats_row: int, stop):
+    """Worker process body: receive one port into its block ring."""
+    if core is not None:
+        try:
+            os.sched_setaffinity(0, {core})
+        except (AttributeError, OSError) as e:
+            logging.warning("Channel %s: could not pin to core %s: %s", channel, core, e)
+    ring = SharedBlockRing(filled=filled, **ring_spec)
+    stats_shm = shared_memory.SharedMemory(name=stats_name)
+    stats = np.ndarray((len(STAT_FIELDS),), dtype=np.uint64, buffer=stats_shm.buf,
+                       offset=stats_row * len(STAT_FIELDS) * 8)
+    sock = _open_socket(port, bind_addr, rcvbuf)
+    granted = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    logging.info("Channel %s: port %d, core %s, SO_RCVBUF %d", channel, port, core, granted)
+
+    hdr = bytearray(MEP_PACKET_HEADER_BYTES)
+    scratch = memoryview(bytearray(MAX_UDP_PAYLOAD))
+    unpack = MEP_PACKET_HEADER_STRUCT.unpack_from
+    msg_trunc = socket.MSG_TRUNC
+    block_bytes = ring.block_bytes
+
+    slot = None        # slot being filled
+    fill = 0           # bytes filled in slot
+    expected = None    # next contiguous sample_idx
+    freq_idx = None
+    room = MAX_UDP_PAYLOAD
+    slot_view = None
+
+    def close_block(counts):
+        nonlocal slot, fill, slot_view
+        if slot is not None and fill:
+            ring.meta["n_samples"][slot] = fill // IQ_BYTES_PER_SAMPLE
+            ring.commit()
+            counts[_STAT["blocks"]] += 1
+        slot, fill, slot_view = None, 0, None
+
+    try:
+        while not stop.is_set():
+            if slot is not None and block_bytes - fill < room:
+                close_block(stats)  # next packet may not fit
+            if slot is None:
+                slot = ring.free_slot()
+                if slot is not None:
+                    slot_view = memoryview(ring.data[slot])
+            # Ring full: keep the socket drained, count the dropped packets.
+            target = slot_view[fill:] if slot is not None else scratch
+            try:
+                nbytes, _anc, flags, _addr = sock.recvmsg_into([hdr, target])
+            except socket.timeout:
+                continue
+            finally:
+                target = None
+            if nbytes < MEP_PACKET_HEADER_BYTES:
+                continue
+            payload = nbytes - MEP_PACKET_HEADER_BYTES
+            stats[_STAT["packets"]] += 1
+            stats[_STAT["bytes"]] += nbytes
+            if flags & msg_trunc:
+                stats[_STAT["truncated"]] += 1
+                room = MAX_UDP_PAYLOAD
+                close_block(stats)
+                expected = None
+                continue
+            room = payload
+            sample_idx, sr_num, sr_den, f_idx, _nsub, _pkt_samples, _bits, _cplx = unpack(hdr)
+            n = payload // IQ_BYTES_PER_SAMPLE
+            stats[_STAT["samples"]] += n
+            if slot is None:
+                stats[_STAT["ring_full"]] += 1
+                expected = None
+                continue
+
+            contiguous = expected is not None and sample_idx == expected and f_idx == freq_idx
+            if fill and not contiguous:
+                if f_idx != freq_idx:
+                    stats[_STAT["retunes"]] += 1
+                else:
+                    stats[_STAT["gaps"]] += 1
+                # New run starts mid-slot: move its payload to a fresh block.
+                tail = bytes(slot_view[fill:fill + payload])
+                close_block(stats)
+                slot = ring.free_slot()
+                if slot is None:
+                    stats[_STAT["ring_full"]] += 1
+                    expected = None
+                    continue
+                slot_view = memoryview(ring.data[slot])
+                slot_view[:payload] = tail
+            if fill == 0:
+                meta = ring.meta
+                meta["start_sample_idx"][slot] = sample_idx
+                meta["freq_idx"][slot] = f_idx
+                meta["sample_rate_numerator"][slot] = sr_num
+                meta["sample_rate_denominator"][slot] = sr_den
+                meta = None
+            fill += payload
+            expected = sample_idx + n
+            freq_idx = f_idx
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_block(stats)
+        sock.close()
+        stats = None   # release the view of stats_shm.buf before closing it
+        stats_shm.close()
+        ring.close()
+
+
+# ===== SINKS ===== #
+
+class NullSink:
+    def write(self, meta, iq):
+        pass
+
+    def close(self):
+        pass
+
+
+class RawSink:
+    """Append int16 IQ to <channel>.iq and log each block start to a CSV sidecar."""
+
+    def __init__(self, out_dir: str, channel: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self._f = open(os.path.join(out_dir, f"{channel}.iq"), "ab")
+        self._csv_file = open(os.path.join(out_dir, f"{channel}.blocks.csv"), "a", newline="")
+        self._csv = csv.writer(self._csv_file)
+        self._offset = self._f.tell() // IQ_BYTES_PER_SAMPLE
+        if self._offset == 0:
+            self._csv.writerow(["file_sample", "start_sample_idx", "n_samples", "freq_idx", "sample_rate_hz"])
+
+    def write(self, meta, iq):
+        den = int(meta["sample_rate_denominator"]) or 1
+        self._csv.writerow([
+            self._offset, int(meta["start_sample_idx"]), len(iq), int(meta["freq_idx"]),
+            int(meta["sample_rate_numerator"]) / den,
+        ])
+        self._f.write(iq)
+        self._offset += len(iq)
+
+    def close(self):
+        self._f.close()
+        self._csv_file.close()
+
+
+class DrfSink:
+    """Write blocks into a DigitalRF channel; gaps between blocks stay gaps."""
+
+    def __init__(self, out_dir: str, channel: str):
+        if digital_rf is None:
+            raise RuntimeError("digital_rf is not installed")
+        self._dir = os.path.join(out_dir, f"ch{channel}")
+        os.makedirs(self._dir, exist_ok=True)
+        self._writer = None
+        self._start = 0
+        self._cdtype = np.dtype([("r", "<i2"), ("i", "<i2")])
+
+    def write(self, meta, iq):
+        start = int(meta["start_sample_idx"])
+        if self._writer is None:
+            rate = Fraction(int(meta["sample_rate_numerator"]), int(meta["sample_rate_denominator"]) or 1)
+            self._writer = digital_rf.DigitalRFWriter(
+                self._dir, self._cdtype, 3600, 1000, start, rate.numerator, rate.denominator,
+                is_complex=True, num_subchannels=1, is_continuous=False,
+            )
+            self._start = start
+        if start < self._start:
+            return  # DigitalRF is append-only
+        self._writer.rf_write(iq.view(self._cdtype)[:, 0], next_sample=start - self._start)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _make_sink(kind: str, out_dir: str, channel: str):
+    if kind == "raw":
+        return RawSink(out_dir, channel)
+    if kind == "drf":
+        return DrfSink(out_dir, channel)
+    return NullSink()
+
+
+def writer_loop(ring: SharedBlockRing, sink, stop: threading.Event, written: list):
+    """Drain one ring into its sink until stopped and empty."""
+    while True:
+        block = ring.wait_block(timeout=0.2)
+        if block is None:
+            if stop.is_set():
+                return
+            continue
+        meta, iq = block
+        try:
+            sink.write(meta, iq)
+            written[0] += len(iq)
+        except Exception:
+            logging.exception("Sink write failed")
+        finally:
+            del iq
+            ring.release()
+
+
+# ===== /proc/net/udp ===== #
+
+def read_udp_socket_counters(ports) -> dict:
+    """Return {port: {'drops': n, 'rx_queue': bytes}} summed over /proc/net/udp{,6}."""
+    out = {p: {"drops": 0, "rx_queue": 0} for p in ports}
+    for path in ("/proc/net/udp", "/proc/net/udp6"):
+        try:
+            with open(path) as f:
+                next(f, None)
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 13:
+                        continue
+                    port = int(parts[1].rsplit(":", 1)[1], 16)
+                    if port in out:
+                        out[port]["drops"] += int(parts[12])
+                        out[port]["rx_queue"] += int(parts[4].split(":")[1], 16)
+        except OSError:
+            continue
+    return out
+
+
+# ===== SUPERVISOR ===== #
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-channel multi-process MEP UDP receive fan-out.")
+    ap.add_argument("--channels", default="A", help="Comma-separated channels")
+    ap.add_argument("--cores", default="", help="Comma-separated core per channel (default: unpinned)")
+    ap.add_argument("--bind", default="0.0.0.0", help="Bind address")
+    ap.add_argument("--rcvbuf", type=int, default=DEFAULT_RCVBUF_BYTES, help="SO_RCVBUF bytes per socket")
+    ap.add_argument("--block-samples", type=int, default=DEFAULT_BLOCK_SAMPLES, help="Samples per ring block")
+    ap.add_argument("--slots", type=int, default=DEFAULT_RING_SLOTS, help="Blocks per ring")
+    ap.add_argument("--sink", choices=("null", "raw", "drf"), default="null")
+    ap.add_argument("--out", default="", help="Output directory for raw/drf sinks")
+    ap.add_argument("--interval", type=float, default=1.0, help="Report interval in seconds")
+    ap.add_argument("--duration", type=float, default=0.0, help="Seconds to run (0 = until Ctrl-C)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    channels = [c.strip().upper() for c in args.channels.split(",") if c.strip()]
+    for ch in channels:
+        if ch not in RECORDER_CHANNEL_PORTS:
+            ap.error(f"unknown channel {ch!r}; choose from {sorted(RECORDER_CHANNEL_PORTS)}")
+    cores = [int(c) for c in args.cores.split(",") if c.strip()]
+    if cores and len(cores) != len(channels):
+        ap.error("--cores needs one core per channel")
+    if args.sink != "null" and not args.out:
+        ap.error("--out is required for raw/drf sinks")
+
+    ctx = mp.get_context("fork")
+    stop_workers = ctx.Event()
+    stats_shm = shared_memory.SharedMemory(create=True, size=len(channels) * len(STAT_FIELDS) * 8)
+    stats = np.ndarray((len(channels), len(STAT_FIELDS)), dtype=np.uint64, buffer=stats_shm.buf)
+    stats[:] = 0
+
+    rings, procs = [], []
+    for i, ch in enumerate(channels):
+        ring = SharedBlockRing(args.slots, args.block_samples, filled=ctx.Semaphore(0))
+        rings.append(ring)
+        proc = ctx.Process(
+            target=receive_worker,
+            name=f"rx-{ch}",
+            args=(ch, RECORDER_CHANNEL_PORTS[ch], cores[i] if cores else None, args.bind, args.rcvbuf,
+                  ring.spec(), ring.filled, stats_shm.name, i, stop_workers),
+            daemon=True,
+        )
+        proc.start()
+        procs.append(proc)
+
+    stop_writers = threading.Event()
+    sinks, writers, written = [], [], []
+    for ch, ring in zip(channels, rings):
+        sink = _make_sink(args.sink, args.out, ch)
+        count = [0]
+        t = threading.Thread(target=writer_loop, args=(ring, sink, stop_writers, count),
+                             name=f"writer-{ch}", daemon=True)
+        t.start()
+        sinks.append(sink)
+        writers.append(t)
+        written.append(count)
+
+    ports = [RECORDER_CHANNEL_PORTS[ch] for ch in channels]
+    base_drops = {p: c["drops"] for p, c in read_udp_socket_counters(ports).items()}
+    prev = stats.copy()
+    t_prev = time.monotonic()
+    t_stop = t_prev + args.duration if args.duration > 0 else float("inf")
+    try:
+        while time.monotonic() < t_stop and any(p.is_alive() for p in procs):
+            time.sleep(min(args.interval, max(0.0, t_stop - time.monotonic())))
+            now = time.monotonic()
+            dt = max(now - t_prev, 1e-9)
+            cur = stats.copy()
+            delta = cur - prev
+            counters = read_udp_socket_counters(ports)
+            for i, ch in enumerate(channels):
+                d = dict(zip(STAT_FIELDS, delta[i].tolist()))
+                c = counters[ports[i]]
+                print(
+                    f"{ch}: {d['samples'] / dt / 1e6:7.2f} MS/s {d['bytes'] * 8 / dt / 1e9:5.2f} Gb/s "
+                    f"pkts={d['packets']} blocks={d['blocks']} ring={rings[i].pending()}/{args.slots} "
+                    f"ring_full={int(cur[i, _STAT['ring_full']])} gaps={int(cur[i, _STAT['gaps']])} "
+                    f"retunes={int(cur[i, _STAT['retunes']])} trunc={int(cur[i, _STAT['truncated']])} "
+                    f"sock_drops={c['drops'] - base_drops.get(ports[i], 0)} rx_queue={c['rx_queue']} "
+                    f"written={written[i][0]}",
+                    flush=True,
+                )
+            prev, t_prev = cur, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers.set()
+        for p in procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        stop_writers.set()
+        for t in writers:
+            t.join(timeout=5.0)
+        for sink in sinks:
+            sink.close()
+        for ring in rings:
+            ring.close()
+        del stats
+        stats_shm.close()
+        stats_shm.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
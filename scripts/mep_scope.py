@@ -35,6 +35,12 @@ try:
 except Exception:  # pragma: no cover - metadata display is optional.
     h5py = None
 
+try:
+    from PIL import Image, ImageTk
+except Exception:  # pragma: no cover - raster falls back to Tk's PPM loader.
+    Image = None
+    ImageTk = None
+
 try:
     from digital_rf import DigitalRFReader
 except Exception as exc:  # pragma: no cover - handled at runtime in the GUI.
@@ -55,6 +61,11 @@ DEFAULT_LAG_MS = 100.0
 CHANNEL_OPTIONS = ("A", "B", "C", "D")
 SR_DIR_RE = re.compile(r"^sr(\d+(?:\.\d+)?)MHz$")
 TRIGGER_OPTIONS = ("Free Run", "I Rising", "I Falling", "Q Rising", "Q Falling", "Mag Rising", "Mag Falling")
+SCOPE_BACKGROUND = "#101010"
+# Plot-area grid colours (divisions, frame, zero line), shared by the canvas
+# grid and the raster trace layer's background.
+SCOPE_GRID_COLORS = ("#222222", "#444444", "#555555")
+PLOT_PAD = (56, 12, 18, 34)  # left, right, top, bottom
 
 
 @dataclass(frozen=True)
@@ -241,13 +252,62 @@ def _find_trigger_index(i_values, q_values, cfg: ScopeConfig):
         values = q_values
     elif mode.startswith("Mag "):
         if np is not None:
-            values = np.hypot(np.asarray(i_values), np.asarray(q_values))
+            values = np.hypot(np.asarray(i_values, dtype=np.float64), np.asarray(q_values, dtype=np.float64))
         else:
             values = [math.hypot(float(i), float(q)) for i, q in zip(i_values, q_values)]
     else:
         values = i_values
     rising = mode.endswith("Rising")
-    level = cfg.trigger_level
+    if np is not None:
+        return _find_trigger_index_np(np.asarray(values, dtype=np.float64), rising, cfg.trigger_level)
+    return _find_trigger_index_py(values, rising, cfg.trigger_level)
+
+
+def _find_trigger_index_np(values, rising: bool, level: float):
+    """Vectorized _find_trigger_index_py: same hysteresis, edge and fallback semantics.
+
+    The armed/fire state machine reduces to index arithmetic: every sample on
+    the arming side of the band arms, and the first firing-side sample after
+    it fires and disarms. So the last trigger is the first firing sample after
+    the last arming sample that precedes the last firing sample.
+    """
+    n = len(values)
+    if n < 2:
+        return None
+
+    finite = np.isfinite(values)
+    finite_vals = values[finite]
+    if finite_vals.size:
+        hysteresis = max(float(finite_vals.max() - finite_vals.min()) * 0.005, 1e-12)
+    else:
+        hysteresis = 1e-12
+
+    if rising:
+        arm = finite & (values <= level - hysteresis)
+        fire = finite & (values >= level + hysteresis)
+    else:
+        arm = finite & (values >= level + hysteresis)
+        fire = finite & (values <= level - hysteresis)
+    fire_idx = np.flatnonzero(fire)
+    if fire_idx.size:
+        arm_idx = np.flatnonzero(arm[:fire_idx[-1]])
+        if arm_idx.size:
+            return int(fire_idx[np.searchsorted(fire_idx, arm_idx[-1])])
+
+    # Fallback for very small windows or very small signals where hysteresis
+    # never arms. Keep the selected edge direction explicit.
+    prev_v = values[:-1]
+    cur_v = values[1:]
+    ok = finite[:-1] & finite[1:]
+    if rising:
+        edge = ok & (prev_v < level) & (level <= cur_v) & (cur_v > prev_v)
+    else:
+        edge = ok & (prev_v > level) & (level >= cur_v) & (cur_v < prev_v)
+    edge_idx = np.flatnonzero(edge)
+    return int(edge_idx[-1]) + 1 if edge_idx.size else None
+
+
+def _find_trigger_index_py(values, rising: bool, level: float):
     n = len(values)
     if n < 2:
         return None
@@ -315,6 +375,64 @@ def _find_trigger_index(i_values, q_values, cfg: ScopeConfig):
     return None
 
 
+def _hex_rgb(color: str) -> tuple[int, int, int]:
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def _envelope_spans(values, plot_w: int, plot_h: int, ymin: float, ymax: float):
+    """Per-column pixel row spans [top, bottom] of a trace drawn as a polyline.
+
+    Sample idx maps to column idx * plot_w // (n - 1), as in _draw_trace. Each
+    column covers the min/max of its finite samples (reduceat, so no glitch
+    between columns is lost) plus its share of the segment joining it to the
+    neighbouring columns. Columns with nothing to draw get top > bottom.
+    """
+    ncol = plot_w + 1
+    top = np.full(ncol, plot_h + 1, dtype=np.int64)
+    bottom = np.full(ncol, -1, dtype=np.int64)
+    v = np.asarray(values, dtype=np.float64).ravel()
+    n = v.size
+    if n <= 1:
+        return top, bottom
+    idx = np.flatnonzero(np.isfinite(v))
+    if idx.size == 0:
+        return top, bottom
+
+    yrange = ymax - ymin if ymax > ymin else 1.0
+    y = (1.0 - np.clip((v[idx] - ymin) / yrange, 0.0, 1.0)) * plot_h
+    col = idx * plot_w // max(1, n - 1)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(col)) + 1))
+    cols = col[starts]
+    lo = np.full(ncol, np.inf)
+    hi = np.full(ncol, -np.inf)
+    lo[cols] = np.minimum.reduceat(y, starts)
+    hi[cols] = np.maximum.reduceat(y, starts)
+
+    if cols.size > 1:
+        # Segment k joins the last sample of column xa to the first of column xb;
+        # column x gets the part of it over [x - 0.5, x + 0.5].
+        xa = cols[:-1]
+        xb = cols[1:]
+        ya = y[starts[1:] - 1]
+        yb = y[starts[1:]]
+        lens = xb - xa + 1
+        seg = np.repeat(np.arange(xa.size), lens)
+        x = xa[seg] + np.arange(seg.size) - np.repeat(np.cumsum(lens) - lens, lens)
+        span = (xb - xa)[seg].astype(np.float64)
+        t0 = (np.maximum(x - 0.5, xa[seg]) - xa[seg]) / span
+        t1 = (np.minimum(x + 0.5, xb[seg]) - xa[seg]) / span
+        dy = (yb - ya)[seg]
+        y0 = ya[seg] + dy * t0
+        y1 = ya[seg] + dy * t1
+        np.minimum.at(lo, x, np.minimum(y0, y1))
+        np.maximum.at(hi, x, np.maximum(y0, y1))
+
+    drawn = np.isfinite(lo)
+    top[drawn] = np.floor(lo[drawn]).astype(np.int64)
+    bottom[drawn] = np.floor(hi[drawn]).astype(np.int64)
+    return top, bottom
+
+
 def _latest_read_range(reader, cfg: ScopeConfig):
     bounds_start, bounds_end = reader.get_bounds(cfg.drf_channel)
     if bounds_end <= bounds_start:
@@ -353,6 +471,62 @@ def _latest_read_range(reader, cfg: ScopeConfig):
     return bounds_start, bounds_end, best_start, best_len
 
 
+class SampleRing:
+    """Most recent contiguous samples as I/Q/Mag columns, filled from the tail.
+
+    Absolute sample k lives at column position k - offset. Appends only write
+    past the current end, and growing, compacting or resetting moves to a fresh
+    buffer instead of shifting in place, so views handed out earlier (e.g. in
+    a TraceSnapshot the GUI is still drawing) are never overwritten.
+    """
+
+    def __init__(self):
+        self.start = 0
+        self.end = 0
+        self._offset = 0
+        self._cols = None
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def reset(self, start: int):
+        self.start = self.end = start
+        self._offset = start
+        self._cols = None
+
+    def trim(self, start: int):
+        """Forget samples before start (storage is reclaimed at the next compaction)."""
+        self.start = min(max(self.start, start), self.end)
+
+    def append(self, samples, min_capacity: int = 0):
+        arr = np.asarray(samples).ravel()
+        n = arr.size
+        if n == 0:
+            return
+        dtype = np.real(arr[:1]).dtype
+        if self._cols is None or self._cols[0].dtype != dtype or self.end - self._offset + n > len(self._cols[0]):
+            keep = self.end - self.start
+            capacity = max(2 * (keep + n), min_capacity)
+            cols = tuple(np.empty(capacity, dtype=dtype) for _ in range(3))
+            if keep and self._cols is not None:
+                a = self.start - self._offset
+                for new, old in zip(cols, self._cols):
+                    new[:keep] = old[a:a + keep]
+            self._cols = cols
+            self._offset = self.start
+        a = self.end - self._offset
+        i_col, q_col, mag_col = self._cols
+        i_col[a:a + n] = np.real(arr)
+        q_col[a:a + n] = np.imag(arr)
+        np.abs(arr, out=mag_col[a:a + n])
+        self.end += n
+
+    def view(self, start: int, end: int):
+        """(i, q, mag) views of [start, end), which must lie inside [self.start, self.end]."""
+        a, b = start - self._offset, end - self._offset
+        return tuple(col[a:b] for col in self._cols)
+
+
 class DigitalRFScopeReader(threading.Thread):
     def __init__(self, out_queue: queue.Queue):
         super().__init__(daemon=True, name="digitalrf_scope_reader")
@@ -365,6 +539,9 @@ class DigitalRFScopeReader(threading.Thread):
         self._last_read_end = None
         self._metadata_last_check = 0.0
         self._metadata_center_frequency_hz = None
+        self._ring = SampleRing() if np is not None else None
+        self._ring_min_capacity = 0
+        self._last_window = None
 
     def stop(self):
         self._stop_event.set()
@@ -400,6 +577,9 @@ class DigitalRFScopeReader(threading.Thread):
             self._last_read_end = None
             self._metadata_last_check = 0.0
             self._metadata_center_frequency_hz = None
+            if self._ring is not None:
+                self._ring.reset(0)
+            self._last_window = None
 
         bounds_start, bounds_end, read_start, read_len = _latest_read_range(self._reader, cfg)
         read_end = read_start + read_len
@@ -408,32 +588,34 @@ class DigitalRFScopeReader(threading.Thread):
             time.sleep(max(0.05, cfg.refresh_ms / 1000.0))
             return
 
-        samples = self._reader.read_vector(read_start, read_len, cfg.drf_channel)
-        i_values, q_values, mag_values = _to_iq_arrays(samples)
+        position_samples = int(round(cfg.sample_rate_hz * cfg.horizontal_position_ms / 1000.0))
+        if self._ring is not None:
+            # Keep the search window plus room for a display window that starts
+            # before it; twice that so compaction is rare.
+            self._ring.trim(read_start - abs(position_samples))
+            self._ring_min_capacity = 2 * (read_len + abs(position_samples) + cfg.window_samples)
+        i_values, q_values, mag_values = self._window(cfg, read_start, read_end)
 
         triggered = False
         if cfg.trigger_mode != "Free Run":
             trigger_idx = _find_trigger_index(i_values, q_values, cfg)
             if trigger_idx is not None:
                 trigger_abs = read_start + trigger_idx
-                position_samples = int(round(cfg.sample_rate_hz * cfg.horizontal_position_ms / 1000.0))
                 display_start = max(bounds_start, trigger_abs - position_samples)
                 display_end = min(bounds_end, display_start + cfg.window_samples)
                 display_start = max(bounds_start, display_end - cfg.window_samples)
                 if display_end > display_start:
-                    samples = self._reader.read_vector(display_start, display_end - display_start, cfg.drf_channel)
-                    i_values, q_values, mag_values = _to_iq_arrays(samples)
+                    i_values, q_values, mag_values = self._window(cfg, display_start, display_end)
                     read_start = display_start
                     read_end = display_end
                     triggered = True
 
         if cfg.trigger_mode == "Free Run" or not triggered:
-            position_samples = max(0, int(round(cfg.sample_rate_hz * cfg.horizontal_position_ms / 1000.0)))
+            position_samples = max(0, position_samples)
             display_end = max(bounds_start + 1, bounds_end - int(round(cfg.sample_rate_hz * cfg.lag_ms / 1000.0)) - position_samples)
             display_start = max(bounds_start, display_end - cfg.window_samples)
             if display_start != read_start or display_end != read_end:
-                samples = self._reader.read_vector(display_start, display_end - display_start, cfg.drf_channel)
-                i_values, q_values, mag_values = _to_iq_arrays(samples)
+                i_values, q_values, mag_values = self._window(cfg, display_start, display_end)
                 read_start = display_start
                 read_end = display_end
 
@@ -463,6 +645,39 @@ class DigitalRFScopeReader(threading.Thread):
         )
         time.sleep(max(0.05, cfg.refresh_ms / 1000.0))
 
+    def _window(self, cfg: ScopeConfig, start: int, end: int):
+        """(i, q, mag) for samples [start, end), reading only what the ring lacks.
+
+        With numpy the result is a view into the ring: a window that overlaps
+        what is held costs a read of just the new tail, a short gap inside the
+        same continuous block is read through to keep the held samples, and a
+        window that starts before the ring or after a larger or discontinuous
+        gap resets it. Without numpy each distinct window is read and
+        converted in full.
+        """
+        ring = self._ring
+        if ring is None:
+            if self._last_window is None or self._last_window[0] != (start, end):
+                samples = self._reader.read_vector(start, end - start, cfg.drf_channel)
+                self._last_window = ((start, end), _to_iq_arrays(samples))
+            return self._last_window[1]
+
+        if start > ring.end and self._can_bridge(cfg, ring, start):
+            pass   # [ring.end, start) is read below along with the window
+        elif not ring.start <= start <= ring.end:
+            ring.reset(start)
+        if end > ring.end:
+            samples = self._reader.read_vector(ring.end, end - ring.end, cfg.drf_channel)
+            ring.append(samples, self._ring_min_capacity)
+        return ring.view(start, end)
+
+    def _can_bridge(self, cfg: ScopeConfig, ring: SampleRing, start: int) -> bool:
+        """True when [ring.end, start) is short and continuous with what the ring holds."""
+        if len(ring) == 0 or start - ring.end > self._ring_min_capacity // 2:
+            return False
+        blocks = self._reader.get_continuous_blocks(ring.end - 1, start, cfg.drf_channel)
+        return len(blocks) == 1 and sum(int(n) for n in blocks.values()) == start - ring.end + 2
+
 
 class MEPScopeGui:
     def __init__(self, root: tk.Tk, args):
@@ -502,6 +717,19 @@ class MEPScopeGui:
         self._reader.start()
         self._settings_update_after = None
         self._suppress_var_update = False
+        # Static layer (grid, axis labels, legend) is redrawn only when its key
+        # changes; the trace layer is one persistent image updated in place.
+        self._grid_key = None
+        self._legend_key = None
+        self._duration_items = ()
+        self._trace_index = None
+        self._trace_scratch = None
+        self._trace_mask = None
+        self._trace_rows = None
+        self._trace_background = None
+        self._trace_background_key = None
+        self._trace_photo = None
+        self._trace_item = None
 
         self._build_ui()
         self._refresh_buffer_names(select_current=True)
@@ -643,7 +871,7 @@ class MEPScopeGui:
             row=2, column=0, sticky="ew", padx=5, pady=4
         )
 
-        self._canvas = tk.Canvas(self.root, background="#101010", highlightthickness=1, highlightbackground="#333333")
+        self._canvas = tk.Canvas(self.root, background=SCOPE_BACKGROUND, highlightthickness=1, highlightbackground="#333333")
         self._canvas.grid(row=1, column=0, sticky="nsew", padx=8, pady=4)
         self._canvas.bind("<Configure>", lambda _event: self._render_latest())
         self._canvas.bind("<Motion>", self._cursor_update)
@@ -810,16 +1038,16 @@ class MEPScopeGui:
         if snap is None or not hasattr(self, "_canvas"):
             return
 
-        self._canvas.delete("all")
         w = max(20, self._canvas.winfo_width())
         h = max(20, self._canvas.winfo_height())
-        pad_l, pad_r, pad_t, pad_b = 56, 12, 18, 34
+        pad_l, pad_r, pad_t, pad_b = PLOT_PAD
         plot_w = max(1, w - pad_l - pad_r)
         plot_h = max(1, h - pad_t - pad_b)
 
         traces = self._selected_traces(snap)
         n = max((len(values) for _label, _color, values in traces), default=0)
         if n <= 1:
+            self._clear_trace_layer()
             self._vars["status"].set("Not enough samples to render")
             return
 
@@ -835,24 +1063,118 @@ class MEPScopeGui:
         ymin = -span / 2.0
         ymax = span / 2.0
 
-        self._draw_grid(w, h, pad_l, pad_r, pad_t, pad_b, ymin, ymax)
-        for _label, color, values in traces:
-            self._draw_trace(values, color, pad_l, pad_t, plot_w, plot_h, ymin, ymax)
+        grid_key = (w, h, ymin, ymax)
+        if grid_key != self._grid_key:
+            self._canvas.delete("grid")
+            self._draw_grid(w, h, pad_l, pad_r, pad_t, pad_b, ymin, ymax)
+            self._canvas.create_text(pad_l, h - 18, anchor="sw", fill="#aaaaaa", text="0", tags="grid")
+            self._duration_items = (
+                self._canvas.create_text(w - 8, 6, anchor="ne", fill="#aaaaaa", tags="grid"),
+                self._canvas.create_text(w - pad_r, h - 18, anchor="se", fill="#aaaaaa", tags="grid"),
+            )
+            self._grid_key = grid_key
+        legend_key = tuple((label, color) for label, color, _values in traces)
+        if legend_key != self._legend_key:
+            self._canvas.delete("legend")
+            x_label = 8
+            for label, color in legend_key:
+                self._canvas.create_text(
+                    x_label, 6, anchor="nw", fill=color, text=label,
+                    font=("TkDefaultFont", 9, "bold"), tags="legend",
+                )
+                x_label += 34
+            self._legend_key = legend_key
+
+        if np is not None:
+            self._raster_traces(traces, pad_l, pad_t, plot_w, plot_h, ymin, ymax)
+        else:
+            self._canvas.delete("trace")
+            for _label, color, values in traces:
+                self._draw_trace(values, color, pad_l, pad_t, plot_w, plot_h, ymin, ymax)
 
         duration_ms = (snap.end_index - snap.start_index) / snap.sample_rate_hz * 1000.0
-        x_label = 8
-        for label, color, _values in traces:
-            self._canvas.create_text(x_label, 6, anchor="nw", fill=color, text=label, font=("TkDefaultFont", 9, "bold"))
-            x_label += 34
-        self._canvas.create_text(w - 8, 6, anchor="ne", fill="#aaaaaa", text=f"{duration_ms:.3f} ms")
-        self._canvas.create_text(pad_l, h - 18, anchor="sw", fill="#aaaaaa", text="0")
-        self._canvas.create_text(w - pad_r, h - 18, anchor="se", fill="#aaaaaa", text=f"{duration_ms:.3f} ms")
+        for item in self._duration_items:
+            self._canvas.itemconfigure(item, text=f"{duration_ms:.3f} ms")
 
         self._vars["status"].set(
             f"{snap.top_level_dir}/{snap.channel}  bounds=[{snap.bounds_start}, {snap.bounds_end})  "
             f"display=[{snap.start_index}, {snap.end_index})  samples={n}"
         )
 
+    def _raster_traces(self, traces, pad_l, pad_t, plot_w, plot_h, ymin, ymax):
+        """Paint min/max envelopes of all traces into the persistent trace image.
+
+        The image is opaque, so it carries its own copy of the plot-area grid
+        and sits above the canvas "grid" items, with traces over the grid.
+        """
+        height, width = plot_h + 1, plot_w + 1
+        if self._trace_index is None or self._trace_index.shape != (width, height):
+            # Column-major so each column's span is one contiguous run.
+            self._trace_index = np.empty((width, height), dtype=np.uint8)
+            self._trace_scratch = np.empty((width, height), dtype=np.int16)
+            self._trace_mask = np.empty((width, height), dtype=bool)
+            self._trace_rows = np.arange(height, dtype=np.int16)[None, :]
+            self._trace_photo = None
+        index = self._trace_index
+        np.copyto(index, self._grid_background(plot_w, plot_h, ymin, ymax))
+        palette = [SCOPE_BACKGROUND, *SCOPE_GRID_COLORS]
+        for _label, color, values in traces:
+            top, bottom = _envelope_spans(values, plot_w, plot_h, ymin, ymax)
+            # row - top, read as unsigned, is <= bottom - top only inside the span
+            # (empty columns have top past the last row, so nothing matches).
+            span = np.maximum(bottom - top, 0).astype(np.uint16)
+            np.subtract(self._trace_rows, top.astype(np.int16)[:, None], out=self._trace_scratch)
+            np.less_equal(self._trace_scratch.view(np.uint16), span[:, None], out=self._trace_mask)
+            np.copyto(index, np.uint8(len(palette)), where=self._trace_mask)
+            palette.append(color)
+        pixels = np.ascontiguousarray(index.T)
+        rgb = bytes(c for color in palette for c in _hex_rgb(color))
+
+        if Image is not None:
+            img = Image.fromarray(pixels, "L")
+            img.putpalette(rgb)
+            img = img.convert("RGB")
+            if self._trace_photo is None:
+                self._trace_photo = ImageTk.PhotoImage(img)
+            else:
+                self._trace_photo.paste(img)
+        else:
+            lut = np.frombuffer(rgb, dtype=np.uint8).reshape(-1, 3)
+            ppm = b"P6 %d %d 255\n" % (width, height) + lut[pixels].tobytes()
+            if self._trace_photo is None:
+                self._trace_photo = tk.PhotoImage(width=width, height=height)
+            self._trace_photo.configure(data=ppm, format="PPM")
+
+        if self._trace_item is None:
+            self._trace_item = self._canvas.create_image(pad_l, pad_t, anchor="nw", image=self._trace_photo)
+        else:
+            self._canvas.coords(self._trace_item, pad_l, pad_t)
+            self._canvas.itemconfigure(self._trace_item, image=self._trace_photo, state="normal")
+        self._canvas.tag_raise(self._trace_item, "grid")
+
+    def _grid_background(self, plot_w, plot_h, ymin, ymax):
+        """(width, height) palette indices of the plot-area grid, as _draw_grid lays it out."""
+        key = (plot_w, plot_h, ymin, ymax)
+        if key == self._trace_background_key:
+            return self._trace_background
+        bg = np.zeros((plot_w + 1, plot_h + 1), dtype=np.uint8)
+        for i in range(1, 5):
+            bg[int(plot_w * i / 5), :] = 1
+        for i in range(1, 4):
+            bg[:, int(plot_h * i / 4)] = 1
+        bg[[0, plot_w], :] = 2
+        bg[:, [0, plot_h]] = 2
+        if ymin < 0.0 < ymax:
+            bg[:, int((1.0 - ((0.0 - ymin) / (ymax - ymin))) * plot_h)] = 3
+        self._trace_background = bg
+        self._trace_background_key = key
+        return bg
+
+    def _clear_trace_layer(self):
+        self._canvas.delete("trace")
+        if self._trace_item is not None:
+            self._canvas.itemconfigure(self._trace_item, state="hidden")
+
     def _selected_traces(self, snap: TraceSnapshot):
         traces = []
         if self._vars["show_i"].get():
@@ -961,19 +1283,20 @@ class MEPScopeGui:
         plot_h = h - pad_t - pad_b
         x0, y0 = pad_l, pad_t
         x1, y1 = pad_l + plot_w, pad_t + plot_h
-        self._canvas.create_rectangle(x0, y0, x1, y1, outline="#444444")
+        div_color, frame_color, zero_color = SCOPE_GRID_COLORS
+        self._canvas.create_rectangle(x0, y0, x1, y1, outline=frame_color, tags="grid")
         for i in range(1, 5):
             x = x0 + int(plot_w * i / 5)
-            self._canvas.create_line(x, y0, x, y1, fill="#222222")
+            self._canvas.create_line(x, y0, x, y1, fill=div_color, tags="grid")
         for i in range(1, 4):
             y = y0 + int(plot_h * i / 4)
-            self._canvas.create_line(x0, y, x1, y, fill="#222222")
-        self._canvas.create_text(6, y0, anchor="nw", fill="#aaaaaa", text=f"{ymax:.4g}")
-        self._canvas.create_text(6, y1, anchor="sw", fill="#aaaaaa", text=f"{ymin:.4g}")
-        self._canvas.create_text(6, y0 + plot_h // 2, anchor="w", fill="#777777", text="Amplitude")
+            self._canvas.create_line(x0, y, x1, y, fill=div_color, tags="grid")
+        self._canvas.create_text(6, y0, anchor="nw", fill="#aaaaaa", text=f"{ymax:.4g}", tags="grid")
+        self._canvas.create_text(6, y1, anchor="sw", fill="#aaaaaa", text=f"{ymin:.4g}", tags="grid")
+        self._canvas.create_text(6, y0 + plot_h // 2, anchor="w", fill="#777777", text="Amplitude", tags="grid")
         if ymin < 0.0 < ymax:
             y_zero = y0 + int((1.0 - ((0.0 - ymin) / (ymax - ymin))) * plot_h)
-            self._canvas.create_line(x0, y_zero, x1, y_zero, fill="#555555")
+            self._canvas.create_line(x0, y_zero, x1, y_zero, fill=zero_color, tags="grid")
 
     def _draw_trace(self, values, color, pad_l, pad_t, plot_w, plot_h, ymin, ymax):
         n = len(values)
@@ -997,14 +1320,14 @@ class MEPScopeGui:
             y = pad_t + int((1.0 - y_norm) * plot_h)
             points.extend((x, y))
         if len(points) >= 4:
-            self._canvas.create_line(*points, fill=color, width=1)
+            self._canvas.create_line(*points, fill=color, width=1, tags="trace")
 
     def _cursor_update(self, event):
         snap = self._latest_snapshot
         if snap is None:
             return
         w = max(20, self._canvas.winfo_width())
-        pad_l, pad_r = 56, 12
+        pad_l, pad_r = PLOT_PAD[:2]
         plot_w = max(1, w - pad_l - pad_r)
         x = min(max(event.x, pad_l), w - pad_r)
         n = len(snap.i_values)
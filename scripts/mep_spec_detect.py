@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+mep_spec_detect.py
+
+Streaming emitter detection on SPEC spectrum frames.
+
+Consumes the radiohound spectrum stream (the same frames the GUI SPEC tab
+draws), normalised to dBFS rows by MEPBus.normalize_spec_payload(), and runs
+per frame:
+
+  noise floor  - per-bin running quantile (stochastic approximation), so the
+                 floor tracks slow changes but ignores bursts
+  CFAR         - cell-averaging CFAR over the row's excess above the floor,
+                 with guard and training cells on both sides (prefix sums)
+  emissions    - adjacent detected bins merged into runs; runs that overlap
+                 an open emission extend it, emissions unseen for --hold
+                 frames are closed
+
+Start/end events go out on SPEC_DETECT_EVENTS_TOPIC and, with --log, into a
+JSON-lines event log (one line per event). A change of center frequency,
+span or bin count closes every open emission and restarts the floor.
+
+All per-bin work runs in place on buffers sized at the first frame, so the
+steady state does no large allocations.
+
+Usage:
+    python3 scripts/mep_spec_detect.py
+    python3 scripts/mep_spec_detect.py --cfar-db 8 --min-snr-db 10 --log /data/log_telemetry/detect.jsonl
+    python3 scripts/mep_spec_detect.py --topic radiohound/clients/data/+ --no-publish
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    MEPBus,
+    MQTT_BROKER,
+    MQTT_PORT,
+    SPEC_DETECT_EVENTS_TOPIC,
+)
+
+DEFAULT_QUANTILE = 0.25
+DEFAULT_STEP_DB = 0.05
+DEFAULT_WARMUP_FRAMES = 50
+DEFAULT_WARMUP_STEP_DB = 1.0
+DEFAULT_GUARD_BINS = 2
+DEFAULT_TRAIN_BINS = 16
+DEFAULT_CFAR_DB = 6.0
+DEFAULT_MIN_SNR_DB = 6.0
+DEFAULT_MERGE_GAP_BINS = 2
+DEFAULT_HOLD_FRAMES = 3
+DEFAULT_STATS_INTERVAL_S = 10.0
+# Frames buffered between the MQTT thread and the detector.
+FRAME_QUEUE_MAX = 256
+
+
+class NoiseFloorEstimator:
+    """Per-bin running quantile of dB power.
+
+    Each frame moves every bin's estimate up by step*q where the sample is
+    above it and down by step*(1-q) where it is below, which converges on the
+    q-quantile without keeping history. The first ``warmup_frames`` use a
+    larger step so the floor settles quickly after a (re)start.
+    """
+
+    def __init__(self, n_bins: int, quantile: float = DEFAULT_QUANTILE, step_db: float = DEFAULT_STEP_DB,
+                 warmup_frames: int = DEFAULT_WARMUP_FRAMES, warmup_step_db: float = DEFAULT_WARMUP_STEP_DB):
+        self.quantile = quantile
+        self.step_db = step_db
+        self.warmup_frames = warmup_frames
+        self.warmup_step_db = warmup_step_db
+        self.floor = np.zeros(n_bins, dtype=np.float32)
+        self._above = np.zeros(n_bins, dtype=bool)
+        self._delta = np.zeros(n_bins, dtype=np.float32)
+        self.frames = 0
+
+    def update(self, row: np.ndarray) -> np.ndarray:
+        if self.frames == 0:
+            self.floor[:] = row
+        else:
+            step = self.warmup_step_db if self.frames < self.warmup_frames else self.step_db
+            np.greater(row, self.floor, out=self._above)
+            # delta = step * (above - (1 - q)): +step*q above, -step*(1-q) below
+            np.copyto(self._delta, self._above)
+            self._delta -= 1.0 - self.quantile
+            self._delta *= step
+            self.floor += self._delta
+        self.frames += 1
+        return self.floor
+
+
+class CfarDetector:
+    """Cell-averaging CFAR over one row of excess power (dB above floor).
+
+    Training windows are truncated at the band edges; the per-bin training
+    cell count is precomputed so edge bins average over what exists.
+    """
+
+    def __init__(self, n_bins: int, guard: int = DEFAULT_GUARD_BINS, train: int = DEFAULT_TRAIN_BINS,
+                 cfar_db: float = DEFAULT_CFAR_DB, min_snr_db: float = DEFAULT_MIN_SNR_DB):
+        self.cfar_db = cfar_db
+        self.min_snr_db = min_snr_db
+        i = np.arange(n_bins)
+        # Prefix-sum indices: cs[k] = sum(x[:k]).
+        self._l0 = np.clip(i - guard - train, 0, n_bins)
+        self._l1 = np.clip(i - guard, 0, n_bins)
+        self._r0 = np.clip(i + guard + 1, 0, n_bins)
+        self._r1 = np.clip(i + guard + train + 1, 0, n_bins)
+        count = (self._l1 - self._l0) + (self._r1 - self._r0)
+        self._inv_count = (1.0 / np.maximum(count, 1)).astype(np.float32)
+        self._cs = np.zeros(n_bins + 1, dtype=np.float64)
+        self._a = np.zeros(n_bins, dtype=np.float64)
+        self._b = np.zeros(n_bins, dtype=np.float64)
+        self._ref = np.zeros(n_bins, dtype=np.float32)
+        self._mask_snr = np.zeros(n_bins, dtype=bool)
+        self.mask = np.zeros(n_bins, dtype=bool)
+
+    def detect(self, excess: np.ndarray) -> np.ndarray:
+        """Return the (reused) boolean detection mask for one row of excess dB."""
+        np.cumsum(excess, out=self._cs[1:])
+        # Training sum = (cs[l1] - cs[l0]) + (cs[r1] - cs[r0])
+        np.take(self._cs, self._l1, out=self._a)
+        np.take(self._cs, self._l0, out=self._b)
+        self._a -= self._b
+        np.take(self._cs, self._r1, out=self._b)
+        self._a += self._b
+        np.take(self._cs, self._r0, out=self._b)
+        self._a -= self._b
+        np.multiply(self._a, self._inv_count, out=self._ref, casting="unsafe")
+        self._ref += self.cfar_db
+        np.greater(excess, self._ref, out=self.mask)
+        np.greater(excess, self.min_snr_db, out=self._mask_snr)
+        self.mask &= self._mask_snr
+        return self.mask
+
+
+def merge_runs(mask: np.ndarray, merge_gap: int) -> list[tuple[int, int]]:
+    """Return [start, stop) bin runs of True in mask, joining runs <= merge_gap apart."""
+    if not mask.any():
+        return []
+    edges = np.flatnonzero(np.diff(mask.view(np.int8), prepend=0, append=0))
+    runs = []
+    for start, stop in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] <= merge_gap:
+            runs[-1] = (runs[-1][0], stop)
+        else:
+            runs.append((start, stop))
+    return runs
+
+
+class Emission:
+    __slots__ = ("eid", "lo", "hi", "t_start", "t_last", "frames", "missed",
+                 "peak_db", "peak_bin", "peak_snr_db")
+
+    def __init__(self, eid: int, lo: int, hi: int, t: float):
+        self.eid = eid
+        self.lo = lo
+        self.hi = hi
+        self.t_start = t
+        self.t_last = t
+        self.frames = 0
+        self.missed = 0
+        self.peak_db = -np.inf
+        self.peak_bin = lo
+        self.peak_snr_db = -np.inf
+
+
+class SpecDetector:
+    """Noise floor + CFAR + emission tracking for one spectrum stream."""
+
+    def __init__(self, args):
+        self.args = args
+        self._axis = None
+        self._floor = None
+        self._cfar = None
+        self._excess = None
+        self._open: list[Emission] = []
+        self._next_id = 1
+        self.frames = 0
+        self.events = 0
+        self.busy_s = 0.0
+
+    def _reset(self, axis: tuple, n_bins: int):
+        a = self.args
+        self._axis = axis
+        self._floor = NoiseFloorEstimator(n_bins, a.quantile, a.step_db, a.warmup_frames, a.warmup_step_db)
+        self._cfar = CfarDetector(n_bins, a.guard, a.train, a.cfar_db, a.min_snr_db)
+        self._excess = np.zeros(n_bins, dtype=np.float32)
+
+    def _bin_hz(self, b: float):
+        _, cf, fmin, fmax = self._axis
+        if not all(isinstance(v, (int, float)) for v in (cf, fmin, fmax)):
+            return None
+        return float(cf + fmin + (b + 0.5) * (fmax - fmin) / self._axis[0])
+
+    def _event(self, kind: str, em: Emission) -> dict:
+        n, cf, fmin, fmax = self._axis
+        lo_hz = self._bin_hz(em.lo - 0.5)
+        hi_hz = self._bin_hz(em.hi - 0.5)
+        return {
+            "event": kind,
+            "id": em.eid,
+            "t_start": em.t_start,
+            "t_stop": em.t_last,
+            "duration_s": em.t_last - em.t_start,
+            "frames": em.frames,
+            "bin_lo": em.lo,
+            "bin_hi": em.hi,
+            "f_lo_hz": lo_hz,
+            "f_hi_hz": hi_hz,
+            "bandwidth_hz": None if lo_hz is None else hi_hz - lo_hz,
+            "peak_freq_hz": self._bin_hz(em.peak_bin),
+            "peak_dbfs": round(float(em.peak_db), 2),
+            "peak_snr_db": round(float(em.peak_snr_db), 2),
+            "center_frequency": cf,
+            "n_bins": n,
+        }
+
+    def close_all(self) -> list[dict]:
+        events = [self._event("end", em) for em in self._open]
+        self._open = []
+        return events
+
+    def process(self, entry: dict, t: float) -> list[dict]:
+        """Run one normalised SPEC frame; return start/end events it produced."""
+        t0 = time.perf_counter()
+        row = entry["row"]
+        axis = (len(row), entry.get("center_frequency"), entry.get("fmin"), entry.get("fmax"))
+        events = []
+        if axis != self._axis:
+            if self._axis is not None:
+                events.extend(self.close_all())
+            self._reset(axis, len(row))
+        floor = self._floor.update(row)
+        self.frames += 1
+        if self._floor.frames > self._floor.warmup_frames:
+            np.subtract(row, floor, out=self._excess)
+            mask = self._cfar.detect(self._excess)
+            runs = merge_runs(mask, self.args.merge_gap)
+        else:
+            runs = []
+        events.extend(self._track(runs, row, t))
+        self.busy_s += time.perf_counter() - t0
+        self.events += len(events)
+        return events
+
+    def _track(self, runs: list, row: np.ndarray, t: float) -> list[dict]:
+        events = []
+        seen = set()
+        for lo, hi in runs:
+            seg = row[lo:hi]
+            k = int(np.argmax(seg))
+            peak_db = float(seg[k])
+            snr = float(self._excess[lo + k])
+            # Runs and open emissions are both sorted, few per frame; linear match.
+            em = next((e for e in self._open if e.lo < hi and lo < e.hi and e.eid not in seen), None)
+            is_new = em is None
+            if is_new:
+                em = Emission(self._next_id, lo, hi, t)
+                self._next_id += 1
+                self._open.append(em)
+            em.lo = min(em.lo, lo)
+            em.hi = max(em.hi, hi)
+            em.t_last = t
+            em.frames += 1
+            em.missed = 0
+            if peak_db > em.peak_db:
+                em.peak_db = peak_db
+                em.peak_bin = lo + k
+            em.peak_snr_db = max(em.peak_snr_db, snr)
+            seen.add(em.eid)
+            if is_new:
+                events.append(self._event("start", em))
+        still_open = []
+        for em in self._open:
+            if em.eid not in seen:
+                em.missed += 1
+                if em.missed > self.args.hold:
+                    events.append(self._event("end", em))
+                    continue
+            still_open.append(em)
+        self._open = still_open
+        self._open.sort(key=lambda e: e.lo)
+        return events
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+
+def _frame_time(entry: dict) -> float:
+    ts = entry.get("ts")
+    if isinstance(ts, (int, float)) and ts > 0:
+        return float(ts) / 1000.0 if ts > 1e11 else float(ts)
+    return time.time()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streaming CFAR emitter detection on SPEC spectrum frames.")
+    ap.add_argument("--host", default=MQTT_BROKER, help="MQTT broker host")
+    ap.add_argument("--port", type=int, default=MQTT_PORT, help="MQTT broker port")
+    ap.add_argument("--topic", default=None, help="Spectrum topic or pattern (default: MEPBus spec topic)")
+    ap.add_argument("--events-topic", default=SPEC_DETECT_EVENTS_TOPIC, help="MQTT topic for events")
+    ap.add_argument("--no-publish", action="store_true", help="Do not publish events to MQTT")
+    ap.add_argument("--log", default="", help="Append events to this JSON-lines file")
+    ap.add_argument("--quantile", type=float, default=DEFAULT_QUANTILE, help="Noise floor quantile (0..1)")
+    ap.add_argument("--step-db", type=float, default=DEFAULT_STEP_DB, help="Noise floor tracking step per frame")
+    ap.add_argument("--warmup-frames", type=int, default=DEFAULT_WARMUP_FRAMES,
+                    help="Frames of fast floor tracking before detection starts")
+    ap.add_argument("--warmup-step-db", type=float, default=DEFAULT_WARMUP_STEP_DB,
+                    help="Noise floor step during warm-up")
+    ap.add_argument("--guard", type=int, default=DEFAULT_GUARD_BINS, help="CFAR guard bins each side")
+    ap.add_argument("--train", type=int, default=DEFAULT_TRAIN_BINS, help="CFAR training bins each side")
+    ap.add_argument("--cfar-db", type=float, default=DEFAULT_CFAR_DB, help="CFAR threshold above training mean")
+    ap.add_argument("--min-snr-db", type=float, default=DEFAULT_MIN_SNR_DB, help="Minimum excess above floor")
+    ap.add_argument("--merge-gap", type=int, default=DEFAULT_MERGE_GAP_BINS,
+                    help="Join detected runs separated by at most this many bins")
+    ap.add_argument("--hold", type=int, default=DEFAULT_HOLD_FRAMES,
+                    help="Frames an emission may go undetected before it is closed")
+    ap.add_argument("--stats-interval", type=float, default=DEFAULT_STATS_INTERVAL_S,
+                    help="Seconds between throughput log lines (0 = off)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not 0.0 < args.quantile < 1.0:
+        ap.error("--quantile must be between 0 and 1")
+
+    frames = queue.Queue(maxsize=FRAME_QUEUE_MAX)
+    dropped = [0]
+
+    def _on_spec(_topic: str, data: dict):
+        # MQTT thread: decode only; detection runs on the main thread.
+        entry = MEPBus.normalize_spec_payload(data)
+        if entry is None:
+            return
+        try:
+            frames.put_nowait(entry)
+        except queue.Full:
+            dropped[0] += 1
+
+    bus = MEPBus(args.host, args.port)
+    topic = args.topic or bus.spec_topic
+    bus.on_status_pattern(topic, _on_spec)
+    log_f = open(args.log, "a", buffering=1) if args.log else None
+    detector = SpecDetector(args)
+    logging.info("Detecting on %s -> %s", topic, "(not published)" if args.no_publish else args.events_topic)
+
+    def _emit(events: list):
+        for ev in events:
+            if not args.no_publish:
+                bus.publish_command(args.events_topic, ev, sleep_s=0)
+            line = json.dumps(ev, separators=(",", ":"))
+            if log_f is not None:
+                log_f.write(line + "\n")
+            if ev["event"] == "start":
+                f = ev["peak_freq_hz"]
+                where = f"{f / 1e6:.4f} MHz" if f is not None else f"bin {ev['bin_lo']}-{ev['bin_hi']}"
+                logging.info("start #%d %s  %.1f dBFS", ev["id"], where, ev["peak_dbfs"])
+            else:
+                logging.info("end   #%d  %.2f s  %d frames  snr %.1f dB",
+                             ev["id"], ev["duration_s"], ev["frames"], ev["peak_snr_db"])
+
+    next_stats = time.monotonic() + args.stats_interval
+    last_frames = 0
+    try:
+        while True:
+            try:
+                entry = frames.get(timeout=0.5)
+            except queue.Empty:
+                entry = None
+            if entry is not None:
+                _emit(detector.process(entry, _frame_time(entry)))
+            if args.stats_interval > 0 and time.monotonic() >= next_stats:
+                n = detector.frames - last_frames
+                per_frame_us = detector.busy_s / max(1, detector.frames) * 1e6
+                logging.info("%d frames (%.1f/s), %.0f us/frame, %d open, %d events, %d dropped",
+                             n, n / args.stats_interval, per_frame_us, detector.open_count,
+                             detector.events, dropped[0])
+                last_frames = detector.frames
+                next_stats += args.stats_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _emit(detector.close_all())
+        if log_f is not None:
+            log_f.close()
+        bus.disconnect()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
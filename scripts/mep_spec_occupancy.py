@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+mep_spec_occupancy.py
+
+Spectrum occupancy / duty-cycle statistics over SPEC spectrum frames.
+
+For every tuning (center frequency, span, bin count) an accumulator keeps,
+per bin:
+
+  above      - frames at or above --threshold-db (occupancy = above / valid)
+  histogram  - fixed-width power histogram (--hist-lo..--hist-hi, --hist-step)
+               from which any percentile is read back
+  sum / max  - for mean (linear power) and peak
+  valid      - frames with a finite value (denominator for the above)
+
+plus the number of frames in which any bin was occupied (band duty cycle).
+Memory is fixed by bins x histogram levels, independent of how long the
+campaign runs. Accumulators are snapshotted to one file per tuning in --out
+(.npz, or .h5 with --format h5 when h5py is installed), and an existing
+snapshot for the same tuning is resumed rather than overwritten. Non-finite
+(NaN/inf) bins are skipped, so dropouts do not count as unoccupied frames.
+
+Sources:
+  live     - frames from the MEPBus spectrum topic (same stream as the GUI)
+  offline  - a SPEC history archive directory written by the GUI
+             (archive.json + L0_*.f32/.meta), or a 2-D .npy spectrogram of
+             dBFS rows with --center-frequency/--fmin/--fmax
+  report   - print occupancy and percentiles from a snapshot
+
+Usage:
+    python3 scripts/mep_spec_occupancy.py live --out /data/occupancy --threshold-db -90
+    python3 scripts/mep_spec_occupancy.py offline ~/log/spectrumx/spec_archive/20250101_120000_n4096 --out occ
+    python3 scripts/mep_spec_occupancy.py report occ/occupancy_915000000Hz_n4096.npz --top 20
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from start_mep_rx import (
+    MEPBus,
+    MQTT_BROKER,
+    MQTT_PORT,
+    ARCHIVE_META_DTYPE,
+)
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+DEFAULT_THRESHOLD_DB = -90.0
+DEFAULT_HIST_LO_DB = -160.0
+DEFAULT_HIST_HI_DB = 0.0
+DEFAULT_HIST_STEP_DB = 0.5
+DEFAULT_SNAPSHOT_S = 60.0
+DEFAULT_PERCENTILES = (10.0, 50.0, 90.0, 99.0)
+# Rows per vectorized update when reading offline sources.
+OFFLINE_BLOCK_ROWS = 1024
+FRAME_QUEUE_MAX = 256
+
+
+class OccupancyAccumulator:
+    """Per-bin occupancy counters and power histogram for one tuning."""
+
+    def __init__(self, n_bins: int, center_frequency: float, fmin: float, fmax: float,
+                 threshold_db: float = DEFAULT_THRESHOLD_DB, hist_lo: float = DEFAULT_HIST_LO_DB,
+                 hist_hi: float = DEFAULT_HIST_HI_DB, hist_step: float = DEFAULT_HIST_STEP_DB):
+        self.n_bins = int(n_bins)
+        self.center_frequency = center_frequency
+        self.fmin = fmin
+        self.fmax = fmax
+        self.threshold_db = float(threshold_db)
+        self.hist_lo = float(hist_lo)
+        self.hist_step = float(hist_step)
+        self.n_levels = max(1, int(round((hist_hi - hist_lo) / hist_step)))
+        self.frames = 0
+        self.frames_occupied = 0
+        self.t_first = None
+        self.t_last = None
+        self.above = np.zeros(self.n_bins, dtype=np.uint64)
+        self.hist = np.zeros((self.n_bins, self.n_levels), dtype=np.uint32)
+        self.power_sum = np.zeros(self.n_bins, dtype=np.float64)
+        self.power_max = np.full(self.n_bins, -np.inf, dtype=np.float32)
+        self.valid = np.zeros(self.n_bins, dtype=np.uint64)
+        # Flat histogram offset of each bin's first level.
+        self._base = np.arange(self.n_bins, dtype=np.intp) * self.n_levels
+        self._lvl = np.zeros(self.n_bins, dtype=np.float32)
+        self._idx = np.zeros(self.n_bins, dtype=np.intp)
+        self._mask = np.zeros(self.n_bins, dtype=bool)
+        self._fin = np.zeros(self.n_bins, dtype=bool)
+        self._nfin = np.zeros(self.n_bins, dtype=bool)
+        self._lin = np.zeros(self.n_bins, dtype=np.float64)
+
+    @property
+    def key(self) -> tuple:
+        return tuple_key(self.center_frequency, self.fmin, self.fmax, self.n_bins)
+
+    def _touch(self, t: float):
+        if t is None:
+            return
+        self.t_first = t if self.t_first is None else min(self.t_first, t)
+        self.t_last = t if self.t_last is None else max(self.t_last, t)
+
+    def update(self, row: np.ndarray, t: float = None):
+        """Fold one dBFS row in, in place (no per-frame allocations).
+
+        Non-finite bins are left out of every counter, including ``valid``.
+        """
+        fin = self._fin
+        np.isfinite(row, out=fin)
+        np.logical_not(fin, out=self._nfin)
+        np.greater_equal(row, self.threshold_db, out=self._mask)
+        self._mask &= fin
+        self.above += self._mask
+        self.frames_occupied += bool(self._mask.any())
+        np.subtract(row, self.hist_lo, out=self._lvl)
+        self._lvl *= 1.0 / self.hist_step
+        np.copyto(self._lvl, 0, where=self._nfin)
+        np.clip(self._lvl, 0, self.n_levels - 1, out=self._lvl)
+        np.copyto(self._idx, self._lvl, casting="unsafe")
+        self._idx += self._base
+        # One level per bin, so the flat indices are unique and += is exact.
+        self.hist.reshape(-1)[self._idx] += fin
+        np.multiply(row, 0.1, out=self._lin)
+        np.power(10.0, self._lin, out=self._lin)
+        np.copyto(self._lin, 0, where=self._nfin)
+        self.power_sum += self._lin
+        np.fmax(self.power_max, row, out=self.power_max, where=fin)
+        self.valid += fin
+        self.frames += 1
+        self._touch(t)
+
+    def update_block(self, rows: np.ndarray, t0: float = None, t1: float = None):
+        """Fold a (frames, n_bins) block in with one bincount for the histogram."""
+        if len(rows) == 0:
+            return
+        fin = np.isfinite(rows)
+        clean = np.where(fin, rows, -np.inf)
+        occ = clean >= self.threshold_db
+        self.above += occ.sum(axis=0, dtype=np.uint64)
+        self.frames_occupied += int(occ.any(axis=1).sum())
+        lvl = np.clip((np.where(fin, rows, self.hist_lo) - self.hist_lo) * (1.0 / self.hist_step),
+                      0, self.n_levels - 1).astype(np.intp)
+        lvl += self._base
+        counts = np.bincount(lvl[fin], minlength=self.hist.size)
+        self.hist += counts.reshape(self.hist.shape).astype(np.uint32)
+        # 10**(-inf/10) == 0, so non-finite bins add nothing to the power sum.
+        self.power_sum += np.power(10.0, clean * 0.1, dtype=np.float64).sum(axis=0)
+        np.fmax(self.power_max, clean.max(axis=0), out=self.power_max)
+        self.valid += fin.sum(axis=0, dtype=np.uint64)
+        self.frames += len(rows)
+        self._touch(t0)
+        self._touch(t1)
+
+    def _denom(self) -> np.ndarray:
+        return np.maximum(self.valid, 1)
+
+    def occupancy(self) -> np.ndarray:
+        return self.above / self._denom()
+
+    def mean_db(self) -> np.ndarray:
+        with np.errstate(divide="ignore"):
+            return (10.0 * np.log10(self.power_sum / self._denom())).astype(np.float32)
+
+    def percentiles(self, qs) -> np.ndarray:
+        """(len(qs), n_bins) power percentiles (level centres) from the histograms.
+
+        Bins that never held a finite value read back as NaN.
+        """
+        cdf = np.cumsum(self.hist, axis=1, dtype=np.uint64)
+        out = np.empty((len(qs), self.n_bins), dtype=np.float32)
+        empty = self.valid == 0
+        for i, q in enumerate(qs):
+            need = np.maximum(np.ceil(q / 100.0 * self.valid), 1).astype(np.uint64)
+            lvl = np.argmax(cdf >= need[:, None], axis=1)
+            out[i] = self.hist_lo + (lvl + 0.5) * self.hist_step
+            out[i][empty] = np.nan
+        return out
+
+    def freqs_hz(self):
+        if self.center_frequency is None or self.fmin is None or self.fmax is None:
+            return None
+        bw = (self.fmax - self.fmin) / self.n_bins
+        return self.center_frequency + self.fmin + (np.arange(self.n_bins) + 0.5) * bw
+
+    # --- snapshots ---
+
+    def _arrays(self) -> dict:
+        nan = np.nan
+        return {
+            "n_bins": self.n_bins,
+            "center_frequency": nan if self.center_frequency is None else self.center_frequency,
+            "fmin": nan if self.fmin is None else self.fmin,
+            "fmax": nan if self.fmax is None else self.fmax,
+            "threshold_db": self.threshold_db,
+            "hist_lo": self.hist_lo,
+            "hist_step": self.hist_step,
+            "frames": self.frames,
+            "frames_occupied": self.frames_occupied,
+            "t_first": nan if self.t_first is None else self.t_first,
+            "t_last": nan if self.t_last is None else self.t_last,
+            "above": self.above,
+            "hist": self.hist,
+            "power_sum": self.power_sum,
+            "power_max": self.power_max,
+            "valid": self.valid,
+        }
+
+    def save(self, path: str):
+        """Atomically write a snapshot (.npz, or .h5 via h5py)."""
+        tmp = path + ".tmp"
+        arrays = self._arrays()
+        if path.endswith(".h5"):
+            if h5py is None:
+                raise RuntimeError("h5py is not installed")
+            with h5py.File(tmp, "w") as f:
+                for k, v in arrays.items():
+                    if isinstance(v, np.ndarray):
+                        f.create_dataset(k, data=v, compression="gzip")
+                    else:
+                        f.attrs[k] = v
+        else:
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "OccupancyAccumulator":
+        if path.endswith(".h5"):
+            if h5py is None:
+                raise RuntimeError("h5py is not installed")
+            with h5py.File(path, "r") as f:
+                data = dict(f.attrs)
+                data.update({k: f[k][()] for k in f.keys()})
+        else:
+            with np.load(path) as f:
+                data = {k: f[k] for k in f.files}
+
+        def _opt(k):
+            v = float(data[k])
+            return None if np.isnan(v) else v
+
+        n_levels = data["hist"].shape[1]
+        hist_lo = float(data["hist_lo"])
+        hist_step = float(data["hist_step"])
+        acc = cls(int(data["n_bins"]), _opt("center_frequency"), _opt("fmin"), _opt("fmax"),
+                  float(data["threshold_db"]), hist_lo, hist_lo + n_levels * hist_step, hist_step)
+        acc.frames = int(data["frames"])
+        acc.frames_occupied = int(data["frames_occupied"])
+        acc.t_first = _opt("t_first")
+        acc.t_last = _opt("t_last")
+        acc.above[:] = data["above"]
+        acc.hist[:] = data["hist"]
+        acc.power_sum[:] = data["power_sum"]
+        acc.power_max[:] = data["power_max"]
+        # Snapshots from before per-bin valid counts: every frame counted.
+        acc.valid[:] = data["valid"] if "valid" in data else acc.frames
+        return acc
+
+
+def tuple_key(cf, fmin, fmax, n_bins) -> tuple:
+    def _f(v):
+        return float(v) if isinstance(v, (int, float, np.floating)) and np.isfinite(v) else None
+    return (_f(cf), _f(fmin), _f(fmax), int(n_bins))
+
+
+class OccupancyStore:
+    """One accumulator (and snapshot file) per tuning."""
+
+    def __init__(self, out_dir: str, fmt: str, acc_kwargs: dict):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.acc_kwargs = acc_kwargs
+        self.accs: dict[tuple, OccupancyAccumulator] = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path_for(self, key: tuple) -> str:
+        cf, _fmin, _fmax, n = key
+        name = f"occupancy_{'unknown' if cf is None else f'{cf:.0f}Hz'}_n{n}.{self.fmt}"
+        return os.path.join(self.out_dir, name)
+
+    def get(self, cf, fmin, fmax, n_bins) -> OccupancyAccumulator:
+        key = tuple_key(cf, fmin, fmax, n_bins)
+        acc = self.accs.get(key)
+        if acc is not None:
+            return acc
+        path = self.path_for(key)
+        acc = None
+        if os.path.exists(path):
+            try:
+                acc = OccupancyAccumulator.load(path)
+                if acc.key != key or acc.threshold_db != self.acc_kwargs["threshold_db"]:
+                    logging.warning("%s was made with different settings; starting over", path)
+                    acc = None
+                else:
+                    logging.info("Resuming %s (%d frames)", path, acc.frames)
+            except Exception as e:
+                logging.warning("Could not resume %s: %s", path, e)
+                acc = None
+        if acc is None:
+            acc = OccupancyAccumulator(n_bins, key[0], key[1], key[2], **self.acc_kwargs)
+        self.accs[key] = acc
+        return acc
+
+    def snapshot(self):
+        for key, acc in self.accs.items():
+            if acc.frames:
+                acc.save(self.path_for(key))
+
+
+def iter_archive_blocks(path: str, block_rows: int = OFFLINE_BLOCK_ROWS):
+    """Yield (rows, meta) blocks from a SPEC archive directory (level 0, in order)."""
+    with open(os.path.join(path, "archive.json")) as f:
+        info = json.load(f)
+    n_bins = int(info["n_bins"])
+    chunk_rows = int(info["chunk_rows"])
+    for rows_path in sorted(glob.glob(os.path.join(path, "L0_*.f32"))):
+        meta_path = rows_path[:-4] + ".meta"
+        rows = np.memmap(rows_path, dtype=np.float32, mode="r", shape=(chunk_rows, n_bins))
+        meta = np.memmap(meta_path, dtype=ARCHIVE_META_DTYPE, mode="r", shape=(chunk_rows,))
+        # Chunks are preallocated; rows never written have t == 0.
+        valid = int(np.count_nonzero(meta["t"]))
+        for i in range(0, valid, block_rows):
+            j = min(valid, i + block_rows)
+            yield np.asarray(rows[i:j]), np.asarray(meta[i:j])
+
+
+def run_offline(args, store: OccupancyStore) -> int:
+    src = args.source
+    total = 0
+    if os.path.isdir(src):
+        for rows, meta in iter_archive_blocks(src):
+            # Split the block wherever the tuning changes.
+            cf = meta["cf"]
+            change = np.flatnonzero((cf[1:] != cf[:-1]) & ~(np.isnan(cf[1:]) & np.isnan(cf[:-1]))) + 1
+            for a, b in zip(np.r_[0, change], np.r_[change, len(rows)]):
+                m = meta[a]
+                acc = store.get(m["cf"], m["fmin"], m["fmax"], rows.shape[1])
+                acc.update_block(rows[a:b], float(meta["t"][a]), float(meta["t"][b - 1]))
+            total += len(rows)
+    else:
+        data = np.load(src, mmap_mode="r")
+        if data.ndim != 2:
+            logging.error("%s: expected a 2-D (frames, bins) dBFS array", src)
+            return 1
+        acc = store.get(args.center_frequency, args.fmin, args.fmax, data.shape[1])
+        for i in range(0, len(data), OFFLINE_BLOCK_ROWS):
+            acc.update_block(np.asarray(data[i:i + OFFLINE_BLOCK_ROWS], dtype=np.float32))
+        total = len(data)
+    store.snapshot()
+    for key, acc in store.accs.items():
+        logging.info("%s: %d frames, band duty %.1f%%", store.path_for(key), acc.frames,
+                     100.0 * acc.frames_occupied / max(1, acc.frames))
+    logging.info("Processed %d rows", total)
+    return 0
+
+
+def run_live(args, store: OccupancyStore) -> int:
+    frames = queue.Queue(maxsize=FRAME_QUEUE_MAX)
+    dropped = [0]
+
+    def _on_spec(_topic: str, data: dict):
+        entry = MEPBus.normalize_spec_payload(data)
+        if entry is None:
+            return
+        try:
+            frames.put_nowait(entry)
+        except queue.Full:
+            dropped[0] += 1
+
+    bus = MEPBus(args.host, args.port)
+    topic = args.topic or bus.spec_topic
+    bus.on_status_pattern(topic, _on_spec)
+    logging.info("Accumulating %s into %s", topic, store.out_dir)
+    next_snap = time.monotonic() + args.snapshot_s
+    try:
+        while True:
+            try:
+                entry = frames.get(timeout=0.5)
+            except queue.Empty:
+                entry = None
+            if entry is not None:
+                acc = store.get(entry.get("center_frequency"), entry.get("fmin"), entry.get("fmax"), entry["n"])
+                acc.update(entry["row"], time.time())
+            if time.monotonic() >= next_snap:
+                store.snapshot()
+                logging.info("Snapshot: %s (%d dropped)",
+                             ", ".join(f"{os.path.basename(store.path_for(k))}={a.frames}"
+                                       for k, a in store.accs.items()) or "no frames", dropped[0])
+                next_snap += args.snapshot_s
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.snapshot()
+        bus.disconnect()
+    return 0
+
+
+def print_report(path: str, top: int, percentiles):
+    acc = OccupancyAccumulator.load(path)
+    occ = acc.occupancy()
+    pct = acc.percentiles(percentiles)
+    mean = acc.mean_db()
+    freqs = acc.freqs_hz()
+    span = "" if acc.t_first is None else f", {acc.t_last - acc.t_first:.0f} s"
+    print(f"{path}: {acc.frames} frames{span}, {acc.n_bins} bins, threshold {acc.threshold_db:.1f} dBFS")
+    print(f"  band duty cycle {100.0 * acc.frames_occupied / max(1, acc.frames):.2f}%, "
+          f"mean bin occupancy {100.0 * occ.mean():.2f}%")
+    header = "  " + f"{'freq/bin':>16} {'occ%':>7} {'mean':>8} {'max':>8} " + " ".join(
+        f"{f'p{q:g}':>8}" for q in percentiles)
+    print(header)
+    for b in np.argsort(occ)[::-1][:top]:
+        where = f"{freqs[b] / 1e6:.4f} MHz" if freqs is not None else f"bin {b}"
+        print(f"  {where:>16} {100.0 * occ[b]:7.2f} {mean[b]:8.1f} {acc.power_max[b]:8.1f} "
+              + " ".join(f"{pct[i, b]:8.1f}" for i in range(len(percentiles))))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-bin spectrum occupancy and power percentile statistics.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_acc(p):
+        p.add_argument("--out", required=True, help="Directory for per-tuning snapshots")
+        p.add_argument("--format", choices=("npz", "h5"), default="npz", help="Snapshot format")
+        p.add_argument("--threshold-db", type=float, default=DEFAULT_THRESHOLD_DB,
+                       help="dBFS at or above which a bin counts as occupied")
+        p.add_argument("--hist-lo", type=float, default=DEFAULT_HIST_LO_DB, help="Histogram floor (dBFS)")
+        p.add_argument("--hist-hi", type=float, default=DEFAULT_HIST_HI_DB, help="Histogram ceiling (dBFS)")
+        p.add_argument("--hist-step", type=float, default=DEFAULT_HIST_STEP_DB, help="Histogram level width (dB)")
+
+    p_live = sub.add_parser("live", help="Accumulate the live MQTT spectrum stream")
+    add_acc(p_live)
+    p_live.add_argument("--host", default=MQTT_BROKER, help="MQTT broker host")
+    p_live.add_argument("--port", type=int, default=MQTT_PORT, help="MQTT broker port")
+    p_live.add_argument("--topic", default=None, help="Spectrum topic or pattern (default: MEPBus spec topic)")
+    p_live.add_argument("--snapshot-s", type=float, default=DEFAULT_SNAPSHOT_S, help="Seconds between snapshots")
+
+    p_off = sub.add_parser("offline", help="Accumulate a SPEC archive directory or .npy spectrogram")
+    add_acc(p_off)
+    p_off.add_argument("source", help="SPEC archive directory, or (frames, bins) dBFS .npy")
+    p_off.add_argument("--center-frequency", type=float, default=None, help="Hz, for .npy input")
+    p_off.add_argument("--fmin", type=float, default=None, help="Hz offset of the first bin edge, for .npy input")
+    p_off.add_argument("--fmax", type=float, default=None, help="Hz offset of the last bin edge, for .npy input")
+
+    p_rep = sub.add_parser("report", help="Print statistics from a snapshot")
+    p_rep.add_argument("snapshot", help="Snapshot .npz/.h5")
+    p_rep.add_argument("--top", type=int, default=20, help="Most-occupied bins to list")
+    p_rep.add_argument("--percentiles", default=",".join(f"{q:g}" for q in DEFAULT_PERCENTILES),
+                       help="Comma-separated power percentiles")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.cmd == "report":
+        print_report(args.snapshot, args.top, [float(q) for q in args.percentiles.split(",") if q.strip()])
+        return 0
+    if args.format == "h5" and h5py is None:
+        ap.error("--format h5 needs h5py")
+    if args.hist_hi <= args.hist_lo or args.hist_step <= 0:
+        ap.error("need --hist-lo < --hist-hi and --hist-step > 0")
+    store = OccupancyStore(args.out, args.format, {
+        "threshold_db": args.threshold_db,
+        "hist_lo": args.hist_lo,
+        "hist_hi": args.hist_hi,
+        "hist_step": args.hist_step,
+    })
+    if args.cmd == "live":
+        return run_live(args, store)
+    return run_offline(args, store)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
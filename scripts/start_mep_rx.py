@@ -37,11 +37,15 @@ import base64
 import re
 import math
 import socket
+import struct
 import subprocess
 import queue
 import copy
+import csv
+import glob
+import http.client
+import urllib.parse
 from fractions import Fraction
-from collections import deque
 from datetime import datetime
 import threading
 from typing import Optional, Callable
@@ -89,6 +93,32 @@ _SYNC_STATUS_TOPICS = (RFSOC_STATUS_TOPIC, RECORDER_STATUS_TOPIC, TUNER_STATUS_T
 # Owned by the FPGA UDP packet emitter. This is not the source of truth of this information.
 RECORDER_CHANNEL_PORTS = {"A": 60134, "B": 60133, "C": 60132, "D": 60131}
 
+# RFSoC MEP UDP packet header: 64 little-endian bytes ahead of the int16 IQ
+# payload. Mirrors utilities/wireshark_rfsoc_mep_dissector.lua; the FPGA
+# emitter owns the layout. is_complex carries its flag in bit 0.
+MEP_PACKET_HEADER_BYTES = 64
+MEP_PACKET_HEADER_STRUCT = struct.Struct("<QQQIIIHB")
+MEP_PACKET_HEADER_DTYPE = np.dtype({
+    "names": [
+        "sample_idx", "sample_rate_numerator", "sample_rate_denominator",
+        "freq_idx", "num_subchannels", "pkt_samples", "bits_per_int", "is_complex",
+    ],
+    "formats": ["<u8", "<u8", "<u8", "<u4", "<u4", "<u4", "<u2", "u1"],
+    "offsets": [0, 8, 16, 24, 28, 32, 36, 38],
+    "itemsize": MEP_PACKET_HEADER_BYTES,
+})
+
+# Record layout of SPEC archive .meta chunk files (mep_gui.py SpectrumArchive,
+# read back by mep_spec_occupancy.py).
+ARCHIVE_META_DTYPE = np.dtype([("t", "<f8"), ("cf", "<f8"), ("fmin", "<f8"), ("fmax", "<f8")])
+
+# Published by mep_link_monitor.py (passive packet-continuity monitor).
+LINK_MONITOR_STATUS_TOPIC = "link_monitor/status"
+# Published by mep_spec_detect.py (emission start/end events from SPEC frames).
+SPEC_DETECT_EVENTS_TOPIC = "spec_detect/events"
+# Compose service state changes (from the Docker events stream), published by the GUI.
+DOCKER_EVENTS_TOPIC = "docker/events"
+
 # Single source of truth for tuner metadata, keyed by the canonical/friendly
 # name (the form the GUI dropdown, CLI, and the rest of this program use).
 # 'backend' is the lower-case name the tuner_control service expects (it calls
@@ -115,6 +145,48 @@ TUNER_OPTIONS       = ["None"] + list(TUNERS.keys()) + ["auto"]
 
 RECORDER_CONFIG_DIR = "/opt/radiohound/docker/recorder/configs"
 DOCKER_COMPOSE_DIR = "/opt/radiohound/docker"
+DOCKER_LOG_BUFFER_LINES = 2000
+# Docker Engine API socket; DOCKER_HOST=unix:///path overrides (tcp:// is not used).
+DOCKER_SOCKET_PATH = "/var/run/docker.sock"
+DOCKER_COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+DOCKER_COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+DOCKER_RECORDER_SERVICE = "recorder"
+DOCKER_EVENTS_RETRY_S = 5.0
+# Container event Action -> service state; None = no state change.
+DOCKER_EVENT_STATES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "kill": None,
+    "oom": None,
+    "destroy": "removed",
+}
+# Per-container resource telemetry (ContainerStatsSampler). Rows are 1 s apart
+# in the fine ring (15 min) and averaged 10:1 into the coarse ring (6 h).
+DOCKER_STATS_INTERVAL_S = 1.0
+DOCKER_STATS_FINE_ROWS = 900
+DOCKER_STATS_COARSE_FACTOR = 10
+DOCKER_STATS_COARSE_ROWS = 2160
+DOCKER_STATS_STEPS_MAX = 10000
+DOCKER_CGROUP_ROOT = "/sys/fs/cgroup"
+# Each row measures the interval (t - dt, t]; rates are bytes/s, cpu_pct is
+# percent of one core (as `docker stats` reports it).
+DOCKER_STATS_DTYPE = np.dtype([
+    ("t", np.float64),
+    ("dt", np.float64),
+    ("cpu_pct", np.float64),
+    ("mem_bytes", np.float64),
+    ("net_rx_Bps", np.float64),
+    ("net_tx_Bps", np.float64),
+    ("blk_read_Bps", np.float64),
+    ("blk_write_Bps", np.float64),
+])
+# Level codes stored by DockerLogBuffer; index 0 = no level found in the line.
+DOCKER_LOG_LEVELS = ("", "TRACE", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
 PREVIEW_DATA_DIR = "/data/captures/preview/data"
 
 GREEN = "\033[92m"
@@ -1767,7 +1839,8 @@ class MEPBus:
             logging.warning(f"MQTT unexpectedly disconnected: rc={rc}")
         self._emit_connection_state()
 
-    def topic_matches(self, topic: str, pattern: str) -> bool:
+    @staticmethod
+    def topic_matches(topic: str, pattern: str) -> bool:
         """Check if topic matches MQTT wildcard pattern.
         
         '+' matches exactly one level between slashes
@@ -2446,6 +2519,13 @@ class CaptureController:
 
         # ---- Stop flag for sweeps ----
         self._stop_flag = threading.Event()
+        # Set by notify_service_state when the recorder container stops; makes
+        # recorder waits, dwells and sweeps bail out instead of timing out.
+        self._recorder_down = threading.Event()
+        self._recorder_down_reason = ""
+
+        # ---- Sweep step listeners (on_step) ----
+        self._step_listeners: list[Callable] = []
 
         # ---- Synchronous wait infrastructure (for sweep orchestration) ----
         self._tlm = None
@@ -2493,6 +2573,53 @@ class CaptureController:
         )
         return False
 
+    def notify_service_state(self, service: str, state: str, exit_code=None):
+        """Feed container state from DockerManager events.
+
+        When the recorder container leaves 'running', pending recorder waits
+        wake immediately and the current dwell/sweep aborts; it re-arms once
+        the container is running again.
+        """
+        if service != DOCKER_RECORDER_SERVICE:
+            return
+        if state == "running":
+            if self._recorder_down.is_set():
+                logging.info("Recorder container running again")
+            self._recorder_down.clear()
+            return
+        if state in ("exited", "removed", "dead", "paused") and not self._recorder_down.is_set():
+            self._recorder_down_reason = (
+                f"recorder container {state}"
+                + (f" (exit code {exit_code})" if exit_code not in (None, "") else "")
+            )
+            self._recorder_down.set()
+            self._status_events[RECORDER_STATUS_TOPIC].set()
+            if self._recorder_running:
+                logging.error(f"Capture: {self._recorder_down_reason}")
+
+    def on_step(self, callback: Callable[[str, dict], None]):
+        """Register callback(event, info) fired at "begin"/"end" of each capture step.
+
+        info carries index, f_hz, preset, overrides, channel and t (epoch s);
+        called from the capture thread, so callbacks must not block.
+        """
+        self._step_listeners.append(callback)
+
+    def _emit_step(self, event: str, index: int, f_hz: float):
+        info = {
+            "index": index,
+            "f_hz": f_hz,
+            "preset": f"sr{self.sample_rate_mhz}MHz",
+            "overrides": bool(self.recorder_overrides),
+            "channel": self.channel,
+            "t": time.time(),
+        }
+        for cb in list(self._step_listeners):
+            try:
+                cb(event, info)
+            except Exception:
+                logging.exception("Step listener failed")
+
     def close(self):
         """Remove sync-wait listeners from bus and stop recorder (best-effort)."""
         for topic, cb in self._sync_cbs.items():
@@ -2607,6 +2734,9 @@ class CaptureController:
             with self._status_lock:
                 self._status[topic] = None
         if self._status_events[topic].wait(timeout=timeout_s):
+            if topic == RECORDER_STATUS_TOPIC and self._recorder_down.is_set():
+                logging.error(f"Recorder wait aborted: {self._recorder_down_reason}")
+                return None
             with self._status_lock:
                 return self._status[topic]
         logging.warning(f"No status from {topic} within {timeout_s}s — service may not be running")
@@ -2830,6 +2960,10 @@ class CaptureController:
         if not self._require_mqtt("start recorder"):
             return False
 
+        if self._recorder_down.is_set():
+            logging.error(f"Cannot start recorder: {self._recorder_down_reason}")
+            return False
+
         recorder_model = self.get_staged_recorder_model()
         if not recorder_model.get("available"):
             logging.error(
@@ -3235,7 +3369,11 @@ class CaptureController:
                     return False
 
         if dwell_s is not None and dwell_s > 0:
-            self._dwell(dwell_s)
+            self._emit_step("begin", 0, f_hz)
+            try:
+                self._dwell(dwell_s)
+            finally:
+                self._emit_step("end", 0, f_hz)
             self.stop_recorder()
         return True
 
@@ -3254,10 +3392,13 @@ class CaptureController:
         last_restart = time.time()
 
         try:
-            for f_hz in freqs_hz:
+            for index, f_hz in enumerate(freqs_hz):
                 if self._stop_flag.is_set():
                     logging.info("Sweep interrupted by stop flag")
                     break
+                if self._recorder_down.is_set():
+                    logging.error(f"Sweep aborted: {self._recorder_down_reason}")
+                    return False
 
                 if restart_interval and time.time() - last_restart >= restart_interval:
                     logging.info("Restart interval reached — restarting recorder")
@@ -3265,9 +3406,13 @@ class CaptureController:
                         return False
                     last_restart = time.time()
 
-                if not self.tune_and_arm(f_hz):
-                    return False
-                self._dwell(dwell_s)
+                self._emit_step("begin", index, f_hz)
+                try:
+                    if not self.tune_and_arm(f_hz):
+                        return False
+                    self._dwell(dwell_s)
+                finally:
+                    self._emit_step("end", index, f_hz)
         finally:
             self.stop_recorder()
         return True
@@ -3283,9 +3428,12 @@ class CaptureController:
             if self._stop_flag.is_set():
                 logging.info("Dwell interrupted by stop flag")
                 return
+            if self._recorder_down.is_set():
+                logging.error(f"Dwell interrupted: {self._recorder_down_reason}")
+                return
             tlm = self.get_tlm(timeout_s=1.5)
             logging.debug(MEPBus._tlm_to_str(tlm))
-            time.sleep(1)
+            self._recorder_down.wait(1)
 
     def request_stop(self):
         """Signal the current sweep or dwell to exit early."""
@@ -3360,6 +3508,717 @@ class TxController:
 
 
 # ===== DOCKER MANAGER ===== #
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection whose transport is a unix stream socket."""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except Exception:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class DockerEngineError(RuntimeError):
+    """Docker Engine API request failed (transport or non-2xx status)."""
+
+    def __init__(self, message: str, status: int = 0):
+        super().__init__(message)
+        self.status = status
+
+
+class DockerEngineClient:
+    """Minimal Docker Engine API client over the unix socket.
+
+    Keeps one persistent HTTP/1.1 connection (reconnecting once on a stale
+    socket), so a status refresh is a single request instead of forking the
+    docker CLI. Thread-safe; requests are serialized on the connection.
+    """
+
+    def __init__(self, socket_path: str | None = None, timeout: float = 5.0):
+        if socket_path is None:
+            host = os.environ.get("DOCKER_HOST", "")
+            socket_path = host[len("unix://"):] if host.startswith("unix://") else DOCKER_SOCKET_PATH
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Socket exists and is accessible (no request made)."""
+        return os.path.exists(self.socket_path) and os.access(self.socket_path, os.R_OK | os.W_OK)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def request(self, method: str, path: str, params: dict | None = None,
+                body=None, timeout: float | None = None):
+        """Send one request; return decoded JSON (or text / None for empty bodies)."""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        headers = {"Host": "docker"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        with self._lock:
+            for attempt in (0, 1):
+                if self._conn is None:
+                    self._conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+                self._conn.timeout = self.timeout if timeout is None else timeout
+                if self._conn.sock is not None:
+                    self._conn.sock.settimeout(self._conn.timeout)
+                try:
+                    self._conn.request(method, path, body=payload, headers=headers)
+                    resp = self._conn.getresponse()
+                    data = resp.read()
+                    break
+                except (http.client.RemoteDisconnected, BrokenPipeError,
+                        ConnectionResetError, http.client.CannotSendRequest) as e:
+                    # Engine closed the idle keep-alive socket; retry on a fresh one.
+                    self._conn.close()
+                    self._conn = None
+                    if attempt:
+                        raise DockerEngineError(f"{method} {path}: {e}") from None
+                except OSError as e:
+                    self._conn.close()
+                    self._conn = None
+                    raise DockerEngineError(f"{method} {path}: {e}") from None
+            if resp.will_close:
+                self._conn.close()
+                self._conn = None
+        if not 200 <= resp.status < 300:
+            try:
+                message = json.loads(data).get("message", "")
+            except Exception:
+                message = data.decode(errors="replace").strip()
+            raise DockerEngineError(f"{method} {path}: {resp.status} {message}", resp.status)
+        if not data:
+            return None
+        if "json" in (resp.getheader("Content-Type") or ""):
+            return json.loads(data)
+        return data.decode(errors="replace")
+
+    def stream_json(self, path: str, params: dict | None = None, on_open: Optional[Callable] = None):
+        """Yield JSON objects from a streaming endpoint (e.g. /events).
+
+        Uses its own connection with no read timeout; on_open(conn) receives
+        that connection so another thread can close() it to end the stream.
+        """
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        conn = _UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        try:
+            conn.request("GET", path, headers={"Host": "docker"})
+            resp = conn.getresponse()
+            if resp.status != 200:
+                raise DockerEngineError(f"GET {path}: {resp.status}", resp.status)
+            conn.sock.settimeout(None)
+            if on_open is not None:
+                on_open(conn)
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            raise DockerEngineError(f"GET {path}: {e}") from None
+        finally:
+            conn.close()
+
+    def ping(self) -> bool:
+        try:
+            return self.request("GET", "/_ping", timeout=2.0) == "OK"
+        except DockerEngineError:
+            return False
+
+    def containers(self, project: str | None = None, all_: bool = True) -> list[dict]:
+        """GET /containers/json, optionally filtered to one compose project."""
+        params = {"all": "1" if all_ else "0"}
+        if project:
+            params["filters"] = json.dumps({"label": [f"{DOCKER_COMPOSE_PROJECT_LABEL}={project}"]})
+        return self.request("GET", "/containers/json", params) or []
+
+    def container_action(self, container_id: str, action: str, timeout_s: int = 10):
+        """POST /containers/{id}/{start|stop|restart}."""
+        params = {"t": str(timeout_s)} if action in ("stop", "restart") else None
+        try:
+            self.request("POST", f"/containers/{container_id}/{action}", params,
+                         timeout=timeout_s + self.timeout)
+        except DockerEngineError as e:
+            if e.status != 304:   # already in the requested state
+                raise
+
+
+class DockerLogBuffer:
+    """Columnar ring of parsed `docker compose logs` lines.
+
+    Each line is parsed once on ingest: ANSI codes stripped, the "svc | "
+    prefix split off and interned as a service id, an RFC 3339 timestamp
+    (from `logs --timestamps`) parsed to epoch seconds, and the level read
+    from the start of the message (after an optional inner timestamp) or a
+    logfmt ``level=`` key in its head; other lines get level 0. Per-line fields live in numpy columns alongside the
+    text ring, addressed by a monotonically increasing sequence number, so a
+    tail read touches only the lines after the caller's cursor and service /
+    level filters are array masks, never a text re-scan.
+
+    Thread-safe: the reader thread appends while the GUI reads.
+    """
+
+    _ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+    _TS_RE = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?\s")
+    # "[2025-01-01 ]12:00:00[.123] [INFO] ..." / "INFO: ..." at the start of the body.
+    _LEVEL_RE = re.compile(
+        r"(?:(?:\d{4}-\d{2}-\d{2}[ T])?\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\s+)?"
+        r"[\[(<]?(TRACE|DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL)\b",
+        re.IGNORECASE,
+    )
+    _LEVEL_KEY_RE = re.compile(
+        r"\blevel=\"?(trace|debug|info|warn|warning|error|critical|fatal)\b", re.IGNORECASE)
+    _LEVEL_ALIASES = {"WARN": "WARNING", "FATAL": "CRITICAL"}
+    LEVEL_HEAD_CHARS = 96   # a level= key is only looked for near the start
+
+    def __init__(self, capacity: int = DOCKER_LOG_BUFFER_LINES):
+        self.capacity = int(capacity)
+        self._lock = threading.Lock()
+        self._text = [""] * self.capacity
+        self._t = np.zeros(self.capacity, dtype=np.float64)
+        self._service = np.zeros(self.capacity, dtype=np.int32)
+        self._level = np.zeros(self.capacity, dtype=np.int8)
+        self._body = np.zeros(self.capacity, dtype=np.int32)   # offset of the message body
+        self._service_ids = {"": 0}
+        self._service_names = [""]
+        self.next_seq = 0
+
+    @property
+    def first_seq(self) -> int:
+        return max(0, self.next_seq - self.capacity)
+
+    @property
+    def service_names(self) -> list[str]:
+        return self._service_names[1:]
+
+    @classmethod
+    def level_code(cls, name: str) -> int:
+        name = cls._LEVEL_ALIASES.get(name.upper(), name.upper())
+        try:
+            return DOCKER_LOG_LEVELS.index(name)
+        except ValueError:
+            return 0
+
+    def _parse(self, line: str):
+        text = self._ANSI_RE.sub("", line.rstrip("\n"))
+        service, body = "", 0
+        sep = text.find(" | ")
+        if sep >= 0:
+            service = text[:sep].strip()
+            body = sep + 3
+        t = None
+        m = self._TS_RE.match(text, body)
+        if m:
+            frac = (m.group(2) or "")[:7]   # fromisoformat takes at most microseconds
+            zone = m.group(3) or ""
+            try:
+                t = datetime.fromisoformat(m.group(1) + frac + ("+00:00" if zone == "Z" else zone)).timestamp()
+                body = m.end()
+            except ValueError:
+                t = None
+        m = (self._LEVEL_RE.match(text, body)
+             or self._LEVEL_KEY_RE.search(text, body, body + self.LEVEL_HEAD_CHARS))
+        level = self.level_code(m.group(1)) if m else 0
+        return text, service, body, t, level
+
+    def append(self, line: str, t: float = None) -> int:
+        text, service, body, line_t, level = self._parse(line)
+        with self._lock:
+            sid = self._service_ids.get(service)
+            if sid is None:
+                sid = self._service_ids[service] = len(self._service_names)
+                self._service_names.append(service)
+            seq = self.next_seq
+            i = seq % self.capacity
+            self._text[i] = text
+            self._t[i] = line_t if line_t is not None else (time.time() if t is None else t)
+            self._service[i] = sid
+            self._level[i] = level
+            self._body[i] = body
+            self.next_seq = seq + 1
+        return seq
+
+    def read_since(self, seq: int, services=None, min_level: str = None, limit: int = None):
+        """Lines with sequence >= seq that pass the filters.
+
+        Returns (next_seq, entries), entries being (seq, t, service, level,
+        body) tuples; pass next_seq back in to continue. services is an
+        iterable of service names (None = all); min_level a DOCKER_LOG_LEVELS
+        name (lines with no level always pass). limit keeps the newest lines.
+        """
+        with self._lock:
+            end = self.next_seq
+            start = max(int(seq), self.first_seq)
+            if start >= end:
+                return end, []
+            seqs = np.arange(start, end, dtype=np.int64)
+            ring = seqs % self.capacity
+            mask = np.ones(len(seqs), dtype=bool)
+            if services is not None:
+                ids = [self._service_ids[s] for s in services if s in self._service_ids]
+                mask &= np.isin(self._service[ring], ids)
+            if min_level:
+                lvl = self._level[ring]
+                mask &= (lvl == 0) | (lvl >= self.level_code(min_level))
+            ring = ring[mask]
+            seqs = seqs[mask]
+            if limit is not None:
+                ring, seqs = ring[-limit:], seqs[-limit:]
+            entries = [
+                (int(s), float(self._t[i]), self._service_names[self._service[i]],
+                 DOCKER_LOG_LEVELS[self._level[i]], self._text[i][self._body[i]:])
+                for s, i in zip(seqs.tolist(), ring.tolist())
+            ]
+        return end, entries
+
+    def clear(self):
+        with self._lock:
+            self._text = [""] * self.capacity
+            self.next_seq = 0
+
+class ContainerStatsRing:
+    """Fixed-capacity ring of DOCKER_STATS_DTYPE rows; the oldest row is evicted."""
+
+    def __init__(self, capacity: int):
+        self._buf = np.zeros(capacity, dtype=DOCKER_STATS_DTYPE)
+        self._n = 0   # rows ever appended
+
+    def __len__(self) -> int:
+        return min(self._n, len(self._buf))
+
+    def append(self, row: tuple):
+        self._buf[self._n % len(self._buf)] = row
+        self._n += 1
+
+    def rows(self) -> np.ndarray:
+        """Copy of the retained rows, oldest first."""
+        cap = len(self._buf)
+        if self._n <= cap:
+            return self._buf[:self._n].copy()
+        i = self._n % cap
+        return np.concatenate((self._buf[i:], self._buf[:i]))
+
+    @property
+    def wrapped(self) -> bool:
+        """True once rows have been evicted."""
+        return self._n > len(self._buf)
+
+    def first_t(self) -> float:
+        if self._n == 0:
+            return math.inf
+        return float(self._buf[self._n % len(self._buf) if self.wrapped else 0]["t"])
+
+    def last(self):
+        if self._n == 0:
+            return None
+        return self._buf[(self._n - 1) % len(self._buf)].copy()
+
+    def clear(self):
+        self._n = 0
+
+
+class ContainerStatsSampler:
+    """Sample CPU, memory, network and block I/O of the compose containers.
+
+    Counters come straight from the container's cgroup v2 files (plus
+    /proc/<pid>/net/dev for network) when this process can see them, which
+    costs a few small file reads; otherwise from the Engine one-shot
+    /containers/{id}/stats endpoint. Cumulative counters are differenced into
+    rates, kept per service in a fine ring and a 10:1 downsampled coarse ring.
+
+    mark_step() records sweep step boundaries (CaptureController.on_step) and
+    wakes the sampler so a row lands at each boundary; step_summary() and
+    export_csv() then attribute rows to the step containing their midpoint.
+    """
+
+    def __init__(self, engine: "DockerEngineClient", targets: Callable[[], dict],
+                 interval_s: float = DOCKER_STATS_INTERVAL_S,
+                 cgroup_root: str = DOCKER_CGROUP_ROOT):
+        self.engine = engine
+        self.targets = targets          # () -> {service: container_id} of running containers
+        self.interval_s = interval_s
+        self.cgroup_root = cgroup_root
+        self._lock = threading.Lock()
+        self._fine: dict[str, ContainerStatsRing] = {}
+        self._coarse: dict[str, ContainerStatsRing] = {}
+        self._pending: dict[str, list] = {}
+        self._prev: dict[str, tuple] = {}        # service -> (container_id, t, counters)
+        self._source: dict[str, str] = {}
+        self._cgroup_dirs: dict[str, Optional[str]] = {}
+        self._pids: dict[str, int] = {}
+        self._steps: list[dict] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -- Lifecycle ---------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self._stop.is_set() and self._thread is not None:
+            # A stop() is still winding down; let that loop exit before restarting.
+            self._thread.join()
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="docker_stats")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def sample_now(self):
+        """Take the next sample immediately instead of at the next tick."""
+        self._wake.set()
+
+    def forget(self, cid: str):
+        """Drop the cached cgroup dir and PID of a container (it started or died)."""
+        self._cgroup_dirs.pop(cid, None)
+        self._pids.pop(cid, None)
+
+    def clear(self):
+        with self._lock:
+            self._fine.clear()
+            self._coarse.clear()
+            self._pending.clear()
+            self._prev.clear()
+            self._steps.clear()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception:
+                logging.exception("DOCKER: stats sample failed")
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+
+    # -- Counter sources ---------------------------------------------------
+
+    def _cgroup_dir(self, cid: str) -> Optional[str]:
+        if cid in self._cgroup_dirs:
+            return self._cgroup_dirs[cid]
+        root = self.cgroup_root
+        found = None
+        for pattern in (f"{root}/system.slice/docker-{cid}*.scope",
+                        f"{root}/docker.slice/docker-{cid}*.scope",
+                        f"{root}/docker/{cid}*"):
+            for path in glob.glob(pattern):
+                if os.access(os.path.join(path, "cpu.stat"), os.R_OK):
+                    found = path
+                    break
+            if found:
+                break
+        self._cgroup_dirs[cid] = found
+        return found
+
+    @staticmethod
+    def _read_kv(path: str) -> dict:
+        out = {}
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if value.strip().isdigit():
+                    out[key] = int(value)
+        return out
+
+    def _container_pid(self, cid: str) -> int:
+        if cid not in self._pids:
+            try:
+                info = self.engine.request("GET", f"/containers/{cid}/json") or {}
+                self._pids[cid] = int((info.get("State") or {}).get("Pid") or 0)
+            except DockerEngineError:
+                self._pids[cid] = 0
+        return self._pids[cid]
+
+    def _read_net_dev(self, pid: int) -> tuple[float, float]:
+        rx = tx = 0
+        try:
+            with open(f"/proc/{pid}/net/dev") as f:
+                lines = f.readlines()[2:]
+        except OSError:
+            return math.nan, math.nan
+        for line in lines:
+            name, _, fields = line.partition(":")
+            if name.strip() == "lo":
+                continue
+            cols = fields.split()
+            rx += int(cols[0])
+            tx += int(cols[8])
+        return float(rx), float(tx)
+
+    def _read_cgroup(self, cid: str, path: str) -> dict:
+        cpu = self._read_kv(os.path.join(path, "cpu.stat"))
+        with open(os.path.join(path, "memory.current")) as f:
+            mem = int(f.read())
+        try:
+            mem -= self._read_kv(os.path.join(path, "memory.stat")).get("inactive_file", 0)
+        except OSError:
+            pass
+        blk_r = blk_w = 0
+        try:
+            with open(os.path.join(path, "io.stat")) as f:
+                for line in f:
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition("=")
+                        if key == "rbytes":
+                            blk_r += int(value)
+                        elif key == "wbytes":
+                            blk_w += int(value)
+        except OSError:
+            blk_r = blk_w = math.nan
+        pid = self._container_pid(cid)
+        rx, tx = self._read_net_dev(pid) if pid else (math.nan, math.nan)
+        if math.isnan(rx):
+            self._pids.pop(cid, None)   # process gone or restarted: look the PID up again
+        return {"cpu_s": cpu.get("usage_usec", 0) / 1e6, "mem": float(mem),
+                "rx": rx, "tx": tx, "blk_r": float(blk_r), "blk_w": float(blk_w)}
+
+    def _read_engine(self, cid: str) -> dict:
+        st = self.engine.request("GET", f"/containers/{cid}/stats",
+                                 {"stream": "false", "one-shot": "true"}) or {}
+        mem_stats = st.get("memory_stats") or {}
+        detail = mem_stats.get("stats") or {}
+        mem = float(mem_stats.get("usage") or 0)
+        mem -= float(detail.get("inactive_file", detail.get("total_inactive_file", 0)) or 0)
+        nets = (st.get("networks") or {}).values()
+        blk_r = blk_w = 0.0
+        for entry in (st.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+            op = str(entry.get("op", "")).lower()
+            if op == "read":
+                blk_r += entry.get("value", 0)
+            elif op == "write":
+                blk_w += entry.get("value", 0)
+        return {
+            "cpu_s": ((st.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0) / 1e9,
+            "mem": mem,
+            "rx": float(sum(n.get("rx_bytes", 0) for n in nets)) if nets else math.nan,
+            "tx": float(sum(n.get("tx_bytes", 0) for n in nets)) if nets else math.nan,
+            "blk_r": blk_r,
+            "blk_w": blk_w,
+        }
+
+    def _read_counters(self, service: str, cid: str) -> Optional[dict]:
+        path = self._cgroup_dir(cid)
+        if path is not None:
+            try:
+                counters = self._read_cgroup(cid, path)
+                self._source[service] = "cgroup"
+                return counters
+            except (OSError, ValueError):
+                self._cgroup_dirs[cid] = None   # container gone or cgroup not readable
+                self._pids.pop(cid, None)
+        try:
+            counters = self._read_engine(cid)
+        except DockerEngineError as e:
+            logging.debug(f"DOCKER: stats unavailable for {service}: {e}")
+            return None
+        self._source[service] = "engine"
+        return counters
+
+    # -- Sampling ----------------------------------------------------------
+
+    def sample_once(self):
+        """Read every target's counters and append one row per service."""
+        for service, cid in (self.targets() or {}).items():
+            if not cid:
+                continue
+            counters = self._read_counters(service, cid)
+            t = time.time()
+            if counters is None:
+                continue
+            with self._lock:
+                prev = self._prev.get(service)
+                self._prev[service] = (cid, t, counters)
+                if prev is None or prev[0] != cid:
+                    continue   # first sample for this container: no interval yet
+                dt = t - prev[1]
+                if dt <= 0:
+                    continue
+                before = prev[2]
+
+                def _rate(key, scale=1.0):
+                    d = counters[key] - before[key]
+                    return d / dt * scale if d >= 0 else math.nan   # counter reset
+
+                row = (t, dt, _rate("cpu_s", 100.0), counters["mem"],
+                       _rate("rx"), _rate("tx"), _rate("blk_r"), _rate("blk_w"))
+                self._append(service, row)
+
+    def _append(self, service: str, row: tuple):
+        fine = self._fine.get(service)
+        if fine is None:
+            fine = self._fine[service] = ContainerStatsRing(DOCKER_STATS_FINE_ROWS)
+            self._coarse[service] = ContainerStatsRing(DOCKER_STATS_COARSE_ROWS)
+        fine.append(row)
+        pending = self._pending.setdefault(service, [])
+        pending.append(row)
+        if len(pending) >= DOCKER_STATS_COARSE_FACTOR:
+            self._coarse[service].append(self._downsample(np.array(pending, dtype=DOCKER_STATS_DTYPE)))
+            pending.clear()
+
+    @staticmethod
+    def _weighted_mean(values: np.ndarray, dt: np.ndarray) -> float:
+        ok = np.isfinite(values)
+        w = dt[ok].sum()
+        return float((values[ok] * dt[ok]).sum() / w) if w > 0 else math.nan
+
+    @classmethod
+    def _downsample(cls, rows: np.ndarray) -> tuple:
+        """Collapse rows into one covering their total interval (rates dt-weighted, memory peak)."""
+        dt = rows["dt"]
+        mem = rows["mem_bytes"][np.isfinite(rows["mem_bytes"])]
+        return (float(rows["t"][-1]), float(dt.sum()),
+                cls._weighted_mean(rows["cpu_pct"], dt),
+                float(mem.max()) if mem.size else math.nan,
+                *(cls._weighted_mean(rows[k], dt)
+                  for k in ("net_rx_Bps", "net_tx_Bps", "blk_read_Bps", "blk_write_Bps")))
+
+    # -- Queries -----------------------------------------------------------
+
+    def services(self) -> list[str]:
+        with self._lock:
+            return sorted(self._fine)
+
+    def latest(self) -> dict:
+        """{service: {field: value, ..., "source": "cgroup"|"engine"}} from the newest rows."""
+        out = {}
+        with self._lock:
+            for service, ring in self._fine.items():
+                row = ring.last()
+                if row is None:
+                    continue
+                out[service] = {k: float(row[k]) for k in DOCKER_STATS_DTYPE.names}
+                out[service]["source"] = self._source.get(service, "")
+        return out
+
+    def rows(self, service: str, t0: float = -math.inf, t1: float = math.inf) -> np.ndarray:
+        """Rows whose interval midpoint lies in [t0, t1); coarse rows once fine ones are evicted."""
+        with self._lock:
+            fine = self._fine.get(service)
+            if fine is None:
+                return np.zeros(0, dtype=DOCKER_STATS_DTYPE)
+            ring = fine if not fine.wrapped or fine.first_t() <= t0 else self._coarse[service]
+            rows = ring.rows()
+        mid = rows["t"] - rows["dt"] / 2
+        return rows[(mid >= t0) & (mid < t1)]
+
+    # -- Sweep steps -------------------------------------------------------
+
+    def mark_step(self, event: str, info: dict):
+        """CaptureController.on_step callback: "begin" opens a step, "end" closes it."""
+        with self._lock:
+            if event == "begin":
+                self._steps.append({**info, "t0": info.get("t", time.time()), "t1": None})
+                del self._steps[:-DOCKER_STATS_STEPS_MAX]
+            elif event == "end" and self._steps and self._steps[-1]["t1"] is None:
+                self._steps[-1]["t1"] = info.get("t", time.time())
+        self.sample_now()
+
+    def steps(self) -> list[dict]:
+        with self._lock:
+            return [dict(s) for s in self._steps]
+
+    def step_summary(self) -> list[dict]:
+        """One dict per (step, service) with CPU/memory use and bytes moved during the step."""
+        out = []
+        now = time.time()
+        services = self.services()
+        for step in self.steps():
+            t0, t1 = step["t0"], step["t1"] or now
+            for service in services:
+                rows = self.rows(service, t0, t1)
+                dt = rows["dt"]
+                cpu = rows["cpu_pct"][np.isfinite(rows["cpu_pct"])]
+                mem = rows["mem_bytes"][np.isfinite(rows["mem_bytes"])]
+
+                def _total(key):
+                    v = rows[key]
+                    ok = np.isfinite(v)
+                    return float((v[ok] * dt[ok]).sum()) if ok.any() else math.nan
+
+                out.append({
+                    "step": step.get("index"),
+                    "f_mhz": step["f_hz"] / 1e6 if step.get("f_hz") is not None else math.nan,
+                    "preset": step.get("preset", ""),
+                    "overrides": bool(step.get("overrides")),
+                    "channel": step.get("channel", ""),
+                    "t_start": t0,
+                    "t_end": t1,
+                    "duration_s": t1 - t0,
+                    "service": service,
+                    "samples": int(len(rows)),
+                    "cpu_mean_pct": self._weighted_mean(rows["cpu_pct"], dt),
+                    "cpu_peak_pct": float(cpu.max()) if cpu.size else math.nan,
+                    "mem_mean_mib": self._weighted_mean(rows["mem_bytes"], dt) / 2**20,
+                    "mem_peak_mib": float(mem.max()) / 2**20 if mem.size else math.nan,
+                    "net_rx_mib": _total("net_rx_Bps") / 2**20,
+                    "net_tx_mib": _total("net_tx_Bps") / 2**20,
+                    "blk_read_mib": _total("blk_read_Bps") / 2**20,
+                    "blk_write_mib": _total("blk_write_Bps") / 2**20,
+                })
+        return out
+
+    def export_csv(self, path: str, mode: str = "steps") -> int:
+        """Write per-step summaries ("steps") or every retained row ("samples"); return row count."""
+        if mode == "steps":
+            rows = self.step_summary()
+            fields = list(rows[0]) if rows else ["step", "service"]
+        elif mode == "samples":
+            steps = self.steps()
+            starts = np.array([s["t0"] for s in steps], dtype=np.float64)
+            rows = []
+            for service in self.services():
+                data = self.rows(service)
+                mid = data["t"] - data["dt"] / 2
+                idx = np.searchsorted(starts, mid, side="right") - 1
+                for r, m, i in zip(data, mid, idx):
+                    step = steps[i] if i >= 0 else None
+                    if step is not None and step["t1"] is not None and m >= step["t1"]:
+                        step = None   # between steps
+                    rows.append({"service": service, **{k: float(r[k]) for k in DOCKER_STATS_DTYPE.names},
+                                 "step": step.get("index") if step else "",
+                                 "preset": step.get("preset", "") if step else ""})
+            fields = ["service", *DOCKER_STATS_DTYPE.names, "step", "preset"]
+        else:
+            raise ValueError(f"mode must be 'steps' or 'samples', not {mode!r}")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({
+                    k: (f"{v:.3f}" if k in ("t", "t_start", "t_end") else f"{v:.6g}")
+                    if isinstance(v, float) else v
+                    for k, v in row.items()
+                })
+        return len(rows)
+
+
 class DockerManager:
     """Manage docker compose services: status queries, action execution, log streaming.
 
@@ -3371,9 +4230,8 @@ class DockerManager:
         self.compose_dir = compose_dir
         self._services: dict = {}
         self._service_names: list[str] = []
-        self._log_messages: deque = deque(maxlen=2000)
-        self._log_lock = threading.Lock()
-        self._log_rendered_count: int = 0
+        self.log = DockerLogBuffer(DOCKER_LOG_BUFFER_LINES)
+        self._log_read_seq: int = 0
         self._log_paused: bool = False
         self._log_proc = None
         self._log_busy: bool = False
@@ -3381,6 +4239,17 @@ class DockerManager:
         self._action_busy: bool = False
         self._compose_cmd_cache = None
         self._refresh_busy: bool = False
+        self.engine = DockerEngineClient()
+        self.project = self.detect_project_name(compose_dir)
+        # Event-driven service-state model (events_start)
+        self._state_lock = threading.Lock()
+        self._service_states: dict[str, dict] = {}
+        self._state_listeners: list[Callable] = []
+        self._events_stop = threading.Event()
+        self._events_thread = None
+        self._events_conn = None
+        # Per-container resource telemetry (stats.start())
+        self.stats = ContainerStatsSampler(self.engine, self._stats_targets)
 
     # -- Properties --------------------------------------------------------
 
@@ -3455,6 +4324,55 @@ class DockerManager:
         self._compose_cmd_cache = ()
         return ()
 
+    @staticmethod
+    def detect_project_name(compose_dir: str) -> str:
+        """Compose project name: COMPOSE_PROJECT_NAME, top-level ``name:`` in the
+        compose file, else the normalized directory name (compose's default)."""
+        name = os.environ.get("COMPOSE_PROJECT_NAME", "").strip()
+        if not name:
+            for fname in ("compose.yaml", "compose.yml", "docker-compose.yml", "docker-compose.yaml"):
+                try:
+                    with open(os.path.join(compose_dir, fname), "r", encoding="utf-8") as fh:
+                        m = re.search(r"^name:\s*[\"']?([^\"'\s#]+)", fh.read(), re.MULTILINE)
+                except OSError:
+                    continue
+                if m:
+                    name = m.group(1)
+                break
+        if not name:
+            name = os.path.basename(os.path.abspath(compose_dir))
+        return re.sub(r"[^a-z0-9_-]", "", name.lower())
+
+    @staticmethod
+    def services_from_containers(containers: list) -> dict:
+        """Engine ``/containers/json`` rows -> {service: info_dict} (same shape as parse_ps_json)."""
+        services = {}
+        for item in containers:
+            labels = item.get("Labels") or {}
+            names = item.get("Names") or []
+            name = names[0].lstrip("/") if names else str(item.get("Id", ""))[:12]
+            service = labels.get(DOCKER_COMPOSE_SERVICE_LABEL) or name
+            port_items = []
+            for p in item.get("Ports") or []:
+                tgt = p.get("PrivatePort")
+                proto = p.get("Type") or "tcp"
+                pub = p.get("PublicPort")
+                if pub is not None:
+                    host = p.get("IP") or ""
+                    left = f"{host}:{pub}" if host else str(pub)
+                    port_items.append(f"{left}->{tgt}/{proto}")
+                elif tgt is not None:
+                    port_items.append(f"{tgt}/{proto}")
+            services[service] = {
+                "container": name or "—",
+                "id": str(item.get("Id") or ""),
+                "state": str(item.get("State") or "—"),
+                "command": str(item.get("Command") or "—"),
+                "ports": ", ".join(dict.fromkeys(port_items)) if port_items else "—",
+                "status": str(item.get("Status") or "—"),
+            }
+        return services
+
     def parse_ps_json(self, text: str) -> dict:
         """Parse ``docker compose ps --format=json`` output into {service: info_dict}."""
         if not text.strip():
@@ -3533,6 +4451,17 @@ class DockerManager:
         services = {}
         detail = ""
 
+        # One Engine API round trip when the socket is usable; CLI otherwise.
+        if self.engine.available:
+            try:
+                services = self.services_from_containers(self.engine.containers(self.project))
+            except DockerEngineError as e:
+                logging.debug("DOCKER: engine API refresh failed, using CLI: %s", e)
+            else:
+                self._services = dict(services)
+                self._service_names = sorted(services.keys())
+                return "Reachable", services, detail
+
         rc, _, err = self.run_cmd(["docker", "info"], timeout=5.0)
         if rc == 0:
             engine_status = "Reachable"
@@ -3561,6 +4490,131 @@ class DockerManager:
         self._service_names = sorted(services.keys())
         return engine_status, services, detail
 
+    # -- Event-driven service state ---------------------------------------
+
+    def on_service_state(self, callback: Callable[[str, dict, str], None]):
+        """Register callback(service, state_dict, action), fired from the events thread."""
+        self._state_listeners.append(callback)
+
+    def service_state(self, service: str) -> dict | None:
+        with self._state_lock:
+            info = self._service_states.get(service)
+            return dict(info) if info else None
+
+    def events_start(self) -> bool:
+        """Follow the Engine /events stream for this compose project.
+
+        Seeds the state model from /containers/json, then applies container
+        events as they arrive; reconnects (and re-seeds) after any failure.
+        Returns False when the Engine socket is not usable.
+        """
+        if self._events_thread is not None and self._events_thread.is_alive():
+            return True
+        if not self.engine.available:
+            return False
+        self._events_stop.clear()
+        self._events_thread = threading.Thread(
+            target=self._events_loop, daemon=True, name="docker_events")
+        self._events_thread.start()
+        return True
+
+    def events_stop(self):
+        self._events_stop.set()
+        conn = self._events_conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _events_loop(self):
+        filters = json.dumps({
+            "type": ["container"],
+            "label": [f"{DOCKER_COMPOSE_PROJECT_LABEL}={self.project}"],
+        })
+        while not self._events_stop.is_set():
+            try:
+                self._seed_service_states(self.engine.containers(self.project))
+                for event in self.engine.stream_json(
+                        "/events", {"filters": filters},
+                        on_open=lambda conn: setattr(self, "_events_conn", conn)):
+                    if self._events_stop.is_set():
+                        break
+                    self._apply_event(event)
+            except DockerEngineError as e:
+                if not self._events_stop.is_set():
+                    logging.debug("DOCKER: events stream lost (%s); retrying", e)
+            finally:
+                self._events_conn = None
+            self._events_stop.wait(DOCKER_EVENTS_RETRY_S)
+
+    def _stats_targets(self) -> dict:
+        """{service: container_id} of running containers, for ContainerStatsSampler."""
+        with self._state_lock:
+            states = {svc: dict(info) for svc, info in self._service_states.items()}
+        if not states:
+            states = {svc: {"state": str(row.get("state", "")).lower(), "id": row.get("id", "")}
+                      for svc, row in self._services.items()}
+        return {svc: info.get("id") for svc, info in states.items()
+                if info.get("state") == "running" and info.get("id")}
+
+    def _seed_service_states(self, containers: list):
+        for service, row in self.services_from_containers(containers).items():
+            self._set_service_state(service, {
+                "state": row["state"].lower(),
+                "container": row["container"],
+                "id": row["id"],
+            }, "sync")
+
+    def _apply_event(self, event: dict):
+        action = str(event.get("Action") or event.get("status") or "")
+        actor = event.get("Actor") or {}
+        attrs = actor.get("Attributes") or {}
+        service = attrs.get(DOCKER_COMPOSE_SERVICE_LABEL)
+        if not service:
+            return
+        update = {"container": attrs.get("name", ""), "id": actor.get("ID", "")}
+        if action.startswith("health_status"):
+            update["health"] = action.split(":", 1)[-1].strip()
+            action = "health_status"
+        elif action in DOCKER_EVENT_STATES:
+            state = DOCKER_EVENT_STATES[action]
+            if state is not None:
+                update["state"] = state
+            if action == "die":
+                update["exit_code"] = attrs.get("exitCode")
+            elif action == "oom":
+                update["oom"] = True
+            elif action == "start":
+                update["exit_code"] = None
+                update["oom"] = False
+            if action in ("start", "die") and update["id"]:
+                self.stats.forget(update["id"])   # new PID (and maybe cgroup) on restart
+        else:
+            return  # exec_*, attach, top, ... carry no lifecycle change
+        self._set_service_state(service, update, action)
+
+    def _set_service_state(self, service: str, update: dict, action: str):
+        with self._state_lock:
+            info = self._service_states.setdefault(service, {"state": "—"})
+            before = dict(info)
+            info.update(update)
+            info["t"] = time.time()
+            changed = action != "sync" or before.get("state") != info.get("state")
+            snapshot = dict(info)
+            row = self._services.get(service)
+            if row is not None and "state" in update:
+                row["state"] = info["state"]
+                if action == "die":
+                    row["status"] = f"Exited ({info.get('exit_code')})"
+        if not changed:
+            return
+        for cb in list(self._state_listeners):
+            try:
+                cb(service, snapshot, action)
+            except Exception:
+                logging.exception("DOCKER: service state listener failed for %s", service)
+
     # -- Compose actions ---------------------------------------------------
 
     def run_compose_action(self, action: str, *,
@@ -3569,8 +4623,14 @@ class DockerManager:
         """Run a compose action (start/stop/restart/up/down).
 
         Returns (rc, stdout, stderr).  Synchronous — run in a thread if needed.
-        Caller manages the ``action_busy`` flag.
+        Caller manages the ``action_busy`` flag. start/stop/restart of existing
+        containers go straight to the Engine API; up/down need compose.
         """
+        if action in ("start", "stop", "restart") and not extra_args and self.engine.available:
+            result = self._engine_container_action(action, services)
+            if result is not None:
+                return result
+
         compose_cmd = self.get_compose_cmd()
         if not compose_cmd:
             return 1, "", "docker compose command not found"
@@ -3582,6 +4642,30 @@ class DockerManager:
             cmd.extend(services)
         return self.run_cmd(cmd, cwd=self.compose_dir, timeout=40.0)
 
+    def _engine_container_action(self, action: str, services: list[str] | None):
+        """Apply action to the project's containers via the Engine API.
+
+        Returns (rc, stdout, stderr), or None to fall back to the compose CLI
+        (engine unreachable, or a requested service has no container yet).
+        """
+        try:
+            known = self.services_from_containers(self.engine.containers(self.project))
+        except DockerEngineError as e:
+            logging.debug("DOCKER: engine API unavailable for %s, using CLI: %s", action, e)
+            return None
+        targets = services or sorted(known)
+        if not targets or any(name not in known for name in targets):
+            return None
+        done, errors = [], []
+        for name in targets:
+            try:
+                self.engine.container_action(known[name]["id"], action)
+                done.append(known[name]["container"])
+            except DockerEngineError as e:
+                errors.append(str(e))
+        out = "\n".join(f"{action}: {c}" for c in done)
+        return (1 if errors else 0), out, "\n".join(errors)
+
     def preview_command(self, action: str, *,
                         services: list[str] | None = None,
                         extra_args: list[str] | None = None) -> str:
@@ -3617,7 +4701,9 @@ class DockerManager:
         self.stream_stop()
         self._log_paused = False
 
-        cmd = [*compose_cmd, "logs", "-f", "--tail", tail]
+        # --timestamps gives DockerLogBuffer the container's own time for
+        # every line, including the --tail history.
+        cmd = [*compose_cmd, "logs", "-f", "--timestamps", "--tail", tail]
         if service:
             cmd.append(service)
 
@@ -3682,25 +4768,25 @@ class DockerManager:
     # -- Log buffer --------------------------------------------------------
 
     def log_append(self, line: str):
-        """Append a timestamped log line to the internal buffer."""
-        ts = datetime.now().strftime("%H:%M:%S")
-        with self._log_lock:
-            self._log_messages.append((ts, line.rstrip("\n")))
-
-    def get_new_log_entries(self) -> list[tuple[str, str]]:
-        """Return log entries not yet rendered and advance the render counter."""
-        with self._log_lock:
-            entries = list(self._log_messages)
-            start = min(self._log_rendered_count, len(entries))
-            tail = entries[start:]
-        self._log_rendered_count = len(entries)
-        return tail
+        """Parse and append one log line to the structured buffer."""
+        self.log.append(line)
+
+    def get_new_log_entries(self, services=None, min_level: str = None) -> list[tuple]:
+        """Return (seq, t, service, level, body) for lines not yet read, and advance the cursor."""
+        self._log_read_seq, entries = self.log.read_since(
+            self._log_read_seq, services=services, min_level=min_level)
+        return entries
+
+    def reread_log(self, services=None, min_level: str = None, limit: int = None) -> list[tuple]:
+        """Return every buffered line passing the filters, and move the cursor past them."""
+        self._log_read_seq, entries = self.log.read_since(
+            self.log.first_seq, services=services, min_level=min_level, limit=limit)
+        return entries
 
     def clear_log(self):
-        """Clear the log buffer and reset the render counter."""
-        with self._log_lock:
-            self._log_messages.clear()
-        self._log_rendered_count = 0
+        """Clear the log buffer and reset the read cursor."""
+        self.log.clear()
+        self._log_read_seq = 0
 
 
 # ===== ENTRY POINT ===== #